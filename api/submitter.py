@@ -223,7 +223,9 @@ class OrderAPISubmitter:
             purchase_datetime = datetime.now().isoformat()
 
         total_price = order.get("total_price", "N/A")
-        if isinstance(total_price, str):
+        if order.get("total_cents") is not None:
+            total_price = order["total_cents"] / 100
+        elif isinstance(total_price, str):
             total_price = total_price.replace("$", "").replace(",", "")
             try:
                 total_price = float(total_price)
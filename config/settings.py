@@ -1,13 +1,24 @@
 import os
 
 EMAIL_SERVERS = {
-    "gmail": {"server": "imap.gmail.com", "port": 993, "use_ssl": True},
+    "gmail": {
+        "server": "imap.gmail.com",
+        "port": 993,
+        "use_ssl": True,
+        "partial_fetch": True,
+    },
     "proton": {
         "server": os.getenv("PROTON_BRIDGE_HOST", "127.0.0.1"),
         "port": int(os.getenv("PROTON_BRIDGE_PORT", 1143)),
         "use_ssl": False,
+        "partial_fetch": True,
+    },
+    "icloud": {
+        "server": "imap.mail.me.com",
+        "port": 993,
+        "use_ssl": True,
+        "partial_fetch": False,
     },
-    "icloud": {"server": "imap.mail.me.com", "port": 993, "use_ssl": True},
 }
 
 CURRENT_VERSION = "2.1.0"
@@ -296,3 +307,82 @@ AMAZON_OUTPUT_SETTINGS = {
 }
 
 COSTCO_OUTPUT_SETTINGS = {"enable_output": False, "csv_filename": "costco_orders.csv"}
+
+PARSE_SETTINGS = {
+    "backend": os.getenv("BBOS_PARSE_BACKEND", "thread"),
+    "max_workers": None,
+}
+
+SYNC_SETTINGS = {
+    # Searches normally start above the highest fully processed UID; every
+    # full_audit_hours one search covers the whole date range again.
+    "full_audit_hours": 24,
+}
+
+MONITOR_SETTINGS = {
+    "use_idle": os.getenv("BBOS_MONITOR_IDLE", "1") != "0",
+    # Servers drop IDLE sessions after 30 minutes, so IDLE is re-issued sooner
+    "idle_renew_seconds": 25 * 60,
+    "safety_poll_seconds": 10 * 60,
+    "poll_interval_seconds": 30,
+}
+
+FETCH_SETTINGS = {
+    # Batches are packed by RFC822.SIZE up to batch_bytes; anything larger than
+    # large_message_bytes is fetched on its own.
+    "batch_bytes": int(os.getenv("BBOS_BATCH_BYTES", 8 * 1024 * 1024)),
+    "large_message_bytes": 5 * 1024 * 1024,
+    "size_prefetch_chunk": 1000,
+}
+
+BACKFILL_SETTINGS = {
+    # Large UID sets are split into contiguous shards, each fetched on its own
+    # IMAP connection (capped by the server's concurrency limit below).
+    "enabled": os.getenv("BBOS_BACKFILL_SHARDS", "1") != "0",
+    "connections": int(os.getenv("BBOS_BACKFILL_CONNECTIONS", 4)),
+    "min_messages": 1000,
+}
+
+RATE_SETTINGS = {
+    # Batch size and delays adapt between min and max per server; learned
+    # values are kept in cache/rate_<server>.json between runs.
+    "adaptive": os.getenv("BBOS_ADAPTIVE_RATE", "1") != "0",
+    "limits": {
+        "default": {
+            "batch_size": {"min": 10, "start": 50, "max": 200, "step": 10},
+            "batch_delay": {"min": 0.1, "start": 0.5, "max": 10.0, "step": 0.05},
+            "fetch_delay": {"min": 0.02, "start": 0.1, "max": 2.0, "step": 0.01},
+            "concurrency": {"min": 1, "start": 1, "max": 2},
+            "max_fetches_per_session": 1000,
+            "slow_command_seconds": 5.0,
+        },
+        "imap.gmail.com": {
+            "batch_size": {"min": 10, "start": 50, "max": 500, "step": 25},
+            "batch_delay": {"min": 0.0, "start": 0.5, "max": 10.0, "step": 0.05},
+            "fetch_delay": {"min": 0.0, "start": 0.1, "max": 2.0, "step": 0.01},
+            "concurrency": {"min": 1, "start": 1, "max": 4},
+            "max_fetches_per_session": 2500,
+            "slow_command_seconds": 5.0,
+        },
+        "proton": {
+            "batch_size": {"min": 50, "start": 200, "max": 500, "step": 25},
+            "batch_delay": {"min": 0.0, "start": 0.05, "max": 2.0, "step": 0.01},
+            "fetch_delay": {"min": 0.0, "start": 0.01, "max": 0.5, "step": 0.005},
+            "concurrency": {"min": 1, "start": 1, "max": 4},
+            "max_fetches_per_session": 5000,
+            "slow_command_seconds": 10.0,
+        },
+    },
+}
+
+SQLITE_SETTINGS = {
+    # Order databases run in WAL mode: queries use their own read-only
+    # connections and read the last committed state without waiting for writes
+    # still queued on the writer thread, which commits everything queued during
+    # the previous commit as one transaction.
+    "writer_thread": os.getenv("BBOS_DB_WRITER", "1") != "0",
+    "write_queue_depth": 1000,
+    "mmap_bytes": 256 * 1024 * 1024,
+    "cache_kib": 64 * 1024,
+    "busy_timeout_ms": 5000,
+}
@@ -2,17 +2,19 @@
 
 import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Set
+from typing import Any, Dict, Iterable, List, Optional, Set
 
 from api.submitter import APIConfig, OrderAPISubmitter
-from config.settings import SEARCH_CRITERIA
+from config.settings import MONITOR_SETTINGS, SEARCH_CRITERIA
 from email_processing.handlers import OrderEmailHandler
+from email_processing.orders import OrderCollection, order_key
 
 
 class MonitoringOrderHandler(OrderEmailHandler):
     def __init__(self, connector, monitoring_date=None):
         super().__init__(connector)
         self.monitoring_date = monitoring_date
+        self.deferred_uids: List[bytes] = []
 
     def _get_dynamic_search_criteria(self, email_type: str) -> Dict[str, Any]:
         criteria = SEARCH_CRITERIA[email_type].copy()
@@ -27,14 +29,15 @@ class MonitoringOrderHandler(OrderEmailHandler):
         success, messages = self.connector.search_emails(folder, dynamic_criteria)
 
         if not success:
-            return []
+            return OrderCollection()
 
         print(f"Found {len(messages)} confirmation emails")
-        orders = []
+        orders = OrderCollection()
 
         for msg_id in messages:
             success, email_data = self.connector.fetch_email(msg_id)
             if not success:
+                self.deferred_uids.append(msg_id)
                 continue
 
             result = self.processor.process_confirmation_email(email_data)
@@ -52,13 +55,16 @@ class MonitoringOrderHandler(OrderEmailHandler):
                 )
                 self.statistics["confirmations"] += 1
                 print(f"Processed confirmation: Order {result['order_number']}")
+                self.connector.mark_uid_processed(msg_id)
 
             self._update_stats(bool(result.get("order_number")))
 
+        self.connector.checkpoint()
         return orders
 
     def process_cancellation_emails(self, folder: str, orders):
         print(f"\nProcessing cancellation emails in folder: {folder}")
+        orders = OrderCollection.wrap(orders)
 
         dynamic_criteria = self._get_dynamic_search_criteria("cancellation")
         success, messages = self.connector.search_emails(folder, dynamic_criteria)
@@ -73,19 +79,23 @@ class MonitoringOrderHandler(OrderEmailHandler):
             if not success:
                 continue
 
-            result = self.processor.process_cancellation_email(email_data)
-            if result.get("order_number"):
-                for order in orders:
-                    if order["number"] == result["order_number"]:
-                        order["status"] = "Cancelled"
-                        self.statistics["cancellations"] += 1
-                        print(f"Processed cancellation: Order {result['order_number']}")
-                        break
+            result = self.processor.process_cancellation_email(
+                email_data, details=False
+            )
+            order = orders.find(result.get("order_number"))
+            if order is not None:
+                order["status"] = "Cancelled"
+                self.statistics["cancellations"] += 1
+                print(f"Processed cancellation: Order {result['order_number']}")
+                self.connector.mark_uid_processed(msg_id)
 
             self._update_stats(bool(result.get("order_number")))
 
+        self.connector.checkpoint()
+
     def process_shipped_emails(self, folder: str, orders, db_manager=None):
         print(f"\nProcessing shipped emails in folder: {folder}")
+        orders = OrderCollection.wrap(orders)
 
         dynamic_criteria = self._get_dynamic_search_criteria("shipped")
         success, messages = self.connector.search_emails(folder, dynamic_criteria)
@@ -101,33 +111,26 @@ class MonitoringOrderHandler(OrderEmailHandler):
                 continue
 
             result = self.processor.process_shipped_email(email_data)
-            if result.get("order_number"):
-                for order in orders:
-                    if order["number"] == result["order_number"]:
-                        order["status"] = "Shipped"
-                        existing_tracking = order.get("tracking", [])
-                        new_tracking = result["tracking_numbers"]
-
-                        combined_tracking = list(set(existing_tracking + new_tracking))
-                        order["tracking"] = combined_tracking
-
-                        if "address_info" in result and db_manager:
-                            state_code = result["address_info"]
-                            order["state"] = state_code
-                            db_manager.update_order_address(
-                                result["order_number"], state_code
-                            )
-                            print(f"  State: {state_code}")
-
-                        self.statistics["shipped"] += 1
-                        self.statistics["tracking_numbers"] += len(
-                            result["tracking_numbers"]
-                        )
-                        print(f"Processed shipped: Order {result['order_number']}")
-                        break
+            order = orders.find(result.get("order_number"))
+            if order is not None:
+                order["status"] = "Shipped"
+                orders.merge_tracking(order, result["tracking_numbers"])
+
+                if "address_info" in result and db_manager:
+                    state_code = result["address_info"]
+                    order["state"] = state_code
+                    db_manager.update_order_address(result["order_number"], state_code)
+                    print(f"  State: {state_code}")
+
+                self.statistics["shipped"] += 1
+                self.statistics["tracking_numbers"] += len(result["tracking_numbers"])
+                print(f"Processed shipped: Order {result['order_number']}")
+                self.connector.mark_uid_processed(msg_id)
 
             self._update_stats(bool(result.get("order_number")))
 
+        self.connector.checkpoint()
+
     def check_cancellation_emails(
         self, folder: str, existing_orders: List[Dict]
     ) -> List[str]:
@@ -140,26 +143,31 @@ class MonitoringOrderHandler(OrderEmailHandler):
             return cancelled_orders
 
         print(f"Checking {len(messages)} cancellation emails...")
+        existing_orders = OrderCollection.wrap(existing_orders)
 
         for msg_id in messages:
             success, email_data = self.connector.fetch_email(msg_id)
             if not success:
+                self.deferred_uids.append(msg_id)
                 continue
 
-            result = self.processor.process_cancellation_email(email_data)
+            result = self.processor.process_cancellation_email(
+                email_data, details=False
+            )
             if result.get("order_number"):
                 order_num = result["order_number"]
-                order_exists = any(
-                    order.get("number") == order_num
-                    or order.get("order_number") == order_num
-                    for order in existing_orders
-                )
+                order_exists = order_num in existing_orders
+                if order_exists:
+                    self.connector.mark_uid_processed(msg_id)
+                else:
+                    self.deferred_uids.append(msg_id)
                 if order_exists and order_num not in cancelled_orders:
                     cancelled_orders.append(order_num)
                     self.statistics["cancellations"] += 1
 
             self._update_stats(bool(result.get("order_number")))
 
+        self.connector.checkpoint()
         return cancelled_orders
 
     def check_shipped_emails(
@@ -174,21 +182,20 @@ class MonitoringOrderHandler(OrderEmailHandler):
             return shipped_orders
 
         print(f"Checking {len(messages)} shipped emails...")
+        existing_orders = OrderCollection.wrap(existing_orders)
 
         for msg_id in messages:
             success, email_data = self.connector.fetch_email(msg_id)
             if not success:
+                self.deferred_uids.append(msg_id)
                 continue
 
             result = self.processor.process_shipped_email(email_data)
             if result.get("order_number"):
                 order_num = result["order_number"]
-                order_exists = any(
-                    order.get("number") == order_num
-                    or order.get("order_number") == order_num
-                    for order in existing_orders
-                )
+                order_exists = order_num in existing_orders
                 if order_exists:
+                    self.connector.mark_uid_processed(msg_id)
                     tracking_numbers = result.get("tracking_numbers", [])
                     if tracking_numbers:
                         if order_num not in shipped_orders:
@@ -206,9 +213,12 @@ class MonitoringOrderHandler(OrderEmailHandler):
                             ]
                         self.statistics["shipped"] += 1
                         self.statistics["tracking_numbers"] += len(tracking_numbers)
+                else:
+                    self.deferred_uids.append(msg_id)
 
             self._update_stats(bool(result.get("order_number")))
 
+        self.connector.checkpoint()
         return shipped_orders
 
 
@@ -219,6 +229,7 @@ class ContinuousMonitor:
         self.monitoring_active = False
         self.processed_orders: Set[str] = set()
         self.monitoring_start_date = None
+        self.last_folder_status: Optional[Dict[str, int]] = None
         self.api_config = APIConfig()
         self.api_submitter = OrderAPISubmitter(self.api_config)
         self._load_submitted_tracking_keys()
@@ -230,39 +241,85 @@ class ContinuousMonitor:
         print("=" * 60)
 
         self.monitoring_active = True
+        use_idle = MONITOR_SETTINGS["use_idle"] and self.email_connector.supports_idle()
+        if use_idle:
+            print("⚡ Server supports IDLE: waiting for new mail instead of polling")
 
         try:
             while self.monitoring_active:
-                current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                print(f"\n[{current_time}] Checking for new orders...")
+                self.run_check_cycle(folder)
 
-                new_orders_found = False
-
-                try:
-                    new_orders_found = self.check_for_new_orders(folder)
-                except Exception as e:
-                    print(f"Error during monitoring check: {str(e)}")
-
-                if not new_orders_found:
-                    print("No new orders detected.")
-
-                try:
-                    self.submit_recent_trackings()
-                except Exception as e:
-                    print(f"Error submitting recent trackings: {str(e)}")
-
-                if self.monitoring_active:
-                    print("Next check in 30 seconds... (Press Ctrl+C to stop)")
-                    for i in range(30):
-                        if not self.monitoring_active:
-                            break
-                        time.sleep(1)
+                if not self.monitoring_active:
+                    break
+                if use_idle:
+                    self.wait_for_new_mail(folder)
+                else:
+                    self._sleep(MONITOR_SETTINGS["poll_interval_seconds"])
 
         except KeyboardInterrupt:
             print("\n\nMonitoring stopped by user")
         finally:
             self.monitoring_active = False
 
+    def run_check_cycle(self, folder: str) -> None:
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        status = self.email_connector.folder_status(folder)
+
+        if status and status == self.last_folder_status:
+            print(
+                f"\n[{current_time}] Folder unchanged (UIDNEXT {status.get('UIDNEXT')}), skipping search"
+            )
+        else:
+            print(f"\n[{current_time}] Checking for new orders...")
+
+            new_orders_found = False
+            self.last_folder_status = status
+
+            try:
+                new_orders_found = self.check_for_new_orders(folder)
+            except Exception as e:
+                self.last_folder_status = None
+                print(f"Error during monitoring check: {str(e)}")
+
+            if not new_orders_found:
+                print("No new orders detected.")
+
+        try:
+            self.submit_recent_trackings()
+        except Exception as e:
+            print(f"Error submitting recent trackings: {str(e)}")
+
+    def wait_for_new_mail(self, folder: str) -> None:
+        safety_poll = MONITOR_SETTINGS["safety_poll_seconds"]
+        poll_at = time.time() + safety_poll
+        print(
+            f"💤 Waiting for new mail (safety check every {safety_poll // 60} min)... (Press Ctrl+C to stop)"
+        )
+
+        while self.monitoring_active:
+            remaining = poll_at - time.time()
+            if remaining <= 0:
+                print("⏰ Running scheduled safety check")
+                return
+
+            woke = self.email_connector.idle_wait(
+                folder, timeout=min(remaining, MONITOR_SETTINGS["idle_renew_seconds"])
+            )
+            if woke:
+                print("📨 New mail arrived")
+                return
+            if woke is None:
+                print("⚠ IDLE session interrupted; falling back to a timed check")
+                self._sleep(MONITOR_SETTINGS["poll_interval_seconds"])
+                return
+
+    def _sleep(self, seconds: int) -> None:
+        print(f"Next check in {seconds} seconds... (Press Ctrl+C to stop)")
+        for _ in range(seconds):
+            if not self.monitoring_active:
+                break
+            time.sleep(1)
+
     def check_for_new_orders(self, folder: str) -> bool:
         new_orders_found = False
 
@@ -288,7 +345,11 @@ class ContinuousMonitor:
                         )
                     new_orders_found = True
 
-            all_orders = self.get_all_existing_orders()
+            fresh_orders = OrderCollection(new_orders)
+            all_orders = OrderCollection.wrap(self.get_all_existing_orders())
+            all_orders.extend(
+                order for order in new_orders if order_key(order) not in all_orders
+            )
 
             cancellation_updates = order_handler.check_cancellation_emails(
                 folder, all_orders
@@ -296,16 +357,13 @@ class ContinuousMonitor:
             cancelled_orders_to_save = []
             if cancellation_updates:
                 print(f"\n❌ FOUND {len(cancellation_updates)} ORDER CANCELLATION(S)!")
+                stored_orders = self.get_stored_orders(cancellation_updates)
                 for order_num in cancellation_updates:
                     print(f"  🚫 Order #{order_num} - CANCELLED")
 
-                    full_order = None
-                    if self.output_handler and getattr(
-                        self.output_handler, "db_manager", None
-                    ):
-                        full_order = self.output_handler.db_manager.get_order_by_number(
-                            order_num
-                        )
+                    full_order = stored_orders.get(order_num) or fresh_orders.find(
+                        order_num
+                    )
 
                     if full_order:
                         full_order["status"] = "Cancelled"
@@ -316,19 +374,16 @@ class ContinuousMonitor:
             shipped_orders_to_save = []
             if shipped_updates:
                 print(f"\n🚚 FOUND {len(shipped_updates)} ORDER SHIPMENT(S)!")
+                stored_orders = self.get_stored_orders(shipped_updates)
                 for order_num, shipped_data in shipped_updates.items():
                     tracking = shipped_data.get("tracking", [])
                     print(
                         f"  📮 Order #{order_num} - SHIPPED (Tracking: {', '.join(tracking)})"
                     )
 
-                    full_order = None
-                    if self.output_handler and getattr(
-                        self.output_handler, "db_manager", None
-                    ):
-                        full_order = self.output_handler.db_manager.get_order_by_number(
-                            order_num
-                        )
+                    full_order = stored_orders.get(order_num) or fresh_orders.find(
+                        order_num
+                    )
 
                     if full_order:
                         full_order["status"] = "Shipped"
@@ -361,7 +416,13 @@ class ContinuousMonitor:
                 if new_orders or cancelled_orders_to_save or shipped_orders_to_save:
                     self.output_handler.finalize_database()
 
+            if order_handler.deferred_uids:
+                # Leave the folder marked as changed so the next cycle retries
+                # these instead of skipping on an unchanged STATUS.
+                self.last_folder_status = None
+
         except Exception as e:
+            self.last_folder_status = None
             print(f"Error checking for new orders: {str(e)}")
 
         return new_orders_found
@@ -375,6 +436,13 @@ class ContinuousMonitor:
             print(f"Error getting existing orders: {str(e)}")
             return []
 
+    def get_stored_orders(self, order_numbers: Iterable[str]) -> Dict[str, Dict]:
+        if not self.output_handler or not getattr(
+            self.output_handler, "db_manager", None
+        ):
+            return {}
+        return self.output_handler.db_manager.get_orders(order_numbers)
+
     def run_continuous_monitoring(self, folder: str) -> None:
         print("\nInitializing continuous monitoring...")
 
@@ -1,9 +1,63 @@
 import sqlite3
+import threading
 from datetime import datetime
-from typing import Dict, List, Optional, Set, Tuple
-
-from config.settings import DB_SETTINGS
-from core.utils import get_db_filename
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from config.settings import DB_SETTINGS, SQLITE_SETTINGS
+from core.migrations import migrate
+from core.utils import get_db_filename, order_day, price_cents
+from core.writer import DatabaseWriter
+
+# Stays under SQLite's default limit of 999 bound parameters per statement
+BULK_PARAM_CHUNK = 500
+ORDER_COLUMNS = (
+    "o.order_number, o.order_date, o.total_price, o.status, o.email_address, "
+    "o.state, o.total_cents"
+)
+
+
+def open_connection(db_file: str, read_only: bool = False) -> sqlite3.Connection:
+    if read_only:
+        uri = Path(db_file).resolve().as_uri() + "?mode=ro"
+        connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    else:
+        connection = sqlite3.connect(db_file, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA temp_store=MEMORY")
+    connection.execute(f"PRAGMA busy_timeout={int(SQLITE_SETTINGS['busy_timeout_ms'])}")
+    connection.execute(f"PRAGMA mmap_size={int(SQLITE_SETTINGS['mmap_bytes'])}")
+    connection.execute(f"PRAGMA cache_size=-{int(SQLITE_SETTINGS['cache_kib'])}")
+    return connection
+
+
+class _ChildRows:
+    # Walks child rows sorted by order_id in step with the sorted order rows
+    def __init__(self, rows: Iterable[tuple]):
+        self._groups = groupby(rows, key=itemgetter(0))
+        self._current = next(self._groups, None)
+
+    def take(self, order_id: str) -> List[tuple]:
+        while self._current and self._current[0] < order_id:
+            self._current = next(self._groups, None)
+        if not self._current or self._current[0] != order_id:
+            return []
+        rows = list(self._current[1])
+        self._current = next(self._groups, None)
+        return rows
 
 
 class DatabaseManager:
@@ -16,17 +70,67 @@ class DatabaseManager:
                 "filename", get_db_filename(None, service)
             )
         self.connection = None
+        self.write_lock = threading.RLock()
+        self.writer: Optional[DatabaseWriter] = None
+        self._readers = threading.local()
+        self._reader_connections: List[sqlite3.Connection] = []
+        self._reader_lock = threading.Lock()
         self.create_connection()
         self.create_tables()
+        self.migrate()
+        if SQLITE_SETTINGS["writer_thread"]:
+            self.start_writer()
 
     def create_connection(self) -> None:
         try:
             print(f"Connecting to database: {self.db_file}")
-            self.connection = sqlite3.connect(self.db_file)
+            self.connection = open_connection(self.db_file)
         except Exception as e:
             print(f"Error connecting to database: {str(e)}")
             raise
 
+    def start_writer(self) -> None:
+        if self.connection and not self.writer:
+            self.writer = DatabaseWriter(self, SQLITE_SETTINGS["write_queue_depth"])
+
+    def stop_writer(self) -> None:
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+
+    def flush(self) -> None:
+        if self.writer:
+            self.writer.flush()
+
+    def reader(self) -> sqlite3.Connection:
+        # Sees the last committed state; call flush() first to read queued writes
+        connection = getattr(self._readers, "connection", None)
+        if connection is None:
+            try:
+                connection = open_connection(self.db_file, read_only=True)
+            except Exception:
+                return self.connection
+            self._readers.connection = connection
+            with self._reader_lock:
+                self._reader_connections.append(connection)
+        return connection
+
+    def _write(self, store: Callable[[sqlite3.Cursor], int], label: str) -> int:
+        if not self.connection:
+            return 0
+        if self.writer and not self.writer.is_current():
+            self.writer.flush()
+        with self.write_lock:
+            cursor = self.connection.cursor()
+            try:
+                result = store(cursor)
+                self.connection.commit()
+                return result
+            except Exception as e:
+                print(f"Error {label}: {str(e)}")
+                self.connection.rollback()
+                return 0
+
     def create_tables(self) -> None:
         if not self.connection:
             return
@@ -36,173 +140,178 @@ class DatabaseManager:
             cursor.executescript(table_sql)
         self.connection.commit()
 
-    def insert_order(self, order: Dict) -> None:
+    def migrate(self) -> None:
         if not self.connection:
             return
-
-        cursor = self.connection.cursor()
-
         try:
-            cursor.execute("PRAGMA table_info(orders)")
-            columns = [row[1] for row in cursor.fetchall()]
-
-            if "state" not in columns:
-                cursor.execute("ALTER TABLE orders ADD COLUMN state TEXT")
-                self.connection.commit()
+            migrate(self.connection, self.db_config)
+        except Exception as e:
+            print(f"Error migrating database schema: {str(e)}")
+            raise
 
-            if "website" not in columns:
-                cursor.execute("ALTER TABLE orders ADD COLUMN website TEXT")
-                self.connection.commit()
+    def insert_order(self, order: Dict) -> None:
+        self.insert_orders([order])
+
+    def insert_orders(self, orders: List[Dict], wait: bool = True) -> int:
+        if not self.connection or not orders:
+            return 0
+
+        order_rows: Dict[str, tuple] = {}
+        products: Dict[str, List[tuple]] = {}
+        tracking: Dict[str, List[tuple]] = {}
+        for order in orders:
+            try:
+                order_id = order["number"]
+                order_rows[order_id] = (
+                    order_id,
+                    order["date"],
+                    order["total_price"],
+                    order["status"],
+                    order["email_address"],
+                    order.get("state", ""),
+                    order.get("website", "BestBuy"),
+                    order_day(order["date"]),
+                    price_cents(order["total_price"]),
+                )
+                products[order_id] = [
+                    (order_id, p["title"], p["price"], p["quantity"])
+                    for p in order["products"]
+                ]
+                tracking[order_id] = [
+                    (order_id, tracking_number) for tracking_number in order["tracking"]
+                ]
+            except Exception as e:
+                print(f"Error inserting order {order.get('number')}: {str(e)}")
+
+        if not order_rows:
+            return 0
+
+        product_rows = [row for rows in products.values() for row in rows]
+        tracking_rows = [row for rows in tracking.values() for row in rows]
+
+        def store(cursor: sqlite3.Cursor) -> int:
+            return self._store_orders(
+                cursor, list(order_rows.values()), product_rows, tracking_rows
+            )
 
+        label = f"inserting {len(order_rows)} orders"
+        if not wait and self.writer:
+            self.writer.submit(store, label)
+            return len(order_rows)
+        return self._write(store, label)
+
+    def _store_orders(
+        self,
+        cursor: sqlite3.Cursor,
+        order_rows: List[tuple],
+        product_rows: List[tuple],
+        tracking_rows: List[tuple],
+    ) -> int:
+        cursor.executemany(
+            """
+            INSERT INTO orders (order_number, order_date, total_price, status, email_address, state, website, order_day, total_cents)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(order_number) DO UPDATE SET
+                order_date = excluded.order_date,
+                total_price = excluded.total_price,
+                status = excluded.status,
+                email_address = excluded.email_address,
+                state = excluded.state,
+                website = excluded.website,
+                order_day = excluded.order_day,
+                total_cents = excluded.total_cents
+        """,
+            order_rows,
+        )
+
+        order_ids = [row[0] for row in order_rows]
+        for i in range(0, len(order_ids), BULK_PARAM_CHUNK):
+            chunk = order_ids[i : i + BULK_PARAM_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
             cursor.execute(
-                "SELECT * FROM orders WHERE order_number = ?", (order["number"],)
+                f"DELETE FROM products WHERE order_id IN ({placeholders})", chunk
             )
-            existing_order = cursor.fetchone()
-
-            state_value = order.get("state", "")
-            website_value = order.get("website", "BestBuy")
-
-            if existing_order:
-                cursor.execute(
-                    """
-                    UPDATE orders 
-                    SET order_date = ?, total_price = ?, status = ?, email_address = ?, state = ?, website = ?
-                    WHERE order_number = ?
-                """,
-                    (
-                        order["date"],
-                        order["total_price"],
-                        order["status"],
-                        order["email_address"],
-                        state_value,
-                        website_value,
-                        order["number"],
-                    ),
-                )
-            else:
-                cursor.execute(
-                    """
-                    INSERT INTO orders (order_number, order_date, total_price, status, email_address, state, website)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                    (
-                        order["number"],
-                        order["date"],
-                        order["total_price"],
-                        order["status"],
-                        order["email_address"],
-                        state_value,
-                        website_value,
-                    ),
-                )
-
-            order_id = order["number"]
-
-            cursor.execute("DELETE FROM products WHERE order_id = ?", (order_id,))
             cursor.execute(
-                "DELETE FROM tracking_numbers WHERE order_id = ?", (order_id,)
+                f"DELETE FROM tracking_numbers WHERE order_id IN ({placeholders})",
+                chunk,
             )
 
-            for product in order["products"]:
-                cursor.execute(
-                    """
-                    INSERT INTO products (order_id, title, price, quantity)
-                    VALUES (?, ?, ?, ?)
-                """,
-                    (order_id, product["title"], product["price"], product["quantity"]),
-                )
-
-            for tracking_number in order["tracking"]:
-                cursor.execute(
-                    """
-                    INSERT INTO tracking_numbers (order_id, tracking_number)
-                    VALUES (?, ?)
-                """,
-                    (order_id, tracking_number),
-                )
-
-            self.connection.commit()
-
-        except Exception as e:
-            print(f"Error inserting order {order['number']}: {str(e)}")
-            self.connection.rollback()
+        cursor.executemany(
+            """
+            INSERT INTO products (order_id, title, price, quantity)
+            VALUES (?, ?, ?, ?)
+        """,
+            product_rows,
+        )
+        cursor.executemany(
+            """
+            INSERT INTO tracking_numbers (order_id, tracking_number)
+            VALUES (?, ?)
+        """,
+            tracking_rows,
+        )
+        return len(order_rows)
 
     def insert_xbox_code(self, code_data: Dict) -> None:
-        if not self.connection:
-            return
+        self.insert_xbox_codes([code_data])
+
+    def insert_xbox_codes(self, codes: List[Dict]) -> int:
+        if not self.connection or not codes:
+            return 0
 
         if "xbox_codes" not in self.db_config["tables"]:
             print("Xbox codes table not available in this database configuration")
-            return
+            return 0
 
-        cursor = self.connection.cursor()
-        try:
-            cursor.execute(
+        def store(cursor: sqlite3.Cursor) -> int:
+            before = self.connection.total_changes
+            cursor.executemany(
                 """
                 INSERT OR IGNORE INTO xbox_codes (code, email_date)
                 VALUES (?, ?)
             """,
-                (code_data["code"], code_data["date"]),
+                [(code_data["code"], code_data["date"]) for code_data in codes],
             )
-            self.connection.commit()
-        except Exception as e:
-            print(f"Error inserting Xbox code: {str(e)}")
-            self.connection.rollback()
+            return self.connection.total_changes - before
+
+        return self._write(store, "inserting Xbox code")
 
     def insert_membership_number(self, membership_data: Dict) -> None:
-        if not self.connection:
-            return
+        if self.insert_membership_numbers([membership_data]):
+            print(f"Stored membership number: {membership_data['membership_number']}")
 
-        cursor = self.connection.cursor()
-        try:
-            cursor.execute(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name='membership_numbers'"
-            )
-            if not cursor.fetchone():
-                table_sql = self.db_config["tables"].get(
-                    "membership_numbers",
-                    """
-                    CREATE TABLE IF NOT EXISTS membership_numbers (
-                        id INTEGER PRIMARY KEY,
-                        membership_number TEXT UNIQUE,
-                        email_address TEXT,
-                        first_seen_date TEXT
-                    )
-                """,
-                )
-                cursor.executescript(table_sql)
-                self.connection.commit()
-                print("Created membership_numbers table")
+    def insert_membership_numbers(self, memberships: List[Dict]) -> int:
+        if not self.connection or not memberships:
+            return 0
 
-            cursor.execute(
+        today = datetime.now().strftime("%Y-%m-%d")
+
+        def store(cursor: sqlite3.Cursor) -> int:
+            before = self.connection.total_changes
+            cursor.executemany(
                 """
                 INSERT OR IGNORE INTO membership_numbers (membership_number, email_address, first_seen_date)
                 VALUES (?, ?, ?)
             """,
-                (
-                    membership_data["membership_number"],
-                    membership_data.get("email_address", ""),
-                    membership_data.get("date", datetime.now().strftime("%Y-%m-%d")),
-                ),
+                [
+                    (
+                        membership_data["membership_number"],
+                        membership_data.get("email_address", ""),
+                        membership_data.get("date", today),
+                    )
+                    for membership_data in memberships
+                ],
             )
-            self.connection.commit()
-            print(f"Stored membership number: {membership_data['membership_number']}")
-        except Exception as e:
-            print(f"Error inserting membership number: {str(e)}")
-            self.connection.rollback()
+            return self.connection.total_changes - before
+
+        return self._write(store, "inserting membership number")
 
     def get_membership_numbers(self) -> List[Dict]:
         if not self.connection:
             return []
 
-        cursor = self.connection.cursor()
+        cursor = self.reader().cursor()
         try:
-            cursor.execute(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name='membership_numbers'"
-            )
-            if not cursor.fetchone():
-                return []
-
             cursor.execute(
                 "SELECT membership_number, email_address, first_seen_date FROM membership_numbers"
             )
@@ -223,72 +332,39 @@ class DatabaseManager:
         if not self.connection:
             return
 
-        cursor = self.connection.cursor()
-        try:
-            cursor.execute("PRAGMA table_info(orders)")
-            columns = [row[1] for row in cursor.fetchall()]
-            has_website = "website" in columns
-
-            if has_website:
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS successful_orders_temp AS
-                    SELECT 
-                        COALESCE(o.website, 'BestBuy') as website,
-                        o.order_number,
-                        o.order_date,
-                        o.total_price,
-                        o.status,
-                        GROUP_CONCAT(p.title, '; ') as title,
-                        GROUP_CONCAT(p.quantity, '; ') as quantity,
-                        GROUP_CONCAT(t.tracking_number, '; ') as tracking_number,
-                        COALESCE(o.state, '') as state,
-                        COALESCE(o.email_address, '') as email_address
-                    FROM 
-                        orders o
-                    LEFT JOIN 
-                        products p ON o.order_number = p.order_id
-                    LEFT JOIN 
-                        tracking_numbers t ON o.order_number = t.order_id
-                    WHERE 
-                        o.status != 'Cancelled'
-                    GROUP BY 
-                        o.order_number
-                """)
-            else:
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS successful_orders_temp AS
-                    SELECT 
-                        'BestBuy' as website,
-                        o.order_number,
-                        o.order_date,
-                        o.total_price,
-                        o.status,
-                        GROUP_CONCAT(p.title, '; ') as title,
-                        GROUP_CONCAT(p.quantity, '; ') as quantity,
-                        GROUP_CONCAT(t.tracking_number, '; ') as tracking_number,
-                        COALESCE(o.state, '') as state,
-                        COALESCE(o.email_address, '') as email_address
-                    FROM 
-                        orders o
-                    LEFT JOIN 
-                        products p ON o.order_number = p.order_id
-                    LEFT JOIN 
-                        tracking_numbers t ON o.order_number = t.order_id
-                    WHERE 
-                        o.status != 'Cancelled'
-                    GROUP BY 
-                        o.order_number
-                """)
+        def store(cursor: sqlite3.Cursor) -> int:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS successful_orders_temp AS
+                SELECT 
+                    COALESCE(o.website, 'BestBuy') as website,
+                    o.order_number,
+                    o.order_date,
+                    o.total_price,
+                    o.status,
+                    GROUP_CONCAT(p.title, '; ') as title,
+                    GROUP_CONCAT(p.quantity, '; ') as quantity,
+                    GROUP_CONCAT(t.tracking_number, '; ') as tracking_number,
+                    COALESCE(o.state, '') as state,
+                    COALESCE(o.email_address, '') as email_address
+                FROM 
+                    orders o
+                LEFT JOIN 
+                    products p ON o.order_number = p.order_id
+                LEFT JOIN 
+                    tracking_numbers t ON o.order_number = t.order_id
+                WHERE 
+                    o.status != 'Cancelled'
+                GROUP BY 
+                    o.order_number
+            """)
 
             cursor.execute("DROP TABLE IF EXISTS successful_orders")
             cursor.execute(
                 "ALTER TABLE successful_orders_temp RENAME TO successful_orders"
             )
+            return 1
 
-            self.connection.commit()
-        except Exception as e:
-            print(f"Error creating successful orders view: {str(e)}")
-            self.connection.rollback()
+        self._write(store, "creating successful orders view")
 
     def update_order_address(self, order_number: str, state_code: str) -> None:
         if not self.connection:
@@ -297,15 +373,7 @@ class DatabaseManager:
             )
             return
 
-        cursor = self.connection.cursor()
-        try:
-            cursor.execute("PRAGMA table_info(orders)")
-            columns = [row[1] for row in cursor.fetchall()]
-
-            if "state" not in columns:
-                cursor.execute("ALTER TABLE orders ADD COLUMN state TEXT")
-                self.connection.commit()
-
+        def store(cursor: sqlite3.Cursor) -> int:
             cursor.execute(
                 """
                 UPDATE orders 
@@ -314,21 +382,18 @@ class DatabaseManager:
             """,
                 (state_code, order_number),
             )
+            return cursor.rowcount
 
-            self.connection.commit()
-
-        except Exception as e:
-            print(f"Error updating order state for {order_number}: {str(e)}")
-            self.connection.rollback()
+        self._write(store, f"updating order state for {order_number}")
 
     def get_all_orders(self) -> List[Dict]:
         if not self.connection:
             return []
 
-        cursor = self.connection.cursor()
+        cursor = self.reader().cursor()
         try:
             cursor.execute(
-                "SELECT order_number, order_date, total_price, status, email_address, state FROM orders"
+                "SELECT order_number, order_date, total_price, status, email_address, state, total_cents FROM orders"
             )
             rows = cursor.fetchall()
 
@@ -343,6 +408,7 @@ class DatabaseManager:
                         "status": row[3],
                         "email_address": row[4],
                         "state": row[5] if len(row) > 5 else "",
+                        "total_cents": row[6],
                     }
                 )
             return orders
@@ -354,7 +420,7 @@ class DatabaseManager:
         if not self.connection:
             return (0, 0, 0, 0)
 
-        cursor = self.connection.cursor()
+        cursor = self.reader().cursor()
         try:
             cursor.execute("""
                 SELECT 
@@ -369,67 +435,105 @@ class DatabaseManager:
             print(f"Error getting order summary: {str(e)}")
             return (0, 0, 0, 0)
 
-    def get_order_by_number(self, order_number: str) -> Optional[Dict]:
-        if not self.connection:
-            return None
-
-        cursor = self.connection.cursor()
-        try:
-            cursor.execute(
-                """
-                SELECT order_number, order_date, total_price, status, email_address, state
-                FROM orders
-                WHERE order_number = ?
-            """,
-                (order_number,),
-            )
-            order_row = cursor.fetchone()
-
-            if not order_row:
-                return None
-
-            cursor.execute(
-                """
-                SELECT title, price, quantity
-                FROM products
-                WHERE order_id = ?
+    def _iter_order_rows(
+        self, conditions: Sequence[str] = (), params: Sequence = ()
+    ) -> Iterator[Dict]:
+        if conditions:
+            where = "WHERE " + " AND ".join(conditions)
+            owned = f"WHERE order_id IN (SELECT o.order_number FROM orders o {where})"
+        else:
+            where = ""
+            owned = "WHERE order_id IS NOT NULL"
+
+        connection = self.reader()
+        order_rows = connection.execute(
+            f"SELECT {ORDER_COLUMNS} FROM orders o {where} ORDER BY o.order_number",
+            params,
+        )
+        products = _ChildRows(
+            connection.execute(
+                f"""
+                SELECT order_id, title, price, quantity
+                FROM products {owned}
+                ORDER BY order_id, id
             """,
-                (order_number,),
+                params,
             )
-            products = []
-            for product_row in cursor.fetchall():
-                products.append(
-                    {
-                        "title": product_row[0],
-                        "price": product_row[1],
-                        "quantity": product_row[2],
-                    }
-                )
-
-            cursor.execute(
-                """
-                SELECT tracking_number
-                FROM tracking_numbers
-                WHERE order_id = ?
+        )
+        tracking = _ChildRows(
+            connection.execute(
+                f"""
+                SELECT order_id, tracking_number
+                FROM tracking_numbers {owned}
+                ORDER BY order_id, id
             """,
-                (order_number,),
+                params,
             )
-            tracking_numbers = [row[0] for row in cursor.fetchall()]
-
-            return {
-                "number": order_row[0],
-                "order_number": order_row[0],
-                "date": order_row[1],
-                "total_price": order_row[2],
-                "status": order_row[3],
-                "email_address": order_row[4],
-                "state": order_row[5] if len(order_row) > 5 else "",
-                "products": products,
-                "tracking": tracking_numbers,
+        )
+
+        for row in order_rows:
+            if row[0] is None:
+                continue
+            yield {
+                "number": row[0],
+                "order_number": row[0],
+                "date": row[1],
+                "total_price": row[2],
+                "status": row[3],
+                "email_address": row[4],
+                "state": row[5] or "",
+                "total_cents": row[6],
+                "products": [
+                    {"title": p[1], "price": p[2], "quantity": p[3]}
+                    for p in products.take(row[0])
+                ],
+                "tracking": [t[1] for t in tracking.take(row[0])],
             }
+
+    def iter_orders(
+        self,
+        order_numbers: Optional[Iterable[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> Iterator[Dict]:
+        if not self.connection:
+            return
+
+        conditions: List[str] = []
+        params: List = []
+        if start_date is not None:
+            conditions.append("o.order_day BETWEEN ? AND ?")
+            params.extend([order_day(start_date), order_day(end_date or start_date)])
+
+        try:
+            if order_numbers is None:
+                yield from self._iter_order_rows(conditions, params)
+                return
+
+            numbers = sorted({str(number) for number in order_numbers})
+            for i in range(0, len(numbers), BULK_PARAM_CHUNK):
+                chunk = numbers[i : i + BULK_PARAM_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                yield from self._iter_order_rows(
+                    [f"o.order_number IN ({placeholders})", *conditions],
+                    [*chunk, *params],
+                )
         except Exception as e:
-            print(f"Error getting order by number: {str(e)}")
-            return None
+            print(f"Error loading orders: {str(e)}")
+
+    def get_orders(
+        self,
+        order_numbers: Optional[Iterable[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> Dict[str, Dict]:
+        return {
+            order["number"]: order
+            for order in self.iter_orders(order_numbers, start_date, end_date)
+        }
+
+    def get_order_by_number(self, order_number: str) -> Optional[Dict]:
+        return self.get_orders([order_number]).get(str(order_number))
 
     def get_latest_orders(
         self, limit: int = 1, with_tracking_only: bool = True
@@ -437,16 +541,18 @@ class DatabaseManager:
         if not self.connection:
             return []
 
-        cursor = self.connection.cursor()
+        cursor = self.reader().cursor()
         try:
             if with_tracking_only:
                 cursor.execute(
                     """
-                    SELECT DISTINCT o.order_number
+                    SELECT o.order_number
                     FROM orders o
-                    INNER JOIN tracking_numbers t ON o.order_number = t.order_id
                     WHERE o.status != 'Cancelled'
-                    ORDER BY o.order_date DESC, o.order_number DESC
+                    AND EXISTS (
+                        SELECT 1 FROM tracking_numbers t WHERE t.order_id = o.order_number
+                    )
+                    ORDER BY o.order_day DESC, o.order_number DESC
                     LIMIT ?
                 """,
                     (limit,),
@@ -457,21 +563,15 @@ class DatabaseManager:
                     SELECT order_number
                     FROM orders
                     WHERE status != 'Cancelled'
-                    ORDER BY order_date DESC, order_number DESC
+                    ORDER BY order_day DESC, order_number DESC
                     LIMIT ?
                 """,
                     (limit,),
                 )
 
             order_numbers = [row[0] for row in cursor.fetchall()]
-
-            orders = []
-            for order_number in order_numbers:
-                order = self.get_order_by_number(order_number)
-                if order:
-                    orders.append(order)
-
-            return orders
+            found = self.get_orders(order_numbers)
+            return [found[number] for number in order_numbers if number in found]
         except Exception as e:
             print(f"Error getting latest orders: {str(e)}")
             return []
@@ -482,58 +582,40 @@ class DatabaseManager:
         if not self.connection:
             return []
 
-        cursor = self.connection.cursor()
+        cursor = self.reader().cursor()
         try:
             if end_date is None:
                 end_date = start_date
             cursor.execute(
                 """
-                SELECT DISTINCT o.order_number
+                SELECT o.order_number
                 FROM orders o
-                INNER JOIN tracking_numbers t ON o.order_number = t.order_id
-                WHERE o.status != 'Cancelled'
-                AND DATE(o.order_date) BETWEEN DATE(?) AND DATE(?)
-                ORDER BY o.order_date DESC, o.order_number DESC
+                WHERE o.order_day BETWEEN ? AND ?
+                AND o.status != 'Cancelled'
+                AND EXISTS (
+                    SELECT 1 FROM tracking_numbers t WHERE t.order_id = o.order_number
+                )
+                ORDER BY o.order_day DESC, o.order_number DESC
             """,
-                (start_date, end_date),
+                (order_day(start_date), order_day(end_date)),
             )
 
             order_numbers = [row[0] for row in cursor.fetchall()]
-
-            orders = []
-            for order_number in order_numbers:
-                order = self.get_order_by_number(order_number)
-                if order and order.get("tracking"):
-                    orders.append(order)
-
-            return orders
+            found = self.get_orders(order_numbers)
+            return [
+                found[number]
+                for number in order_numbers
+                if number in found and found[number]["tracking"]
+            ]
         except Exception as e:
             print(f"Error getting orders with tracking since date: {str(e)}")
             return []
 
-    def _ensure_submitted_tracking_keys_table(self) -> None:
-        if not self.connection:
-            return
-
-        cursor = self.connection.cursor()
-        try:
-            cursor.execute(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name='submitted_tracking_keys'"
-            )
-            if not cursor.fetchone():
-                table_sql = self.db_config["tables"].get("submitted_tracking_keys")
-                if table_sql:
-                    cursor.executescript(table_sql)
-                    self.connection.commit()
-        except Exception as e:
-            print(f"Error ensuring submitted_tracking_keys table exists: {str(e)}")
-
     def get_submitted_tracking_keys(self) -> Set[str]:
         if not self.connection:
             return set()
 
-        self._ensure_submitted_tracking_keys_table()
-        cursor = self.connection.cursor()
+        cursor = self.reader().cursor()
         try:
             cursor.execute("SELECT tracking_key FROM submitted_tracking_keys")
             keys = {row[0] for row in cursor.fetchall()}
@@ -548,10 +630,9 @@ class DatabaseManager:
         if not self.connection:
             return
 
-        self._ensure_submitted_tracking_keys_table()
-        cursor = self.connection.cursor()
-        try:
-            submitted_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        submitted_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        def store(cursor: sqlite3.Cursor) -> int:
             cursor.execute(
                 """
                 INSERT OR IGNORE INTO submitted_tracking_keys 
@@ -560,10 +641,9 @@ class DatabaseManager:
             """,
                 (tracking_key, order_number, tracking_number, submitted_date),
             )
-            self.connection.commit()
-        except Exception as e:
-            print(f"Error adding submitted tracking key: {str(e)}")
-            self.connection.rollback()
+            return cursor.rowcount
+
+        self._write(store, "adding submitted tracking key")
 
     def add_submitted_tracking_keys_batch(
         self, keys_data: List[Dict[str, str]]
@@ -571,35 +651,34 @@ class DatabaseManager:
         if not self.connection:
             return
 
-        self._ensure_submitted_tracking_keys_table()
-        cursor = self.connection.cursor()
-        try:
-            submitted_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            for key_data in keys_data:
-                cursor.execute(
-                    """
-                    INSERT OR IGNORE INTO submitted_tracking_keys 
-                    (tracking_key, order_number, tracking_number, submitted_date)
-                    VALUES (?, ?, ?, ?)
-                """,
+        submitted_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        def store(cursor: sqlite3.Cursor) -> int:
+            cursor.executemany(
+                """
+                INSERT OR IGNORE INTO submitted_tracking_keys 
+                (tracking_key, order_number, tracking_number, submitted_date)
+                VALUES (?, ?, ?, ?)
+            """,
+                [
                     (
                         key_data["tracking_key"],
                         key_data["order_number"],
                         key_data["tracking_number"],
                         submitted_date,
-                    ),
-                )
-            self.connection.commit()
-        except Exception as e:
-            print(f"Error adding submitted tracking keys batch: {str(e)}")
-            self.connection.rollback()
+                    )
+                    for key_data in keys_data
+                ],
+            )
+            return cursor.rowcount
+
+        self._write(store, "adding submitted tracking keys batch")
 
     def is_tracking_key_submitted(self, tracking_key: str) -> bool:
         if not self.connection:
             return False
 
-        self._ensure_submitted_tracking_keys_table()
-        cursor = self.connection.cursor()
+        cursor = self.reader().cursor()
         try:
             cursor.execute(
                 "SELECT 1 FROM submitted_tracking_keys WHERE tracking_key = ? LIMIT 1",
@@ -611,5 +690,11 @@ class DatabaseManager:
             return False
 
     def close(self) -> None:
+        self.stop_writer()
+        with self._reader_lock:
+            for connection in self._reader_connections:
+                connection.close()
+            self._reader_connections.clear()
+        self._readers = threading.local()
         if self.connection:
             self.connection.close()
@@ -0,0 +1,95 @@
+import logging
+import sqlite3
+from typing import Callable, Dict, List
+
+from core.utils import order_day, price_cents
+
+logger = logging.getLogger(__name__)
+
+MEMBERSHIP_NUMBERS_SQL = """
+    CREATE TABLE IF NOT EXISTS membership_numbers (
+        id INTEGER PRIMARY KEY,
+        membership_number TEXT UNIQUE,
+        email_address TEXT,
+        first_seen_date TEXT
+    )
+"""
+
+
+def _columns(cursor: sqlite3.Cursor, table: str) -> List[str]:
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in cursor.fetchall()]
+
+
+def _add_order_columns(cursor: sqlite3.Cursor, db_config: Dict) -> None:
+    columns = _columns(cursor, "orders")
+    if "state" not in columns:
+        cursor.execute("ALTER TABLE orders ADD COLUMN state TEXT")
+    if "website" not in columns:
+        cursor.execute("ALTER TABLE orders ADD COLUMN website TEXT")
+
+
+def _create_shared_tables(cursor: sqlite3.Cursor, db_config: Dict) -> None:
+    tables = db_config["tables"]
+    cursor.execute(tables.get("membership_numbers", MEMBERSHIP_NUMBERS_SQL))
+    if "submitted_tracking_keys" in tables:
+        cursor.execute(tables["submitted_tracking_keys"])
+
+
+def _add_order_indexes(cursor: sqlite3.Cursor, db_config: Dict) -> None:
+    columns = _columns(cursor, "orders")
+    if "order_day" not in columns:
+        cursor.execute("ALTER TABLE orders ADD COLUMN order_day TEXT")
+    if "total_cents" not in columns:
+        cursor.execute("ALTER TABLE orders ADD COLUMN total_cents INTEGER")
+
+    cursor.execute("SELECT order_number, order_date, total_price FROM orders")
+    cursor.executemany(
+        "UPDATE orders SET order_day = ?, total_cents = ? WHERE order_number = ?",
+        [
+            (order_day(date), price_cents(price), number)
+            for number, date, price in cursor.fetchall()
+        ],
+    )
+
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_orders_order_day "
+        "ON orders (order_day, order_number)"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_products_order_id ON products (order_id)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tracking_numbers_order_id "
+        "ON tracking_numbers (order_id)"
+    )
+
+
+# Append only: a database at user_version N has run the first N migrations.
+MIGRATIONS: List[Callable[[sqlite3.Cursor, Dict], None]] = [
+    _add_order_columns,
+    _create_shared_tables,
+    _add_order_indexes,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(connection: sqlite3.Connection, db_config: Dict) -> int:
+    cursor = connection.cursor()
+    version = cursor.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return version
+
+    try:
+        for number in range(version, SCHEMA_VERSION):
+            MIGRATIONS[number](cursor, db_config)
+            cursor.execute(f"PRAGMA user_version = {number + 1}")
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    logger.info(
+        "Migrated database schema from version %s to %s", version, SCHEMA_VERSION
+    )
+    return SCHEMA_VERSION
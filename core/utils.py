@@ -1,6 +1,8 @@
 import os
 from datetime import datetime
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
+
+ORDER_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%b %d, %Y", "%B %d, %Y")
 
 
 def read_credentials(filename: str) -> Tuple[str, str, str]:
@@ -85,6 +87,26 @@ def parse_date_string(date_str: str) -> datetime:
             raise ValueError(f"Unable to parse date string: {date_str}")
 
 
+def order_day(date_str: Optional[str]) -> Optional[str]:
+    # Normalised YYYY-MM-DD so date windows compare as plain, indexable text
+    text = (date_str or "").strip()
+    for date_format in ORDER_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+def price_cents(amount) -> Optional[int]:
+    try:
+        if not isinstance(amount, (int, float)):
+            amount = float(str(amount).replace("$", "").replace(",", "").strip())
+        return int(round(amount * 100))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
 def format_currency(amount: str) -> str:
     try:
         amount = amount.replace("$", "").strip()
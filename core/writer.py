@@ -0,0 +1,92 @@
+import logging
+import queue
+import sqlite3
+import threading
+from typing import Callable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+Store = Callable[[sqlite3.Cursor], int]
+
+
+class DatabaseWriter:
+    # Owns every write on the connection while it runs. Writes queued during a
+    # commit are applied together in the next transaction (group commit).
+    def __init__(self, manager, queue_depth: int = 1000):
+        self.manager = manager
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_depth)
+        self.commits = 0
+        self.writes = 0
+        self.thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self.thread.start()
+
+    def is_current(self) -> bool:
+        return threading.current_thread() is self.thread
+
+    def submit(self, store: Store, label: str) -> None:
+        if not self.thread.is_alive():
+            self.manager._write(store, label)
+            return
+        self.queue.put((store, label))
+
+    def flush(self) -> None:
+        if self.thread.is_alive() and not self.is_current():
+            self.queue.join()
+
+    def close(self) -> None:
+        if self.thread.is_alive() and not self.is_current():
+            self.queue.put(_STOP)
+            self.thread.join()
+
+    def _drain(self, first: Tuple[Store, str]) -> Tuple[List[Tuple[Store, str]], bool]:
+        batch = [first]
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                return batch, False
+            if item is _STOP:
+                self.queue.task_done()
+                return batch, True
+            batch.append(item)
+
+    def _commit(self, batch: List[Tuple[Store, str]]) -> None:
+        manager = self.manager
+        with manager.write_lock:
+            cursor = manager.connection.cursor()
+            try:
+                for store, _ in batch:
+                    store(cursor)
+                manager.connection.commit()
+                self.commits += 1
+                self.writes += len(batch)
+                return
+            except Exception as e:
+                manager.connection.rollback()
+                logger.warning(
+                    "Group commit of %s writes failed, retrying one by one: %s",
+                    len(batch),
+                    e,
+                )
+
+        for store, label in batch:
+            manager._write(store, label)
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                self.queue.task_done()
+                return
+            batch, stopping = self._drain(item)
+            try:
+                self._commit(batch)
+            except Exception as e:
+                print(f"Error writing to database: {str(e)}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            if stopping:
+                return
@@ -0,0 +1,197 @@
+import bisect
+import logging
+import queue
+import threading
+from typing import Iterator, List, Optional
+
+from config.settings import BACKFILL_SETTINGS
+
+from .imap_parsing import FetchedMessage
+
+logger = logging.getLogger(__name__)
+
+_SHARD_DONE = object()
+
+
+def plan_shards(message_ids: List[bytes], count: int) -> List[List[bytes]]:
+    ordered = sorted(message_ids, key=int)
+    if not ordered:
+        return []
+    size = -(-len(ordered) // max(1, count))
+    return [ordered[i : i + size] for i in range(0, len(ordered), size)]
+
+
+class Shard:
+    def __init__(self, message_ids: List[bytes]):
+        self.message_ids = message_ids
+        self.uids = [int(uid) for uid in message_ids]
+        self.first_uid = self.uids[0]
+        self.last_uid = self.uids[-1]
+        self.completed = set()
+        self.pos = 0
+
+    @property
+    def done_uid(self) -> int:
+        return self.uids[self.pos - 1] if self.pos else self.first_uid - 1
+
+    def complete(self, uid: int) -> bool:
+        self.completed.add(uid)
+        start = self.pos
+        while self.pos < len(self.uids) and self.uids[self.pos] in self.completed:
+            self.completed.discard(self.uids[self.pos])
+            self.pos += 1
+        return self.pos != start
+
+
+class ShardedBackfill:
+    def __init__(self, connector, connections: Optional[int] = None):
+        self.connector = connector
+        limit = connector.rate.limits["concurrency"]["max"]
+        self.connections = max(
+            1, min(connections or BACKFILL_SETTINGS["connections"], limit)
+        )
+        self.folder = connector.current_folder or ""
+        self.criteria = connector.current_criteria or ""
+        self.uidvalidity = connector.current_uidvalidity
+        self.shards: List[Shard] = []
+        self._firsts: List[int] = []
+        self._lock = threading.Lock()
+        self._main_lock = threading.Lock()
+        self._unsaved = 0
+
+    @property
+    def batch_size(self) -> int:
+        return self.connector.batch_size
+
+    def _resume(self, message_ids: List[bytes]) -> List[bytes]:
+        if not self.uidvalidity:
+            return message_ids
+        saved = self.connector.sync_store.get_shards(
+            self.folder, self.criteria, self.uidvalidity
+        )
+        if not saved:
+            return message_ids
+
+        def _done(uid: int) -> bool:
+            return any(s["first_uid"] <= uid <= s["done_uid"] for s in saved)
+
+        remaining = [uid for uid in message_ids if not _done(int(uid))]
+        if len(remaining) < len(message_ids):
+            print(
+                f"⏩ Resuming backfill: {len(message_ids) - len(remaining)} emails "
+                "already handled by earlier shards"
+            )
+        return remaining
+
+    def save(self) -> None:
+        if not self.uidvalidity or not self.shards:
+            return
+        with self._lock:
+            progress = [
+                (shard.first_uid, shard.last_uid, shard.done_uid)
+                for shard in self.shards
+            ]
+            self._unsaved = 0
+        try:
+            self.connector.sync_store.save_shards(
+                self.folder, self.criteria, self.uidvalidity, progress
+            )
+        except Exception as e:
+            print(f"Warning: Could not save backfill progress: {e}")
+
+    def record_done(self, email_data) -> None:
+        uid = getattr(email_data, "uid", None)
+        if not uid:
+            return
+        uid = int(uid)
+        with self._lock:
+            i = bisect.bisect_right(self._firsts, uid) - 1
+            if i < 0 or uid > self.shards[i].last_uid:
+                return
+            if self.shards[i].complete(uid):
+                self._unsaved += 1
+            should_save = self._unsaved >= self.connector.batch_size
+        if should_save:
+            self.save()
+
+    def _fetch_shard(
+        self,
+        index: int,
+        shard: Shard,
+        batches: queue.Queue,
+        stop: threading.Event,
+    ) -> None:
+        def _put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        worker = None
+        try:
+            if index:
+                try:
+                    worker = self.connector.open_worker()
+                except Exception as e:
+                    print(f"⚠ Shard {index + 1} could not open a connection: {e}")
+
+            if worker:
+                source = worker.iter_fetch_batches(shard.message_ids)
+                for batch in source:
+                    if not _put(batch):
+                        return
+            else:
+                with self._main_lock:
+                    for batch in self.connector.iter_fetch_batches(shard.message_ids):
+                        if not _put(batch):
+                            return
+        except Exception as e:
+            print(f"Error fetching shard {index + 1}: {e}")
+            logger.exception("Backfill shard %s failed", index + 1)
+        finally:
+            if worker:
+                worker.close_worker()
+            _put(_SHARD_DONE)
+
+    def iter_fetch_batches(
+        self, message_ids: List[bytes], use_uid: bool = True
+    ) -> Iterator[List[FetchedMessage]]:
+        message_ids = self._resume(message_ids)
+        self.shards = [Shard(ids) for ids in plan_shards(message_ids, self.connections)]
+        self._firsts = [shard.first_uid for shard in self.shards]
+        if not self.shards:
+            return
+        self.save()
+
+        print(
+            f"🚀 Backfilling {len(message_ids)} emails over {len(self.shards)} "
+            "parallel connections"
+        )
+        batches: queue.Queue = queue.Queue(maxsize=len(self.shards) * 2)
+        stop = threading.Event()
+        threads = [
+            threading.Thread(
+                target=self._fetch_shard,
+                args=(index, shard, batches, stop),
+                daemon=True,
+            )
+            for index, shard in enumerate(self.shards)
+        ]
+        for thread in threads:
+            thread.start()
+
+        running = len(threads)
+        try:
+            while running:
+                batch = batches.get()
+                if batch is _SHARD_DONE:
+                    running -= 1
+                    continue
+                yield batch
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join(timeout=5)
@@ -1,20 +1,100 @@
+import copy
 import imaplib
 import json
 import logging
 import re
+import select
 import ssl
 import sys
 import threading
 import time
+from collections import defaultdict
 from datetime import datetime
 from functools import wraps
 from pathlib import Path
-from typing import List, Optional, Set, Tuple
-
-from config.settings import EMAIL_SERVERS
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from config.settings import (
+    EMAIL_SERVERS,
+    FETCH_SETTINGS,
+    RATE_SETTINGS,
+    SYNC_SETTINGS,
+)
+
+from .imap_parsing import (
+    FetchedMessage,
+    build_partial_message,
+    fetch_item,
+    fetched_message,
+    find_html_part,
+    parse_fetch_response,
+    parse_header_block,
+    parse_status_response,
+)
+from .rate_control import (
+    MISSING_MESSAGE_MARKERS,
+    RateController,
+    is_throttle_reply,
+    is_throttle_response,
+)
+from .sync_store import SyncStateStore, UidSet
 
 logger = logging.getLogger(__name__)
 
+PARTIAL_HEADER_FIELDS = "FROM TO SUBJECT DATE MESSAGE-ID"
+PREFETCH_HEADER_FIELDS = "FROM SUBJECT DATE MESSAGE-ID"
+IDLE_WAKE_RESPONSES = (b"EXISTS", b"EXPUNGE", b"RECENT")
+FETCH_META_ITEMS = "UID RFC822.SIZE INTERNALDATE"
+FETCH_CHUNK_RETRIES = 3
+# A standby connection is opened once this share of the session budget is used
+SESSION_STANDBY_AT = 0.9
+
+
+def is_message_error(error: Exception) -> bool:
+    # NO/BAD replies and missing-message errors depend on the requested set, so
+    # splitting the set helps; aborts and socket errors need a retry instead.
+    if isinstance(error, imaplib.IMAP4.abort):
+        return False
+    if isinstance(error, imaplib.IMAP4.error):
+        return True
+    error_str = str(error).lower()
+    return any(text in error_str for text in MISSING_MESSAGE_MARKERS)
+
+
+class ResumableIMAP4_SSL(imaplib.IMAP4_SSL):
+    # imaplib cannot pass a TLS session to wrap_socket, so reconnects would
+    # always pay for a full handshake.
+    def __init__(self, host, port, ssl_context, tls_session=None):
+        self.tls_session = tls_session
+        super().__init__(host, port, ssl_context=ssl_context)
+
+    def _create_socket(self, timeout):
+        sock = imaplib.IMAP4._create_socket(self, timeout)
+        return self.ssl_context.wrap_socket(
+            sock, server_hostname=self.host, session=self.tls_session
+        )
+
+
+def take_batch(
+    message_ids: List[bytes],
+    start: int,
+    sizes: Dict[bytes, int],
+    max_count: int,
+    byte_budget: int,
+    large_bytes: int,
+) -> List[bytes]:
+    batch: List[bytes] = []
+    total = 0
+    for msg_id in message_ids[start : start + max_count]:
+        size = sizes.get(msg_id, 0)
+        if size >= large_bytes:
+            return batch or [msg_id]
+        if batch and total + size > byte_budget:
+            break
+        batch.append(msg_id)
+        total += size
+    return batch
+
 
 def retry_with_backoff(max_retries=3, base_delay=1):
     def decorator(func):
@@ -80,61 +160,202 @@ class EmailConnector:
         self.connection: Optional[imaplib.IMAP4] = None
         self.fetch_count = 0
         self.current_folder: Optional[str] = None
+        self.current_criteria: Optional[str] = None
 
         cache_dir = Path("cache")
         cache_dir.mkdir(exist_ok=True)
-        self.processed_uids_file = (
-            cache_dir
-            / f"processed_uids_{email.replace('@', '_').replace('.', '_')}.json"
-        )
-        self.processed_uids: Set[str] = self._load_processed_uids()
+        safe_email = email.replace("@", "_").replace(".", "_")
+        self.sync_store = SyncStateStore(cache_dir / f"sync_{safe_email}.db")
+        self.current_uidvalidity = 0
+        self._high_water: Optional[dict] = None
+        self._examined: Dict[Tuple[str, int], UidSet] = {}
+        # Shared with open_worker() copies: backfill shards fetch on their own
+        # threads while the consumer marks UIDs and checkpoints.
+        self._progress_lock = threading.RLock()
+        self.scan_results: Dict[Tuple[str, str], List[bytes]] = {}
+        self._migrate_legacy_cache(cache_dir, safe_email)
+        self.partial_fetch = self.service_config.get("partial_fetch", False)
+        self.condstore = False
 
         self.is_proton = service_type == "proton" or self.service_config["server"] in [
             "127.0.0.1",
             "localhost",
             "host.docker.internal",
         ]
+        server_key = "proton" if self.is_proton else self.service_config["server"]
+        limits = RATE_SETTINGS["limits"].get(
+            server_key, RATE_SETTINGS["limits"]["default"]
+        )
+        safe_server = re.sub(r"[^A-Za-z0-9]+", "_", server_key)
+        self.rate = RateController(
+            limits,
+            cache_dir / f"rate_{safe_server}.json",
+            adaptive=RATE_SETTINGS["adaptive"],
+        )
+        self.max_fetches_per_session = limits["max_fetches_per_session"]
+        self.ssl_context = ssl.create_default_context()
+        self.tls_session: Optional[ssl.SSLSession] = None
+        self._standby: Optional[imaplib.IMAP4] = None
+        self._standby_folder: Optional[str] = None
+        self._standby_thread: Optional[threading.Thread] = None
+        self._standby_lock = threading.Lock()
         if self.is_proton:
-            self.fetch_delay = 0.01
-            self.batch_delay = 0.05
-            self.batch_size = 200
-            self.max_fetches_per_session = 5000
             print(
-                f"⚡ ProtonMail Bridge detected ({self.service_config['server']}): Using optimized settings (200 batch, 0.01s delay)"
+                f"⚡ ProtonMail Bridge detected ({self.service_config['server']}): Using optimized settings ({self.batch_size} batch, {self.fetch_delay}s delay)"
             )
-        else:
-            self.fetch_delay = 0.1
-            self.batch_delay = 0.5
-            self.batch_size = 50
-            self.max_fetches_per_session = 1000
 
-    def _load_processed_uids(self) -> Set[str]:
-        if self.processed_uids_file.exists():
+    @property
+    def batch_size(self) -> int:
+        return self.rate.get("batch_size")
+
+    @batch_size.setter
+    def batch_size(self, value: int) -> None:
+        self.rate.set("batch_size", value)
+
+    @property
+    def batch_delay(self) -> float:
+        return self.rate.get("batch_delay")
+
+    @batch_delay.setter
+    def batch_delay(self, value: float) -> None:
+        self.rate.set("batch_delay", value)
+
+    @property
+    def fetch_delay(self) -> float:
+        return self.rate.get("fetch_delay")
+
+    @fetch_delay.setter
+    def fetch_delay(self, value: float) -> None:
+        self.rate.set("fetch_delay", value)
+
+    def _migrate_legacy_cache(self, cache_dir: Path, safe_email: str) -> None:
+        uids_file = cache_dir / f"processed_uids_{safe_email}.json"
+        if uids_file.exists():
             try:
-                with open(self.processed_uids_file, "r") as f:
-                    data = json.load(f)
-                    print(f"📋 Loaded {len(data)} processed email UIDs from cache")
-                    return set(data)
+                with open(uids_file, "r") as f:
+                    count = self.sync_store.import_legacy_uids(
+                        int(uid) for uid in json.load(f)
+                    )
+                uids_file.rename(uids_file.with_suffix(".json.migrated"))
+                print(f"📋 Migrated {count} processed email UIDs to sync store")
             except Exception as e:
-                print(f"Warning: Could not load processed UIDs: {e}")
-        return set()
+                print(f"Warning: Could not migrate processed UIDs: {e}")
 
-    def _save_processed_uids(self) -> None:
+    def mark_uid_processed(self, uid: bytes) -> None:
+        self.sync_store.mark_processed(
+            self.current_folder or "", self.current_uidvalidity or 0, int(uid)
+        )
+
+    def mark_uid_examined(self, uid: bytes) -> None:
+        key = (self.current_folder or "", self.current_uidvalidity or 0)
+        with self._progress_lock:
+            self._examined.setdefault(key, UidSet()).add(int(uid))
+
+    def checkpoint(self) -> None:
         try:
-            with open(self.processed_uids_file, "w") as f:
-                json.dump(list(self.processed_uids), f)
+            with self._progress_lock:
+                self._advance_high_water()
+            self.sync_store.checkpoint()
+            self.rate.save()
         except Exception as e:
             print(f"Warning: Could not save processed UIDs: {e}")
 
-    def mark_uid_processed(self, uid: bytes) -> None:
-        uid_str = uid.decode() if isinstance(uid, bytes) else str(uid)
-        self.processed_uids.add(uid_str)
-
     def save_progress(self) -> None:
-        self._save_processed_uids()
-        print(f"💾 Saved {len(self.processed_uids)} processed UIDs to cache")
+        self.checkpoint()
+        print(f"💾 Saved {self.sync_store.processed_count()} processed UIDs to cache")
+
+    def _select_on(
+        self, connection: imaplib.IMAP4, folder: str, readonly: bool = False
+    ) -> bool:
+        if " " in folder or "/" in folder:
+            folder_variants = [f'"{folder}"', folder]
+        else:
+            folder_variants = [folder]
+        for folder_variant in folder_variants:
+            try:
+                status, _ = connection.select(folder_variant, readonly=readonly)
+                if status == "OK":
+                    return True
+            except Exception:
+                continue
+        return False
+
+    def _prepare_standby(self, folder: Optional[str]) -> None:
+        try:
+            connection = self._open_connection()
+            capabilities = getattr(connection, "capabilities", ()) or ()
+            if self.condstore and "ENABLE" in capabilities:
+                connection.enable("CONDSTORE")
+            if folder and not self._select_on(connection, folder):
+                raise Exception(f"could not select folder '{folder}'")
+        except Exception as e:
+            logger.warning("Could not open standby connection: %s", e)
+            return
+        with self._standby_lock:
+            self._standby = connection
+            self._standby_folder = folder
+        logger.info("Standby connection ready for folder %s", folder)
+
+    def _start_standby(self) -> None:
+        with self._standby_lock:
+            if self._standby or (
+                self._standby_thread and self._standby_thread.is_alive()
+            ):
+                return
+            self._standby_thread = threading.Thread(
+                target=self._prepare_standby, args=(self.current_folder,), daemon=True
+            )
+            self._standby_thread.start()
+
+    def _take_standby(self) -> Optional[imaplib.IMAP4]:
+        with self._standby_lock:
+            connection, folder = self._standby, self._standby_folder
+            self._standby = None
+        if connection and folder != self.current_folder:
+            if not self.current_folder or not self._select_on(
+                connection, self.current_folder
+            ):
+                self._logout_quietly(connection)
+                return None
+        return connection
+
+    def _discard_standby(self) -> None:
+        with self._standby_lock:
+            connection, self._standby = self._standby, None
+        self._logout_quietly(connection)
+
+    @staticmethod
+    def _logout_quietly(connection: Optional[imaplib.IMAP4]) -> None:
+        if not connection:
+            return
+        try:
+            connection.logout()
+        except Exception:
+            pass
+
+    def _ensure_session(self) -> bool:
+        if self.fetch_count >= self.max_fetches_per_session:
+            return self._refresh_session()
+        if self.fetch_count >= self.max_fetches_per_session * SESSION_STANDBY_AT:
+            self._start_standby()
+        return True
 
     def _refresh_session(self) -> bool:
+        standby = self._take_standby()
+        if standby:
+            old_connection, self.connection = self.connection, standby
+            old_count = self.fetch_count
+            self.fetch_count = 0
+            self.checkpoint()
+            threading.Thread(
+                target=self._logout_quietly, args=(old_connection,), daemon=True
+            ).start()
+            print(
+                f"\n🔄 Session limit reached; switched to standby connection "
+                f"(reset fetch count from {old_count} to 0)"
+            )
+            return True
+
         try:
             print(
                 f"\n🔄 Session limit reached ({self.max_fetches_per_session} fetches). Refreshing connection..."
@@ -151,37 +372,19 @@ class EmailConnector:
                 finally:
                     self.connection = None
 
-            time.sleep(1)
-
             self.connect()
             old_count = self.fetch_count
             self.fetch_count = 0
 
             if saved_folder:
-                try:
-                    folder_variants = []
-                    if " " in saved_folder or "/" in saved_folder:
-                        folder_variants = [f'"{saved_folder}"', saved_folder]
-                    else:
-                        folder_variants = [saved_folder]
-
-                    for folder_variant in folder_variants:
-                        try:
-                            status, _ = self.connection.select(folder_variant)
-                            if status == "OK":
-                                print(
-                                    f"✓ Session refreshed. Reset fetch count from {old_count} to 0. Re-selected folder: {saved_folder}"
-                                )
-                                return True
-                        except Exception:
-                            continue
-                    print(
-                        f"⚠ Session refreshed but could not re-select folder: {saved_folder}"
-                    )
-                except Exception as e:
+                if self._select_on(self.connection, saved_folder):
                     print(
-                        f"⚠ Session refreshed but error re-selecting folder: {str(e)}"
+                        f"✓ Session refreshed. Reset fetch count from {old_count} to 0. Re-selected folder: {saved_folder}"
                     )
+                    return True
+                print(
+                    f"⚠ Session refreshed but could not re-select folder: {saved_folder}"
+                )
             else:
                 print(f"✓ Session refreshed. Reset fetch count from {old_count} to 0")
 
@@ -190,31 +393,288 @@ class EmailConnector:
             print(f"✗ Error refreshing session: {str(e)}")
             return False
 
-    def connect(self) -> None:
-        try:
-            if self.service_config["use_ssl"]:
-                self.connection = imaplib.IMAP4_SSL(
-                    self.service_config["server"], self.service_config["port"]
-                )
-            elif self.service_config["server"] == "127.0.0.1":
-                self.connection = imaplib.IMAP4(
-                    self.service_config["server"], self.service_config["port"]
-                )
-            else:
-                context = ssl.create_default_context()
-                context.check_hostname = False
-                context.verify_mode = ssl.CERT_NONE
-                self.connection = imaplib.IMAP4(
-                    self.service_config["server"], self.service_config["port"]
+    def _open_connection(self) -> imaplib.IMAP4:
+        if self.service_config["use_ssl"]:
+            connection = ResumableIMAP4_SSL(
+                self.service_config["server"],
+                self.service_config["port"],
+                self.ssl_context,
+                tls_session=self.tls_session,
+            )
+        elif self.service_config["server"] == "127.0.0.1":
+            connection = imaplib.IMAP4(
+                self.service_config["server"], self.service_config["port"]
+            )
+        else:
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            connection = imaplib.IMAP4(
+                self.service_config["server"], self.service_config["port"]
+            )
+            connection.starttls(ssl_context=context)
+
+        connection.login(self.email, self.password)
+        session = getattr(connection.sock, "session", None)
+        if session is not None:
+            if getattr(connection.sock, "session_reused", False):
+                logger.info(
+                    "Resumed TLS session with %s", self.service_config["server"]
                 )
-                self.connection.starttls(ssl_context=context)
+            self.tls_session = session
+        return connection
 
-            self.connection.login(self.email, self.password)
+    def connect(self) -> None:
+        try:
+            self.connection = self._open_connection()
             print(f"Successfully connected to {self.service_config['server']}")
+            self._enable_condstore()
         except Exception as e:
             print(f"Error connecting to email server: {str(e)}")
             raise
 
+    def open_worker(self) -> "EmailConnector":
+        # Extra connection for parallel fetching; shares the sync store and
+        # rate controller but keeps its own session and fetch count.
+        worker = copy.copy(self)
+        worker.connection = None
+        worker.fetch_count = 0
+        worker._high_water = None
+        worker.scan_results = {}
+        worker._standby = None
+        worker._standby_thread = None
+        worker._standby_lock = threading.Lock()
+        worker.connect()
+        folder = self.current_folder or "INBOX"
+        if self._select_on(worker.connection, folder, readonly=True):
+            return worker
+        worker.close_worker()
+        raise Exception(f"Could not select folder '{folder}' on worker connection")
+
+    def close_worker(self) -> None:
+        self._discard_standby()
+        self._logout_quietly(self.connection)
+        self.connection = None
+
+    def _enable_condstore(self) -> None:
+        capabilities = getattr(self.connection, "capabilities", ()) or ()
+        self.condstore = False
+        if "CONDSTORE" not in capabilities and "QRESYNC" not in capabilities:
+            return
+        try:
+            if "ENABLE" in capabilities:
+                self.connection.enable("CONDSTORE")
+            self.condstore = True
+            logger.info("CONDSTORE enabled; searches will sync incrementally")
+        except Exception as e:
+            logger.warning("Could not enable CONDSTORE: %s", e)
+
+    def _mailbox_versions(self) -> Tuple[Optional[int], Optional[int]]:
+        versions = []
+        for code in ("UIDVALIDITY", "HIGHESTMODSEQ"):
+            try:
+                _, data = self.connection.response(code)
+                value = data[-1] if data else None
+                versions.append(int(value) if value else None)
+            except Exception:
+                versions.append(None)
+        return versions[0], versions[1]
+
+    def _selected_status(self, folder: str) -> Optional[Dict[str, int]]:
+        # RFC 3501 warns against STATUS on the selected mailbox, so re-select it
+        # and read the same counters from the SELECT response codes instead.
+        try:
+            if not self._select_on(self.connection, folder):
+                return None
+            values = {}
+            for code, key in (
+                ("UIDNEXT", "UIDNEXT"),
+                ("EXISTS", "MESSAGES"),
+                ("UIDVALIDITY", "UIDVALIDITY"),
+                ("HIGHESTMODSEQ", "HIGHESTMODSEQ"),
+            ):
+                _, data = self.connection.response(code)
+                if data and data[-1]:
+                    values[key] = int(data[-1])
+            self.current_uidvalidity = values.get("UIDVALIDITY", 0)
+            return values or None
+        except Exception as e:
+            logger.warning("Could not re-select '%s' for status: %s", folder, e)
+            return None
+
+    def folder_status(self, folder: str) -> Optional[Dict[str, int]]:
+        if folder == self.current_folder:
+            return self._selected_status(folder)
+
+        items = "UIDNEXT MESSAGES UIDVALIDITY"
+        if self.condstore:
+            items += " HIGHESTMODSEQ"
+        quoted_folder = f'"{folder}"' if " " in folder or "/" in folder else folder
+        try:
+            typ, data = self.connection.status(quoted_folder, f"({items})")
+            if typ != "OK":
+                return None
+            return parse_status_response(data) or None
+        except Exception as e:
+            logger.warning("STATUS failed for '%s': %s", folder, e)
+            return None
+
+    def _search_all_uids(self, formatted_criteria: str) -> List[bytes]:
+        uid_data = self._run_search(formatted_criteria, use_uid=True)
+        return uid_data[0].split() if uid_data and uid_data[0] else []
+
+    def _condstore_search(
+        self, folder: str, formatted_criteria: str, uidvalidity: int, modseq: int
+    ) -> List[bytes]:
+        cached = self.sync_store.get_search(folder, formatted_criteria)
+        if cached and cached["uidvalidity"] != uidvalidity:
+            print(f"⚠ UIDVALIDITY changed for '{folder}'; resetting sync state")
+            cached = None
+        elif cached and cached["modseq"] > modseq:
+            print(
+                f"⚠ HIGHESTMODSEQ went backwards for '{folder}'; resetting sync state"
+            )
+            cached = None
+
+        if cached and cached["modseq"] == modseq:
+            print(f"⚡ Mailbox unchanged since last sync (HIGHESTMODSEQ {modseq})")
+            uids = cached["uids"]
+        elif cached and cached["modseq"] < modseq:
+            uids = UidSet()
+            try:
+                changed = self._search_all_uids(
+                    f"MODSEQ {cached['modseq'] + 1} {formatted_criteria}"
+                )
+                # Expunges bump HIGHESTMODSEQ but never show up in a MODSEQ search
+                if len(cached["uids"]):
+                    uids.update(
+                        int(uid)
+                        for uid in self._search_all_uids(
+                            f"UID {cached['uids'].to_imap()}"
+                        )
+                    )
+            except imaplib.IMAP4.error as e:
+                logger.warning("MODSEQ search failed (%s); using full search", e)
+                self.condstore = False
+                return self._search_all_uids(formatted_criteria)
+            print(
+                f"⚡ Incremental sync since MODSEQ {cached['modseq']}: "
+                f"{len(changed)} changed, {len(cached['uids']) - len(uids)} removed"
+            )
+            uids.update(int(uid) for uid in changed)
+        else:
+            uids = UidSet()
+            uids.update(int(uid) for uid in self._search_all_uids(formatted_criteria))
+
+        self.sync_store.save_search(
+            folder, formatted_criteria, uidvalidity, modseq, uids
+        )
+        return [str(uid).encode() for uid in uids]
+
+    def _high_water_mark(
+        self, folder: str, formatted_criteria: str, uidvalidity: Optional[int]
+    ) -> Optional[dict]:
+        if not uidvalidity:
+            return None
+        mark = self.sync_store.get_high_water(folder, formatted_criteria)
+        if not mark or mark["uidvalidity"] != uidvalidity:
+            return None
+        audit_after = SYNC_SETTINGS["full_audit_hours"] * 3600
+        if time.time() - mark["audited_at"] >= audit_after:
+            print(f"🔍 Running periodic full-range audit of '{folder}'")
+            return None
+        return mark
+
+    def _advance_high_water(self) -> None:
+        state = self._high_water
+        if not state:
+            return
+        key = (state["folder"], state["uidvalidity"])
+        processed = self.sync_store.processed(*key)
+        examined = self._examined.get(key, UidSet())
+        uids = state["uids"]
+        pos = state["pos"]
+        while pos < len(uids) and (uids[pos] in processed or uids[pos] in examined):
+            pos += 1
+        if pos == state["pos"] and state["saved"]:
+            return
+        if pos:
+            state["last_uid"] = max(state["last_uid"], uids[pos - 1])
+        state["pos"] = pos
+        self.sync_store.save_high_water(
+            state["folder"],
+            state["criteria"],
+            state["uidvalidity"],
+            state["last_uid"],
+            state["audited_at"],
+        )
+        state["saved"] = True
+
+    def _search_uids(
+        self,
+        folder: str,
+        formatted_criteria: str,
+        uidvalidity: Optional[int],
+        modseq: Optional[int],
+    ) -> List[bytes]:
+        mark = self._high_water_mark(folder, formatted_criteria, uidvalidity)
+        last_uid = mark["last_uid"] if mark else 0
+
+        if self.condstore and uidvalidity and modseq:
+            uids = self._condstore_search(
+                folder, formatted_criteria, uidvalidity, modseq
+            )
+        elif last_uid:
+            uids = self._search_all_uids(f"UID {last_uid + 1}:* {formatted_criteria}")
+        else:
+            uids = self._search_all_uids(formatted_criteria)
+
+        if last_uid:
+            # "UID n:*" always matches the highest UID, even when it is below n
+            uids = [uid for uid in uids if int(uid) > last_uid]
+            print(f"⚡ Searching above high-water UID {last_uid}: {len(uids)} found")
+
+        self._track_high_water(folder, formatted_criteria, uidvalidity, uids, mark)
+        return uids
+
+    def _track_high_water(
+        self,
+        folder: str,
+        formatted_criteria: str,
+        uidvalidity: Optional[int],
+        uids: List[bytes],
+        mark: Optional[dict],
+    ) -> None:
+        if not uidvalidity:
+            return
+        self._high_water = {
+            "folder": folder,
+            "criteria": formatted_criteria,
+            "uidvalidity": uidvalidity,
+            "last_uid": mark["last_uid"] if mark else 0,
+            "audited_at": mark["audited_at"] if mark else time.time(),
+            "uids": sorted(int(uid) for uid in uids),
+            "pos": 0,
+            "saved": False,
+        }
+        self._advance_high_water()
+
+    def _scan_search(
+        self,
+        folder: str,
+        formatted_criteria: str,
+        uidvalidity: Optional[int],
+        scan_keys: List[str],
+    ) -> List[bytes]:
+        # A combined scan keeps no state of its own; it starts above the lowest
+        # high-water mark of the per-type searches it stands in for.
+        marks = [self._high_water_mark(folder, key, uidvalidity) for key in scan_keys]
+        floor = min(mark["last_uid"] for mark in marks) if all(marks) else 0
+        if not floor:
+            return self._search_all_uids(formatted_criteria)
+        uids = self._search_all_uids(f"UID {floor + 1}:* {formatted_criteria}")
+        return [uid for uid in uids if int(uid) > floor]
+
     def _format_date_for_imap(self, date_str: str) -> str:
         if not date_str:
             return ""
@@ -392,10 +852,28 @@ class EmailConnector:
             )
             return _search(ascii_criteria, None)
 
+    def build_search_query(self, search_criteria: dict) -> str:
+        search_criteria = self._expand_subject_criteria(search_criteria)
+
+        formatted_criteria = self._format_search_criteria(search_criteria)
+        if not self.is_proton and not formatted_criteria.isascii():
+            ascii_fallback = self._to_ascii_criteria(formatted_criteria)
+            logger.warning(
+                "Non-ASCII IMAP criteria for non-Proton account; using ASCII fallback: %s",
+                ascii_fallback,
+            )
+            formatted_criteria = ascii_fallback
+        return formatted_criteria
+
     def search_emails(
-        self, folder: str, search_criteria: dict, use_uid_filter: bool = True
+        self,
+        folder: str,
+        search_criteria: Union[dict, str],
+        use_uid_filter: bool = True,
+        scan_keys: Optional[List[str]] = None,
     ) -> Tuple[bool, list]:
         spinner = None
+        self._high_water = None
         try:
             folder_variants = []
             if " " in folder or "/" in folder:
@@ -413,37 +891,59 @@ class EmailConnector:
                         break
                 except Exception:
                     continue
+            uidvalidity, modseq = self._mailbox_versions() if selected else (None, None)
+            self.current_uidvalidity = uidvalidity or 0
 
             if not selected:
                 raise Exception(
                     f"Could not select folder '{folder}' (tried: {', '.join(folder_variants)})"
                 )
 
-            search_criteria = self._expand_subject_criteria(search_criteria)
-
-            formatted_criteria = self._format_search_criteria(search_criteria)
-            if not self.is_proton and not formatted_criteria.isascii():
-                ascii_fallback = self._to_ascii_criteria(formatted_criteria)
-                logger.warning(
-                    "Non-ASCII IMAP criteria for non-Proton account; using ASCII fallback: %s",
-                    ascii_fallback,
-                )
-                formatted_criteria = ascii_fallback
+            if isinstance(search_criteria, str):
+                formatted_criteria = search_criteria
+            else:
+                formatted_criteria = self.build_search_query(search_criteria)
+            self.current_criteria = formatted_criteria
             print(f"Using IMAP search criteria: {formatted_criteria}")
             logger.info("IMAP search criteria: %s", formatted_criteria)
+            scanned = (
+                self.scan_results.pop((folder, formatted_criteria), None)
+                if use_uid_filter
+                else None
+            )
 
             spinner = ProgressSpinner(f"Searching folder '{folder}'")
             spinner.start()
 
             try:
+                if scan_keys is not None:
+                    all_uids = self._scan_search(
+                        folder, formatted_criteria, uidvalidity, scan_keys
+                    )
+                    spinner.stop()
+                    return True, all_uids
                 if use_uid_filter:
-                    uid_data = self._run_search(formatted_criteria, use_uid=True)
+                    if scanned is not None:
+                        print("⚡ Using results from the combined folder scan")
+                        mark = self._high_water_mark(
+                            folder, formatted_criteria, uidvalidity
+                        )
+                        last_uid = mark["last_uid"] if mark else 0
+                        all_uids = [uid for uid in scanned if int(uid) > last_uid]
+                        self._track_high_water(
+                            folder, formatted_criteria, uidvalidity, all_uids, mark
+                        )
+                    else:
+                        all_uids = self._search_uids(
+                            folder, formatted_criteria, uidvalidity, modseq
+                        )
 
                     spinner.stop()
+                    processed = self.sync_store.processed(
+                        folder, self.current_uidvalidity
+                    )
 
-                    if uid_data[0]:
-                        all_uids = uid_data[0].split()
-
+                    if all_uids:
                         if len(all_uids) > 100:
                             print(
                                 f"🔄 Filtering {len(all_uids)} emails against processed cache..."
@@ -451,7 +951,7 @@ class EmailConnector:
                             filter_start = time.time()
                             new_uids = []
                             for i, uid in enumerate(all_uids):
-                                if uid.decode() not in self.processed_uids:
+                                if int(uid) not in processed:
                                     new_uids.append(uid)
                                 if i % 500 == 0 and i > 0:
                                     sys.stdout.write(
@@ -465,9 +965,7 @@ class EmailConnector:
                             sys.stdout.flush()
                         else:
                             new_uids = [
-                                uid
-                                for uid in all_uids
-                                if uid.decode() not in self.processed_uids
+                                uid for uid in all_uids if int(uid) not in processed
                             ]
 
                         print(
@@ -503,14 +1001,29 @@ class EmailConnector:
             print(f"Error searching emails in {folder}: {str(e)}")
             return False, []
 
+    def _imap_fetch(self, id_set: bytes, items: str, use_uid: bool = True):
+        started = time.monotonic()
+        try:
+            if use_uid:
+                typ, msg_data = self.connection.uid("fetch", id_set, items)
+            else:
+                typ, msg_data = self.connection.fetch(id_set, items)
+        except Exception as e:
+            if not is_message_error(e) or is_throttle_response(e):
+                self.rate.record_throttle(e)
+            raise
+        self.rate.record_command(time.monotonic() - started)
+        if is_throttle_reply(typ, msg_data):
+            self.rate.record_throttle(msg_data)
+        return typ, msg_data
+
     @retry_with_backoff(max_retries=3, base_delay=1)
     def fetch_email(
         self, message_id: bytes, protocol: str = "BODY.PEEK[]", use_uid: bool = True
     ) -> Tuple[bool, Optional[tuple]]:
         try:
-            if self.fetch_count >= self.max_fetches_per_session:
-                if not self._refresh_session():
-                    return False, None
+            if not self._ensure_session():
+                return False, None
 
             fetch_protocol = (
                 "BODY.PEEK[]"
@@ -518,18 +1031,14 @@ class EmailConnector:
                 else protocol
             )
 
-            if use_uid:
-                _, msg_data = self.connection.uid(
-                    "fetch", message_id, f"({fetch_protocol})"
-                )
-            else:
-                _, msg_data = self.connection.fetch(message_id, f"({fetch_protocol})")
+            _, msg_data = self._imap_fetch(message_id, f"({fetch_protocol})", use_uid)
 
             if not msg_data or not msg_data[0]:
                 return False, None
 
             self.fetch_count += 1
-            time.sleep(self.fetch_delay)
+            if self.fetch_delay:
+                time.sleep(self.fetch_delay)
             return True, msg_data[0]
         except imaplib.IMAP4.error as e:
             error_str = str(e).lower()
@@ -543,74 +1052,195 @@ class EmailConnector:
             print(f"Error fetching email {message_id}: {str(e)}")
             raise
 
-    @retry_with_backoff(max_retries=3, base_delay=1)
-    def fetch_emails_batch(
-        self, message_ids: List[bytes], use_uid: bool = True
-    ) -> List[tuple]:
+    def _supports_binary(self) -> bool:
+        capabilities = getattr(self.connection, "capabilities", ()) or ()
+        return "BINARY" in capabilities
+
+    def _fetch_html_parts(
+        self, batch: List[bytes]
+    ) -> Tuple[List[FetchedMessage], List[bytes]]:
+        _, msg_data = self._imap_fetch(
+            b",".join(batch), f"({FETCH_META_ITEMS} BODYSTRUCTURE)"
+        )
+
+        html_parts: Dict[bytes, Dict] = {}
+        metadata: Dict[bytes, Dict] = {}
+        for fields in parse_fetch_response(msg_data):
+            uid = fields.get("UID")
+            html_part = find_html_part(fields.get("BODYSTRUCTURE"))
+            if uid and html_part:
+                html_parts[uid] = html_part
+                metadata[uid] = fields
+
+        uids_by_part: Dict[str, List[bytes]] = defaultdict(list)
+        for uid, html_part in html_parts.items():
+            uids_by_part[html_part["part"]].append(uid)
+
+        decoded = self._supports_binary()
+        section = "BINARY" if decoded else "BODY"
+        fetched: Dict[bytes, FetchedMessage] = {}
+        for part, uids in uids_by_part.items():
+            _, msg_data = self._imap_fetch(
+                b",".join(uids),
+                f"(UID BODY.PEEK[HEADER.FIELDS ({PARTIAL_HEADER_FIELDS})] "
+                f"{section}.PEEK[{part}])",
+            )
+            for fields in parse_fetch_response(msg_data):
+                uid = fields.get("UID")
+                body = fetch_item(fields, f"{section}[{part}]")
+                if uid not in html_parts or body is None:
+                    continue
+                message = build_partial_message(
+                    fetch_item(fields, "BODY[HEADER"),
+                    body,
+                    html_parts[uid],
+                    decoded=decoded,
+                )
+                fetched[uid] = fetched_message(metadata[uid], message)
+
+        results = [fetched[uid] for uid in batch if uid in fetched]
+        remaining = [uid for uid in batch if uid not in fetched]
+        return results, remaining
+
+    def _fetch_full_messages(
+        self, message_ids: List[bytes], use_uid: bool
+    ) -> List[FetchedMessage]:
+        id_range = b",".join(message_ids)
+        items = f"({FETCH_META_ITEMS} BODY.PEEK[])"
+        typ, msg_data = self._imap_fetch(id_range, items, use_uid)
+        if typ != "OK":
+            raise imaplib.IMAP4.error(f"FETCH failed: {msg_data}")
+
         results = []
-        total_batches = (len(message_ids) + self.batch_size - 1) // self.batch_size
+        for fields in parse_fetch_response(msg_data):
+            body = fetch_item(fields, "BODY[]")
+            if isinstance(body, bytes):
+                results.append(fetched_message(fields, body))
+        return results
+
+    def _fetch_chunk(
+        self, message_ids: List[bytes], use_uid: bool
+    ) -> List[FetchedMessage]:
+        for attempt in range(FETCH_CHUNK_RETRIES):
+            try:
+                return self._fetch_full_messages(message_ids, use_uid)
+            except Exception as e:
+                if is_message_error(e) or attempt == FETCH_CHUNK_RETRIES - 1:
+                    raise
+                delay = 2**attempt
+                print(
+                    f"Retry {attempt + 1}/{FETCH_CHUNK_RETRIES} for {len(message_ids)} "
+                    f"emails after {delay}s due to: {e}"
+                )
+                time.sleep(delay)
+        return []
 
-        for i in range(0, len(message_ids), self.batch_size):
-            batch = message_ids[i : i + self.batch_size]
-            batch_num = (i // self.batch_size) + 1
+    def _bisect_fetch(
+        self, message_ids: List[bytes], use_uid: bool
+    ) -> List[FetchedMessage]:
+        try:
+            return self._fetch_chunk(message_ids, use_uid)
+        except Exception as e:
+            if not is_message_error(e):
+                raise
+            if len(message_ids) == 1:
+                print(f"⚠ Skipping email {message_ids[0].decode()}: {e}")
+                return []
+            logger.info("Splitting fetch of %s emails after: %s", len(message_ids), e)
+        middle = len(message_ids) // 2
+        return self._bisect_fetch(message_ids[:middle], use_uid) + self._bisect_fetch(
+            message_ids[middle:], use_uid
+        )
 
-            if self.fetch_count >= self.max_fetches_per_session:
-                if not self._refresh_session():
-                    break
+    def _fetch_sizes(self, message_ids: List[bytes], use_uid: bool) -> Dict[bytes, int]:
+        sizes: Dict[bytes, int] = {}
+        chunk_size = FETCH_SETTINGS["size_prefetch_chunk"]
+        for i in range(0, len(message_ids), chunk_size):
+            chunk = message_ids[i : i + chunk_size]
+            _, msg_data = self._imap_fetch(
+                b",".join(chunk), "(UID RFC822.SIZE)", use_uid
+            )
+            for fields in parse_fetch_response(msg_data):
+                msg_id = fields.get("UID") if use_uid else fields.get("SEQ")
+                try:
+                    sizes[msg_id] = int(fields["RFC822.SIZE"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+        return sizes
+
+    @staticmethod
+    def _order_by_uid(
+        results: List[FetchedMessage], batch: List[bytes]
+    ) -> List[FetchedMessage]:
+        position = {uid: i for i, uid in enumerate(batch)}
+        return sorted(results, key=lambda item: position.get(item.uid, len(batch)))
 
+    def iter_fetch_batches(
+        self, message_ids: List[bytes], use_uid: bool = True
+    ) -> Iterator[List[FetchedMessage]]:
+        sizes: Dict[bytes, int] = {}
+        if len(message_ids) > 1:
+            try:
+                sizes = self._fetch_sizes(message_ids, use_uid)
+            except Exception as e:
+                print(f"⚠ Size prefetch failed, batching by count only: {e}")
+
+        i = 0
+        batch_num = 0
+        while i < len(message_ids):
+            batch = take_batch(
+                message_ids,
+                i,
+                sizes,
+                self.batch_size,
+                FETCH_SETTINGS["batch_bytes"],
+                FETCH_SETTINGS["large_message_bytes"],
+            )
+            i += len(batch)
+            batch_num += 1
+            batch_bytes = sum(sizes.get(msg_id, 0) for msg_id in batch)
+
+            if not self._ensure_session():
+                break
+
+            results = []
+            remaining = batch
+            throttles = self.rate.throttle_count
             try:
-                id_range = b",".join(batch)
                 print(
-                    f"Fetching batch {batch_num}/{total_batches} ({len(batch)} emails)..."
+                    f"Fetching batch {batch_num} ({len(batch)} emails, "
+                    f"{batch_bytes / 1024 / 1024:.1f} MB, {i}/{len(message_ids)})..."
                 )
 
-                if use_uid:
-                    _, msg_data = self.connection.uid(
-                        "fetch", id_range, "(BODY.PEEK[])"
-                    )
-                else:
-                    _, msg_data = self.connection.fetch(id_range, "(BODY.PEEK[])")
+                if use_uid and self.partial_fetch:
+                    try:
+                        results, remaining = self._fetch_html_parts(batch)
+                    except Exception as e:
+                        print(f"⚠ Partial fetch failed, downloading full messages: {e}")
+                        results, remaining = [], batch
 
-                for item in msg_data:
-                    if isinstance(item, tuple) and len(item) >= 2:
-                        results.append(item)
+                if remaining:
+                    results.extend(self._bisect_fetch(remaining, use_uid))
+                    if len(remaining) < len(batch):
+                        results = self._order_by_uid(results, batch)
 
                 self.fetch_count += len(batch)
-                time.sleep(self.batch_delay)
+                if self.rate.throttle_count == throttles:
+                    self.rate.record_success()
+                if self.batch_delay:
+                    time.sleep(self.batch_delay)
 
-            except imaplib.IMAP4.error as e:
-                error_str = str(e).lower()
-                if "no such message" in error_str or "invalid message" in error_str:
-                    print(
-                        f"Some messages in batch {batch_num} no longer exist, fetching individually..."
-                    )
-                    for msg_id in batch:
-                        success, email_data = self.fetch_email(msg_id, use_uid=use_uid)
-                        if success and email_data:
-                            results.append(email_data)
-                else:
-                    print(f"Batch fetch error for batch {batch_num}: {e}")
-                    for msg_id in batch:
-                        success, email_data = self.fetch_email(msg_id, use_uid=use_uid)
-                        if success and email_data:
-                            results.append(email_data)
             except Exception as e:
-                error_str = str(e).lower()
-                if "no such message" in error_str or "invalid message" in error_str:
-                    print(
-                        f"Some messages in batch {batch_num} no longer exist, fetching individually..."
-                    )
-                    for msg_id in batch:
-                        success, email_data = self.fetch_email(msg_id, use_uid=use_uid)
-                        if success and email_data:
-                            results.append(email_data)
-                else:
-                    print(f"Batch fetch error for batch {batch_num}: {e}")
-                    for msg_id in batch:
-                        success, email_data = self.fetch_email(msg_id, use_uid=use_uid)
-                        if success and email_data:
-                            results.append(email_data)
+                print(f"Batch fetch error for batch {batch_num}: {e}")
 
+            yield results
+
+    def fetch_emails_batch(
+        self, message_ids: List[bytes], use_uid: bool = True
+    ) -> List[FetchedMessage]:
+        results = []
+        for batch in self.iter_fetch_batches(message_ids, use_uid=use_uid):
+            results.extend(batch)
         return results
 
     @retry_with_backoff(max_retries=3, base_delay=1)
@@ -618,50 +1248,81 @@ class EmailConnector:
         self, message_id: bytes, use_uid: bool = True
     ) -> Tuple[bool, Optional[dict]]:
         try:
-            if self.fetch_count >= self.max_fetches_per_session:
-                if not self._refresh_session():
-                    return False, None
+            if not self._ensure_session():
+                return False, None
 
-            if use_uid:
-                _, msg_data = self.connection.uid(
-                    "fetch",
-                    message_id,
-                    "(BODY.PEEK[HEADER.FIELDS (FROM SUBJECT DATE)])",
-                )
-            else:
-                _, msg_data = self.connection.fetch(
-                    message_id, "(BODY.PEEK[HEADER.FIELDS (FROM SUBJECT DATE)])"
-                )
+            _, msg_data = self._imap_fetch(
+                message_id, "(BODY.PEEK[HEADER.FIELDS (FROM SUBJECT DATE)])", use_uid
+            )
 
             self.fetch_count += 1
-            time.sleep(self.fetch_delay / 2)
+            if self.fetch_delay:
+                time.sleep(self.fetch_delay / 2)
 
             if msg_data and msg_data[0]:
                 header_data = (
                     msg_data[0][1] if isinstance(msg_data[0], tuple) else msg_data[0]
                 )
                 if isinstance(header_data, bytes):
-                    header_text = header_data.decode("utf-8", errors="ignore")
-                    headers = {}
-                    for line in header_text.split("\n"):
-                        if ":" in line:
-                            key, value = line.split(":", 1)
-                            headers[key.strip().lower()] = value.strip()
-                    return True, headers
+                    return True, parse_header_block(header_data)
 
             return False, None
         except Exception as e:
             print(f"Error fetching email headers {message_id}: {str(e)}")
             return False, None
 
+    def _fetch_header_chunk(
+        self, chunk: List[bytes], use_uid: bool
+    ) -> List[Tuple[bytes, dict]]:
+        id_set = b",".join(chunk)
+        items = f"(UID BODY.PEEK[HEADER.FIELDS ({PREFETCH_HEADER_FIELDS})] RFC822.SIZE)"
+        _, msg_data = self._imap_fetch(id_set, items, use_uid)
+
+        self.fetch_count += len(chunk)
+        if self.fetch_delay:
+            time.sleep(self.fetch_delay / 2)
+
+        headers_by_id: Dict[bytes, dict] = {}
+        for fields in parse_fetch_response(msg_data):
+            msg_id = fields.get("UID") if use_uid else fields.get("SEQ")
+            header_data = fetch_item(fields, "BODY[HEADER")
+            if msg_id is None or not isinstance(header_data, bytes):
+                continue
+            headers = parse_header_block(header_data)
+            size = fields.get("RFC822.SIZE")
+            if size is not None:
+                headers["size"] = int(size)
+            headers_by_id[msg_id] = headers
+
+        return [
+            (msg_id, headers_by_id[msg_id])
+            for msg_id in chunk
+            if msg_id in headers_by_id
+        ]
+
     def fetch_headers_batch(
         self, message_ids: List[bytes], use_uid: bool = True
     ) -> List[Tuple[bytes, dict]]:
         results = []
-        for msg_id in message_ids:
-            success, headers = self.fetch_email_headers(msg_id, use_uid=use_uid)
-            if success and headers:
-                results.append((msg_id, headers))
+        i = 0
+        while i < len(message_ids):
+            chunk = message_ids[i : i + self.batch_size]
+            i += len(chunk)
+
+            if not self._ensure_session():
+                break
+
+            throttles = self.rate.throttle_count
+            try:
+                results.extend(self._fetch_header_chunk(chunk, use_uid))
+                if self.rate.throttle_count == throttles:
+                    self.rate.record_success()
+            except Exception as e:
+                print(f"Header batch fetch error, fetching individually: {e}")
+                for msg_id in chunk:
+                    success, headers = self.fetch_email_headers(msg_id, use_uid=use_uid)
+                    if success and headers:
+                        results.append((msg_id, headers))
         return results
 
     def filter_by_subject_keywords(
@@ -679,7 +1340,51 @@ class EmailConnector:
         print(f"✓ Filtered to {len(filtered)}/{len(message_ids)} relevant emails")
         return filtered
 
-    def idle_wait(self, folder: str, timeout: int = 30) -> Optional[bool]:
+    def supports_idle(self) -> bool:
+        capabilities = getattr(self.connection, "capabilities", ()) or ()
+        return "IDLE" in capabilities
+
+    def _read_until_tagged(self, tag: bytes) -> None:
+        while True:
+            line = self.connection.readline()
+            if not line:
+                raise imaplib.IMAP4.abort("Connection closed while leaving IDLE")
+            if line.startswith(tag):
+                return
+
+    def _data_buffered(self, sock) -> bool:
+        # select() only sees the socket; lines already pulled into imaplib's
+        # read buffer (or TLS records) have to be peeked without blocking.
+        reader = getattr(self.connection, "file", None)
+        if reader is None or not hasattr(reader, "peek"):
+            return False
+        timeout = sock.gettimeout()
+        try:
+            sock.setblocking(False)
+            return bool(reader.peek(1))
+        except OSError:
+            return False
+        finally:
+            sock.settimeout(timeout)
+
+    def _wait_for_idle_event(self, timeout: float) -> bool:
+        sock = self.connection.socket()
+        deadline = time.time() + timeout
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            if not self._data_buffered(sock):
+                readable, _, _ = select.select([sock], [], [], remaining)
+                if not readable:
+                    return False
+            line = self.connection.readline()
+            if not line:
+                raise imaplib.IMAP4.abort("Connection closed during IDLE")
+            if any(word in line.upper() for word in IDLE_WAKE_RESPONSES):
+                return True
+
+    def idle_wait(self, folder: str, timeout: float = 30) -> Optional[bool]:
         try:
             if not self.connection:
                 return None
@@ -691,46 +1396,34 @@ class EmailConnector:
                 if typ != "OK":
                     return None
                 self.current_folder = folder
+                self.current_uidvalidity = self._mailbox_versions()[0] or 0
             except Exception:
                 return None
 
+            tag = self.connection._new_tag()
             try:
-                tag = self.connection._new_tag()
-                self.connection.send(f"{tag.decode()} IDLE\r\n".encode())
-
+                self.connection.send(tag + b" IDLE\r\n")
                 response = self.connection.readline()
-                if (
-                    b"+ idling" not in response.lower()
-                    and b"+ waiting" not in response.lower()
-                ):
-                    try:
-                        self.connection.readline()
-                    except Exception:
-                        pass
+                if not response.startswith(b"+"):
+                    logger.warning("Server rejected IDLE: %r", response)
                     return None
+            except Exception as e:
+                logger.warning("Could not start IDLE: %s", e)
+                return None
 
-                start_time = time.time()
-                while time.time() - start_time < timeout:
-                    try:
-                        self.connection.socket().settimeout(1)
-                        data = self.connection.readline()
-                        if data and (b"EXISTS" in data or b"RECENT" in data):
-                            self.connection.send(b"DONE\r\n")
-                            self.connection.readline()
-                            return True
-                    except Exception:
-                        continue
+            try:
+                woke = self._wait_for_idle_event(timeout)
+            except Exception as e:
+                logger.warning("IDLE wait failed: %s", e)
+                woke = None
 
+            try:
                 self.connection.send(b"DONE\r\n")
-                self.connection.readline()
-                return False
-            except Exception:
-                try:
-                    self.connection.send(b"DONE\r\n")
-                    self.connection.readline()
-                except Exception:
-                    pass
+                self._read_until_tagged(tag)
+            except Exception as e:
+                logger.warning("Could not leave IDLE cleanly: %s", e)
                 return None
+            return woke
         except Exception:
             return None
 
@@ -739,6 +1432,9 @@ class EmailConnector:
             "fetch_count": self.fetch_count,
             "max_fetches": self.max_fetches_per_session,
             "remaining": self.max_fetches_per_session - self.fetch_count,
+            "batch_size": self.batch_size,
+            "batch_delay": self.batch_delay,
+            "throttled": self.rate.throttle_count,
         }
 
     def get_folders(self) -> list:
@@ -761,6 +1457,7 @@ class EmailConnector:
             return []
 
     def disconnect(self) -> None:
+        self._discard_standby()
         if self.connection:
             try:
                 self.save_progress()
@@ -1,8 +1,7 @@
 import copy
 import logging
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Union
 
 from config.settings import (
     AMAZON_SEARCH_CRITERIA,
@@ -12,6 +11,8 @@ from config.settings import (
 )
 
 from .connector import EmailConnector
+from .orders import OrderCollection
+from .pipeline import EmailPipeline
 from .processor import EmailProcessor
 
 logger = logging.getLogger(__name__)
@@ -33,7 +34,10 @@ class BaseEmailHandler:
     def __init__(self, connector: EmailConnector):
         self.connector = connector
         self.processor = EmailProcessor()
+        self.pipeline = EmailPipeline(connector, self.processor)
         self.statistics = {"processed": 0, "successful": 0, "failed": 0}
+        self.persist: Optional[Callable[[List[Dict]], None]] = None
+        self._unsaved: Dict[int, Dict] = {}
 
     def _update_stats(self, success: bool) -> None:
         self.statistics["processed"] += 1
@@ -42,6 +46,78 @@ class BaseEmailHandler:
         else:
             self.statistics["failed"] += 1
 
+    def _process_messages(
+        self,
+        messages: List[bytes],
+        parse_method: str,
+        apply_result: Callable[[Dict], bool],
+        use_uid: bool = True,
+        success_key: str = "order_number",
+        orders: Optional[OrderCollection] = None,
+        **parse_kwargs,
+    ) -> None:
+        if len(messages) > 10:
+            print("⚡ Streaming batch fetch into parallel parsing...")
+            for _, email_data, result in self.pipeline.run(
+                messages, parse_method, use_uid=use_uid, **parse_kwargs
+            ):
+                try:
+                    uid = getattr(email_data, "uid", None)
+                    applied = apply_result(result)
+                    if applied:
+                        self._note_changed(orders, result)
+                    if applied and uid:
+                        self.connector.mark_uid_processed(uid)
+                    elif uid and use_uid and not result.get(success_key):
+                        self.connector.mark_uid_examined(uid)
+                    self._update_stats(bool(result.get(success_key)))
+                except Exception as e:
+                    print(f"Error processing email: {e}")
+                    self._update_stats(False)
+                self._checkpoint_progress()
+            self._persist_changed()
+            self.connector.checkpoint()
+            return
+
+        parse = getattr(self.processor, parse_method)
+        for msg_id in messages:
+            success, email_data = self.connector.fetch_email(msg_id, use_uid=use_uid)
+            if not success or not email_data:
+                continue
+
+            result = parse(email_data, **parse_kwargs)
+            if apply_result(result):
+                self._note_changed(orders, result)
+                self.connector.mark_uid_processed(msg_id)
+            elif use_uid and not result.get(success_key):
+                # Nothing was parsed, so retrying this message can never help.
+                self.connector.mark_uid_examined(msg_id)
+            self._update_stats(bool(result.get(success_key)))
+        self._persist_changed()
+        self.connector.checkpoint()
+
+    def _note_changed(self, orders: Optional[OrderCollection], result: Dict) -> None:
+        number = result.get("order_number")
+        if self.persist is None or orders is None or not number:
+            return
+        for order in orders.find_all(str(number)):
+            self._unsaved[id(order)] = order
+
+    def _persist_changed(self) -> None:
+        if self.persist is None or not self._unsaved:
+            return
+        changed = list(self._unsaved.values())
+        self._unsaved.clear()
+        try:
+            self.persist(changed)
+        except Exception as e:
+            print(f"Warning: Could not save orders during processing: {e}")
+
+    def _checkpoint_progress(self) -> None:
+        if self.statistics["processed"] % self.connector.batch_size == 0:
+            self._persist_changed()
+            self.connector.checkpoint()
+
 
 class OrderEmailHandler(BaseEmailHandler):
     def __init__(self, connector: EmailConnector):
@@ -191,27 +267,57 @@ class OrderEmailHandler(BaseEmailHandler):
         self._merge_shipped_details(order, result)
         return order
 
+    def _apply_confirmation_result(self, result: Dict, orders: OrderCollection) -> bool:
+        if not result.get("order_number"):
+            return False
+
+        orders.append(
+            {
+                "date": result["date"],
+                "number": result["order_number"],
+                "status": "",
+                "tracking": [],
+                "products": result["products"],
+                "xbox_items": result.get("xbox_items", []),
+                "item_image": result.get("item_image", ""),
+                "total_price": result["total_price"],
+                "email_address": result["email_address"],
+                "order_details_link": result.get("order_details_link", ""),
+                "state": result.get("state", ""),
+                "zip": result.get("zip", ""),
+                "zip_and_state": result.get("zip_and_state", ""),
+                "estimated_delivery": result.get("estimated_delivery", ""),
+                "website": "BestBuy",
+            }
+        )
+        self.statistics["confirmations"] += 1
+        location = result.get("zip_and_state") or result.get("state", "")
+        print(
+            f"Processed confirmation: Order {result['order_number']}"
+            + (f" ({location})" if location else "")
+        )
+        return True
+
     def _apply_cancellation_result(
-        self, result: Dict, orders: List[Dict], mark_payment_declined_as_cancelled: bool
-    ) -> None:
+        self,
+        result: Dict,
+        orders: OrderCollection,
+        mark_payment_declined_as_cancelled: bool,
+    ) -> bool:
         order_number = result.get("order_number")
         if not order_number:
-            return
+            return False
 
         status = self._get_cancellation_status(
             result, mark_payment_declined_as_cancelled
         )
-        matched_order = None
-        for order in orders:
-            if order["number"] == order_number:
-                if not (
-                    result.get("cancellation_type") == "payment_declined"
-                    and status == "Payment Declined"
-                    and order.get("status") == "Cancelled"
-                ):
-                    order["status"] = status
-                matched_order = order
-                break
+        matched_order = orders.find(order_number)
+        if matched_order is not None and not (
+            result.get("cancellation_type") == "payment_declined"
+            and status == "Payment Declined"
+            and matched_order.get("status") == "Cancelled"
+        ):
+            matched_order["status"] = status
 
         if matched_order is None:
             new_order = {
@@ -238,10 +344,52 @@ class OrderEmailHandler(BaseEmailHandler):
         else:
             self.statistics["cancellations"] += 1
             print(f"Processed cancellation: Order {order_number}")
+        return True
+
+    def _apply_shipped_result(
+        self, result: Dict, orders: OrderCollection, db_manager=None
+    ) -> bool:
+        if not result.get("order_number"):
+            return False
+
+        order = orders.find(result["order_number"])
+        if order is not None:
+            order["status"] = "Shipped"
+            orders.merge_tracking(order, result["tracking_numbers"])
+            self._apply_shipped_location(order, result, db_manager)
+            self._merge_shipped_details(order, result)
+
+            self.statistics["shipped"] += 1
+            self.statistics["tracking_numbers"] += len(result["tracking_numbers"])
+            print(f"Processed shipped: Order {result['order_number']}")
+            return True
+
+        if not result.get("tracking_numbers"):
+            return False
+
+        new_order = self._new_shipped_order(result)
+        self._apply_shipped_location(new_order, result, db_manager)
+        orders.append(new_order)
+        self.statistics["shipped"] += 1
+        self.statistics["tracking_numbers"] += len(result["tracking_numbers"])
+        print(
+            f"Processed shipped: Order {result['order_number']} (from shipped email only)"
+        )
+        return True
+
+    def _apply_price_match_result(self, result: Dict, credits: List[Dict]) -> bool:
+        if not (result.get("order_number") and result.get("amount_saved")):
+            return False
+
+        credits.append(result)
+        print(
+            f"Processed price match credit: Order {result['order_number']} - ${result['amount_saved']}"
+        )
+        return True
 
     def process_confirmation_emails(
         self, folder: str, ignore_cache: bool = False, date_filter: Optional[str] = None
-    ) -> List[Dict]:
+    ) -> OrderCollection:
         print(f"\nProcessing confirmation emails in folder: {folder}")
 
         use_uid_filter = not ignore_cache
@@ -251,121 +399,29 @@ class OrderEmailHandler(BaseEmailHandler):
         )
 
         if not success:
-            return []
+            return OrderCollection()
 
         print(f"Found {len(messages)} confirmation emails")
-        orders = []
-
-        if len(messages) > 10:
-            print("Using batch fetching for efficiency...")
-            email_data_list = self.connector.fetch_emails_batch(
-                messages, use_uid=use_uid_filter
-            )
-
-            print("⚡ Using parallel processing for email parsing...")
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                future_to_data = {
-                    executor.submit(
-                        self.processor.process_confirmation_email, email_data
-                    ): (email_data, idx)
-                    for idx, email_data in enumerate(email_data_list)
-                    if email_data
-                }
-
-                for future in as_completed(future_to_data):
-                    email_data, idx = future_to_data[future]
-                    try:
-                        result = future.result()
-                        if result.get("order_number"):
-                            orders.append(
-                                {
-                                    "date": result["date"],
-                                    "number": result["order_number"],
-                                    "status": "",
-                                    "tracking": [],
-                                    "products": result["products"],
-                                    "xbox_items": result.get("xbox_items", []),
-                                    "item_image": result.get("item_image", ""),
-                                    "total_price": result["total_price"],
-                                    "email_address": result["email_address"],
-                                    "order_details_link": result.get(
-                                        "order_details_link", ""
-                                    ),
-                                    "state": result.get("state", ""),
-                                    "zip": result.get("zip", ""),
-                                    "zip_and_state": result.get("zip_and_state", ""),
-                                    "estimated_delivery": result.get(
-                                        "estimated_delivery", ""
-                                    ),
-                                    "website": "BestBuy",
-                                }
-                            )
-                            self.statistics["confirmations"] += 1
-                            location = result.get("zip_and_state") or result.get(
-                                "state", ""
-                            )
-                            print(
-                                f"Processed confirmation: Order {result['order_number']}"
-                                + (f" ({location})" if location else "")
-                            )
-
-                            if idx < len(messages):
-                                self.connector.mark_uid_processed(messages[idx])
-
-                        self._update_stats(bool(result.get("order_number")))
-                    except Exception as e:
-                        print(f"Error processing email: {e}")
-                        self._update_stats(False)
-        else:
-            for msg_id in messages:
-                success, email_data = self.connector.fetch_email(
-                    msg_id, use_uid=use_uid_filter
-                )
-                if not success:
-                    continue
-
-                result = self.processor.process_confirmation_email(email_data)
-                if result.get("order_number"):
-                    orders.append(
-                        {
-                            "date": result["date"],
-                            "number": result["order_number"],
-                            "status": "",
-                            "tracking": [],
-                            "products": result["products"],
-                            "xbox_items": result.get("xbox_items", []),
-                            "item_image": result.get("item_image", ""),
-                            "total_price": result["total_price"],
-                            "email_address": result["email_address"],
-                            "order_details_link": result.get("order_details_link", ""),
-                            "state": result.get("state", ""),
-                            "zip": result.get("zip", ""),
-                            "zip_and_state": result.get("zip_and_state", ""),
-                            "estimated_delivery": result.get("estimated_delivery", ""),
-                            "website": "BestBuy",
-                        }
-                    )
-                    self.statistics["confirmations"] += 1
-                    location = result.get("zip_and_state") or result.get("state", "")
-                    print(
-                        f"Processed confirmation: Order {result['order_number']}"
-                        + (f" ({location})" if location else "")
-                    )
-                    self.connector.mark_uid_processed(msg_id)
-
-                self._update_stats(bool(result.get("order_number")))
-
+        orders = OrderCollection()
+        self._process_messages(
+            messages,
+            "process_confirmation_email",
+            lambda result: self._apply_confirmation_result(result, orders),
+            use_uid=use_uid_filter,
+            orders=orders,
+        )
         return orders
 
     def process_cancellation_emails(
         self,
         folder: str,
-        orders: List[Dict],
+        orders: Union[OrderCollection, List[Dict]],
         ignore_cache: bool = False,
         date_filter: Optional[str] = None,
         mark_payment_declined_as_cancelled: bool = True,
     ) -> None:
         print(f"\nProcessing cancellation emails in folder: {folder}")
+        orders = OrderCollection.wrap(orders)
 
         use_uid_filter = not ignore_cache
         search_criteria = get_search_criteria_with_date("cancellation", date_filter)
@@ -377,65 +433,26 @@ class OrderEmailHandler(BaseEmailHandler):
             return
 
         print(f"Found {len(messages)} cancellation emails")
-
-        if len(messages) > 10:
-            print("Using batch fetching for efficiency...")
-            email_data_list = self.connector.fetch_emails_batch(
-                messages, use_uid=use_uid_filter
-            )
-
-            print("⚡ Using parallel processing for email parsing...")
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                future_to_data = {
-                    executor.submit(
-                        self.processor.process_cancellation_email, email_data
-                    ): (email_data, idx)
-                    for idx, email_data in enumerate(email_data_list)
-                    if email_data
-                }
-
-                for future in as_completed(future_to_data):
-                    email_data, idx = future_to_data[future]
-                    try:
-                        result = future.result()
-                        if result.get("order_number"):
-                            self._apply_cancellation_result(
-                                result, orders, mark_payment_declined_as_cancelled
-                            )
-
-                            if idx < len(messages):
-                                self.connector.mark_uid_processed(messages[idx])
-
-                        self._update_stats(bool(result.get("order_number")))
-                    except Exception as e:
-                        print(f"Error processing email: {e}")
-                        self._update_stats(False)
-        else:
-            for msg_id in messages:
-                success, email_data = self.connector.fetch_email(
-                    msg_id, use_uid=use_uid_filter
-                )
-                if not success:
-                    continue
-
-                result = self.processor.process_cancellation_email(email_data)
-                if result.get("order_number"):
-                    self._apply_cancellation_result(
-                        result, orders, mark_payment_declined_as_cancelled
-                    )
-                    self.connector.mark_uid_processed(msg_id)
-
-                self._update_stats(bool(result.get("order_number")))
+        self._process_messages(
+            messages,
+            "process_cancellation_email",
+            lambda result: self._apply_cancellation_result(
+                result, orders, mark_payment_declined_as_cancelled
+            ),
+            use_uid=use_uid_filter,
+            orders=orders,
+        )
 
     def process_shipped_emails(
         self,
         folder: str,
-        orders: List[Dict],
+        orders: Union[OrderCollection, List[Dict]],
         db_manager=None,
         ignore_cache: bool = False,
         date_filter: Optional[str] = None,
     ) -> None:
         print(f"\nProcessing shipped emails in folder: {folder}")
+        orders = OrderCollection.wrap(orders)
 
         use_uid_filter = not ignore_cache
         search_criteria = get_search_criteria_with_date("shipped", date_filter)
@@ -447,123 +464,13 @@ class OrderEmailHandler(BaseEmailHandler):
             return
 
         print(f"Found {len(messages)} shipped emails")
-
-        if len(messages) > 10:
-            print("Using batch fetching for efficiency...")
-            email_data_list = self.connector.fetch_emails_batch(
-                messages, use_uid=use_uid_filter
-            )
-
-            print("⚡ Using parallel processing for email parsing...")
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                future_to_data = {
-                    executor.submit(self.processor.process_shipped_email, email_data): (
-                        email_data,
-                        idx,
-                    )
-                    for idx, email_data in enumerate(email_data_list)
-                    if email_data
-                }
-
-                for future in as_completed(future_to_data):
-                    email_data, idx = future_to_data[future]
-                    try:
-                        result = future.result()
-                        if result.get("order_number"):
-                            matched = False
-                            for order in orders:
-                                if order["number"] == result["order_number"]:
-                                    order["status"] = "Shipped"
-                                    existing_tracking = order.get("tracking", [])
-                                    new_tracking = result["tracking_numbers"]
-
-                                    combined_tracking = list(
-                                        set(existing_tracking + new_tracking)
-                                    )
-                                    order["tracking"] = combined_tracking
-                                    self._apply_shipped_location(
-                                        order, result, db_manager
-                                    )
-                                    self._merge_shipped_details(order, result)
-
-                                    self.statistics["shipped"] += 1
-                                    self.statistics["tracking_numbers"] += len(
-                                        result["tracking_numbers"]
-                                    )
-                                    print(
-                                        f"Processed shipped: Order {result['order_number']}"
-                                    )
-                                    matched = True
-                                    break
-
-                            if not matched and result.get("tracking_numbers"):
-                                new_order = self._new_shipped_order(result)
-                                self._apply_shipped_location(
-                                    new_order, result, db_manager
-                                )
-                                orders.append(new_order)
-                                self.statistics["shipped"] += 1
-                                self.statistics["tracking_numbers"] += len(
-                                    result["tracking_numbers"]
-                                )
-                                print(
-                                    f"Processed shipped: Order {result['order_number']} (from shipped email only)"
-                                )
-
-                            if idx < len(messages):
-                                self.connector.mark_uid_processed(messages[idx])
-
-                        self._update_stats(bool(result.get("order_number")))
-                    except Exception as e:
-                        print(f"Error processing email: {e}")
-                        self._update_stats(False)
-        else:
-            for msg_id in messages:
-                success, email_data = self.connector.fetch_email(
-                    msg_id, use_uid=use_uid_filter
-                )
-                if not success:
-                    continue
-
-                result = self.processor.process_shipped_email(email_data)
-                if result.get("order_number"):
-                    matched = False
-                    for order in orders:
-                        if order["number"] == result["order_number"]:
-                            order["status"] = "Shipped"
-                            existing_tracking = order.get("tracking", [])
-                            new_tracking = result["tracking_numbers"]
-
-                            combined_tracking = list(
-                                set(existing_tracking + new_tracking)
-                            )
-                            order["tracking"] = combined_tracking
-                            self._apply_shipped_location(order, result, db_manager)
-                            self._merge_shipped_details(order, result)
-
-                            self.statistics["shipped"] += 1
-                            self.statistics["tracking_numbers"] += len(
-                                result["tracking_numbers"]
-                            )
-                            print(f"Processed shipped: Order {result['order_number']}")
-                            self.connector.mark_uid_processed(msg_id)
-                            matched = True
-                            break
-
-                    if not matched and result.get("tracking_numbers"):
-                        new_order = self._new_shipped_order(result)
-                        self._apply_shipped_location(new_order, result, db_manager)
-                        orders.append(new_order)
-                        self.statistics["shipped"] += 1
-                        self.statistics["tracking_numbers"] += len(
-                            result["tracking_numbers"]
-                        )
-                        print(
-                            f"Processed shipped: Order {result['order_number']} (from shipped email only)"
-                        )
-                        self.connector.mark_uid_processed(msg_id)
-
-                self._update_stats(bool(result.get("order_number")))
+        self._process_messages(
+            messages,
+            "process_shipped_email",
+            lambda result: self._apply_shipped_result(result, orders, db_manager),
+            use_uid=use_uid_filter,
+            orders=orders,
+        )
 
     def process_price_match_credit_emails(
         self, folder: str, ignore_cache: bool = False, date_filter: Optional[str] = None
@@ -583,57 +490,12 @@ class OrderEmailHandler(BaseEmailHandler):
 
         print(f"Found {len(messages)} price match credit emails")
         credits = []
-
-        if len(messages) > 10:
-            print("Using batch fetching for efficiency...")
-            email_data_list = self.connector.fetch_emails_batch(
-                messages, use_uid=use_uid_filter
-            )
-
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                future_to_data = {
-                    executor.submit(
-                        self.processor.process_price_match_credit_email, email_data
-                    ): (email_data, idx)
-                    for idx, email_data in enumerate(email_data_list)
-                    if email_data
-                }
-
-                for future in as_completed(future_to_data):
-                    email_data, idx = future_to_data[future]
-                    try:
-                        result = future.result()
-                        if result.get("order_number") and result.get("amount_saved"):
-                            credits.append(result)
-                            print(
-                                f"Processed price match credit: Order {result['order_number']} - ${result['amount_saved']}"
-                            )
-
-                            if idx < len(messages):
-                                self.connector.mark_uid_processed(messages[idx])
-
-                        self._update_stats(bool(result.get("order_number")))
-                    except Exception as e:
-                        print(f"Error processing email: {e}")
-                        self._update_stats(False)
-        else:
-            for msg_id in messages:
-                success, email_data = self.connector.fetch_email(
-                    msg_id, use_uid=use_uid_filter
-                )
-                if not success:
-                    continue
-
-                result = self.processor.process_price_match_credit_email(email_data)
-                if result.get("order_number") and result.get("amount_saved"):
-                    credits.append(result)
-                    print(
-                        f"Processed price match credit: Order {result['order_number']} - ${result['amount_saved']}"
-                    )
-                    self.connector.mark_uid_processed(msg_id)
-
-                self._update_stats(bool(result.get("order_number")))
-
+        self._process_messages(
+            messages,
+            "process_price_match_credit_email",
+            lambda result: self._apply_price_match_result(result, credits),
+            use_uid=use_uid_filter,
+        )
         return credits
 
     def get_statistics(self) -> Dict:
@@ -648,6 +510,14 @@ class OrderEmailHandler(BaseEmailHandler):
 
 
 class XboxEmailHandler(BaseEmailHandler):
+    def _apply_xbox_result(self, result: Dict, xbox_codes: List[Dict]) -> bool:
+        if not result.get("code"):
+            return False
+
+        xbox_codes.append(result)
+        print(f"Processed Xbox code: {result['code']}")
+        return True
+
     def process_xbox_emails(
         self, folder: str, ignore_cache: bool = False, date_filter: Optional[str] = None
     ) -> List[Dict]:
@@ -669,58 +539,14 @@ class XboxEmailHandler(BaseEmailHandler):
 
         print(f"Found {len(messages)} Xbox Game Pass emails")
         xbox_codes = []
-
-        if len(messages) > 10:
-            print("Using batch fetching for efficiency...")
-            email_data_list = self.connector.fetch_emails_batch(
-                messages, use_uid=use_uid_filter
-            )
-
-            print("⚡ Using parallel processing for email parsing...")
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                future_to_data = {
-                    executor.submit(self.processor.process_xbox_email, email_data): (
-                        email_data,
-                        idx,
-                    )
-                    for idx, email_data in enumerate(email_data_list)
-                    if email_data
-                }
-
-                for future in as_completed(future_to_data):
-                    email_data, idx = future_to_data[future]
-                    try:
-                        result = future.result()
-                        if result.get("code"):
-                            xbox_codes.append(result)
-                            print(f"Processed Xbox code: {result['code']}")
-
-                            if idx < len(messages):
-                                self.connector.mark_uid_processed(messages[idx])
-
-                        self._update_stats(bool(result.get("code")))
-                    except Exception as e:
-                        print(f"Error processing email: {e}")
-                        self._update_stats(False)
-        else:
-            for msg_id in messages:
-                success, email_data = self.connector.fetch_email(
-                    msg_id, use_uid=use_uid_filter
-                )
-                if not success or not email_data:
-                    print(f"Failed to fetch email ID: {msg_id}")
-                    continue
-
-                result = self.processor.process_xbox_email(email_data)
-                if result.get("code"):
-                    xbox_codes.append(result)
-                    print(f"Processed Xbox code: {result['code']}")
-                    self.connector.mark_uid_processed(msg_id)
-                else:
-                    print(f"No Xbox code found in email ID: {msg_id}")
-
-                self._update_stats(bool(result.get("code")))
-
+        self._process_messages(
+            messages,
+            "process_xbox_email",
+            lambda result: self._apply_xbox_result(result, xbox_codes),
+            use_uid=use_uid_filter,
+            success_key="code",
+            details=False,
+        )
         return xbox_codes
 
 
@@ -736,9 +562,72 @@ class CostcoEmailHandler(BaseEmailHandler):
             }
         )
 
+    def _apply_confirmation_result(self, result: Dict, orders: OrderCollection) -> bool:
+        if not result.get("order_number"):
+            return False
+
+        orders.append(
+            {
+                "date": result["date"],
+                "number": result["order_number"],
+                "status": "",
+                "tracking": [],
+                "products": result["products"],
+                "item_image": result.get("item_image", ""),
+                "total_price": result["total_price"],
+                "email_address": result["email_address"],
+                "membership_number": result.get("membership_number", ""),
+                "state": result.get("state", ""),
+                "website": "Costco",
+            }
+        )
+        self.statistics["confirmations"] += 1
+        print(f"✓ Costco CONFIRMED: Order {result['order_number']}")
+        return True
+
+    def _apply_cancellation_result(self, result: Dict, orders: OrderCollection) -> bool:
+        if not result.get("order_number"):
+            return False
+
+        order = orders.find(result["order_number"])
+        if order is None:
+            return False
+
+        order["status"] = "Cancelled"
+        if result.get("cancellation_date"):
+            order["cancellation_date"] = result["cancellation_date"]
+        self.statistics["cancellations"] += 1
+        print(f"✗ Costco CANCELLED: Order {result['order_number']}")
+        return True
+
+    def _apply_shipped_result(self, result: Dict, orders: OrderCollection) -> bool:
+        if not result.get("order_number"):
+            return False
+
+        order = orders.find(result["order_number"])
+        if order is None:
+            return False
+
+        if order.get("status") == "Cancelled":
+            logger.debug(
+                f"Skipping shipped update for cancelled order: {result['order_number']}"
+            )
+            return True
+        order["status"] = "Shipped"
+        new_tracking = result.get("tracking_numbers", [])
+        orders.merge_tracking(order, new_tracking)
+
+        self.statistics["shipped"] += 1
+        self.statistics["tracking_numbers"] += len(new_tracking)
+        tracking_display = ", ".join(new_tracking) if new_tracking else "None"
+        print(
+            f"📦 Costco SHIPPED: Order {result['order_number']} | Tracking: {tracking_display}"
+        )
+        return True
+
     def process_confirmation_emails(
         self, folder: str, ignore_cache: bool = False, date_filter: Optional[str] = None
-    ) -> List[Dict]:
+    ) -> OrderCollection:
         print(f"\nProcessing Costco confirmation emails in folder: {folder}")
 
         use_uid_filter = not ignore_cache
@@ -750,100 +639,28 @@ class CostcoEmailHandler(BaseEmailHandler):
         )
 
         if not success:
-            return []
+            return OrderCollection()
 
         print(f"Found {len(messages)} Costco confirmation emails")
-        orders = []
-
-        if len(messages) > 10:
-            print("Using batch fetching for efficiency...")
-            email_data_list = self.connector.fetch_emails_batch(
-                messages, use_uid=use_uid_filter
-            )
-
-            print("⚡ Using parallel processing for email parsing...")
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                future_to_data = {
-                    executor.submit(
-                        self.processor.process_costco_confirmation_email, email_data
-                    ): (email_data, idx)
-                    for idx, email_data in enumerate(email_data_list)
-                    if email_data
-                }
-
-                for future in as_completed(future_to_data):
-                    email_data, idx = future_to_data[future]
-                    try:
-                        result = future.result()
-                        if result.get("order_number"):
-                            orders.append(
-                                {
-                                    "date": result["date"],
-                                    "number": result["order_number"],
-                                    "status": "",
-                                    "tracking": [],
-                                    "products": result["products"],
-                                    "item_image": result.get("item_image", ""),
-                                    "total_price": result["total_price"],
-                                    "email_address": result["email_address"],
-                                    "membership_number": result.get(
-                                        "membership_number", ""
-                                    ),
-                                    "state": result.get("state", ""),
-                                    "website": "Costco",
-                                }
-                            )
-                            self.statistics["confirmations"] += 1
-                            print(f"✓ Costco CONFIRMED: Order {result['order_number']}")
-
-                            if idx < len(messages):
-                                self.connector.mark_uid_processed(messages[idx])
-
-                        self._update_stats(bool(result.get("order_number")))
-                    except Exception as e:
-                        logger.error(f"Error processing email: {e}")
-                        self._update_stats(False)
-        else:
-            for msg_id in messages:
-                success, email_data = self.connector.fetch_email(
-                    msg_id, use_uid=use_uid_filter
-                )
-                if not success:
-                    continue
-
-                result = self.processor.process_costco_confirmation_email(email_data)
-                if result.get("order_number"):
-                    orders.append(
-                        {
-                            "date": result["date"],
-                            "number": result["order_number"],
-                            "status": "",
-                            "tracking": [],
-                            "products": result["products"],
-                            "item_image": result.get("item_image", ""),
-                            "total_price": result["total_price"],
-                            "email_address": result["email_address"],
-                            "membership_number": result.get("membership_number", ""),
-                            "state": result.get("state", ""),
-                            "website": "Costco",
-                        }
-                    )
-                    self.statistics["confirmations"] += 1
-                    print(f"✓ Costco CONFIRMED: Order {result['order_number']}")
-                    self.connector.mark_uid_processed(msg_id)
-
-                self._update_stats(bool(result.get("order_number")))
-
+        orders = OrderCollection()
+        self._process_messages(
+            messages,
+            "process_costco_confirmation_email",
+            lambda result: self._apply_confirmation_result(result, orders),
+            use_uid=use_uid_filter,
+            orders=orders,
+        )
         return orders
 
     def process_cancellation_emails(
         self,
         folder: str,
-        orders: List[Dict],
+        orders: Union[OrderCollection, List[Dict]],
         ignore_cache: bool = False,
         date_filter: Optional[str] = None,
     ) -> None:
         print(f"\nProcessing Costco cancellation emails in folder: {folder}")
+        orders = OrderCollection.wrap(orders)
 
         use_uid_filter = not ignore_cache
         search_criteria = get_search_criteria_with_date(
@@ -857,79 +674,24 @@ class CostcoEmailHandler(BaseEmailHandler):
             return
 
         print(f"Found {len(messages)} Costco cancellation emails")
-
-        if len(messages) > 10:
-            print("Using batch fetching for efficiency...")
-            email_data_list = self.connector.fetch_emails_batch(
-                messages, use_uid=use_uid_filter
-            )
-
-            print("⚡ Using parallel processing for email parsing...")
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                future_to_data = {
-                    executor.submit(
-                        self.processor.process_costco_cancellation_email, email_data
-                    ): (email_data, idx)
-                    for idx, email_data in enumerate(email_data_list)
-                    if email_data
-                }
-
-                for future in as_completed(future_to_data):
-                    email_data, idx = future_to_data[future]
-                    try:
-                        result = future.result()
-                        if result.get("order_number"):
-                            for order in orders:
-                                if order["number"] == result["order_number"]:
-                                    order["status"] = "Cancelled"
-                                    if result.get("cancellation_date"):
-                                        order["cancellation_date"] = result[
-                                            "cancellation_date"
-                                        ]
-                                    self.statistics["cancellations"] += 1
-                                    print(
-                                        f"✗ Costco CANCELLED: Order {result['order_number']}"
-                                    )
-                                    break
-
-                            if idx < len(messages):
-                                self.connector.mark_uid_processed(messages[idx])
-
-                        self._update_stats(bool(result.get("order_number")))
-                    except Exception as e:
-                        logger.error(f"Error processing email: {e}")
-                        self._update_stats(False)
-        else:
-            for msg_id in messages:
-                success, email_data = self.connector.fetch_email(
-                    msg_id, use_uid=use_uid_filter
-                )
-                if not success:
-                    continue
-
-                result = self.processor.process_costco_cancellation_email(email_data)
-                if result.get("order_number"):
-                    for order in orders:
-                        if order["number"] == result["order_number"]:
-                            order["status"] = "Cancelled"
-                            if result.get("cancellation_date"):
-                                order["cancellation_date"] = result["cancellation_date"]
-                            self.statistics["cancellations"] += 1
-                            print(f"✗ Costco CANCELLED: Order {result['order_number']}")
-                            self.connector.mark_uid_processed(msg_id)
-                            break
-
-                self._update_stats(bool(result.get("order_number")))
+        self._process_messages(
+            messages,
+            "process_costco_cancellation_email",
+            lambda result: self._apply_cancellation_result(result, orders),
+            use_uid=use_uid_filter,
+            orders=orders,
+        )
 
     def process_shipped_emails(
         self,
         folder: str,
-        orders: List[Dict],
+        orders: Union[OrderCollection, List[Dict]],
         db_manager=None,
         ignore_cache: bool = False,
         date_filter: Optional[str] = None,
     ) -> None:
         print(f"\nProcessing Costco shipped emails in folder: {folder}")
+        orders = OrderCollection.wrap(orders)
 
         use_uid_filter = not ignore_cache
         search_criteria = get_search_criteria_with_date(
@@ -943,103 +705,13 @@ class CostcoEmailHandler(BaseEmailHandler):
             return
 
         print(f"Found {len(messages)} Costco shipped emails")
-
-        if len(messages) > 10:
-            print("Using batch fetching for efficiency...")
-            email_data_list = self.connector.fetch_emails_batch(
-                messages, use_uid=use_uid_filter
-            )
-
-            print("⚡ Using parallel processing for email parsing...")
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                future_to_data = {
-                    executor.submit(
-                        self.processor.process_costco_shipped_email, email_data
-                    ): (email_data, idx)
-                    for idx, email_data in enumerate(email_data_list)
-                    if email_data
-                }
-
-                for future in as_completed(future_to_data):
-                    email_data, idx = future_to_data[future]
-                    try:
-                        result = future.result()
-                        if result.get("order_number"):
-                            for order in orders:
-                                if order["number"] == result["order_number"]:
-                                    if order.get("status") == "Cancelled":
-                                        logger.debug(
-                                            f"Skipping shipped update for cancelled order: {result['order_number']}"
-                                        )
-                                        break
-                                    order["status"] = "Shipped"
-                                    existing_tracking = order.get("tracking", [])
-                                    new_tracking = result.get("tracking_numbers", [])
-
-                                    combined_tracking = list(
-                                        set(existing_tracking + new_tracking)
-                                    )
-                                    order["tracking"] = combined_tracking
-
-                                    self.statistics["shipped"] += 1
-                                    self.statistics["tracking_numbers"] += len(
-                                        new_tracking
-                                    )
-                                    tracking_display = (
-                                        ", ".join(new_tracking)
-                                        if new_tracking
-                                        else "None"
-                                    )
-                                    print(
-                                        f"📦 Costco SHIPPED: Order {result['order_number']} | Tracking: {tracking_display}"
-                                    )
-                                    break
-
-                            if idx < len(messages):
-                                self.connector.mark_uid_processed(messages[idx])
-
-                        self._update_stats(bool(result.get("order_number")))
-                    except Exception as e:
-                        logger.error(f"Error processing email: {e}")
-                        self._update_stats(False)
-        else:
-            for msg_id in messages:
-                success, email_data = self.connector.fetch_email(
-                    msg_id, use_uid=use_uid_filter
-                )
-                if not success:
-                    continue
-
-                result = self.processor.process_costco_shipped_email(email_data)
-                if result.get("order_number"):
-                    for order in orders:
-                        if order["number"] == result["order_number"]:
-                            if order.get("status") == "Cancelled":
-                                logger.debug(
-                                    f"Skipping shipped update for cancelled order: {result['order_number']}"
-                                )
-                                break
-                            order["status"] = "Shipped"
-                            existing_tracking = order.get("tracking", [])
-                            new_tracking = result.get("tracking_numbers", [])
-
-                            combined_tracking = list(
-                                set(existing_tracking + new_tracking)
-                            )
-                            order["tracking"] = combined_tracking
-
-                            self.statistics["shipped"] += 1
-                            self.statistics["tracking_numbers"] += len(new_tracking)
-                            tracking_display = (
-                                ", ".join(new_tracking) if new_tracking else "None"
-                            )
-                            print(
-                                f"📦 Costco SHIPPED: Order {result['order_number']} | Tracking: {tracking_display}"
-                            )
-                            self.connector.mark_uid_processed(msg_id)
-                            break
-
-                self._update_stats(bool(result.get("order_number")))
+        self._process_messages(
+            messages,
+            "process_costco_shipped_email",
+            lambda result: self._apply_shipped_result(result, orders),
+            use_uid=use_uid_filter,
+            orders=orders,
+        )
 
     def get_statistics(self) -> Dict:
         return self.statistics
@@ -1103,9 +775,34 @@ class AmazonEmailHandler(BaseEmailHandler):
 
         return split_orders
 
+    def _apply_confirmation_result(self, result: Dict, orders: OrderCollection) -> bool:
+        if not result.get("order_number"):
+            return False
+
+        split_items = self._split_order_by_items(result)
+        orders.extend(split_items)
+        self.statistics["confirmations"] += len(split_items)
+        print(
+            f"✓ Amazon CONFIRMED: Order {result['order_number']} ({len(split_items)} items split)"
+        )
+        return True
+
+    def _apply_cancellation_result(self, result: Dict, orders: OrderCollection) -> bool:
+        if not result.get("order_number"):
+            return False
+
+        order = orders.find(result["order_number"])
+        if order is None:
+            return False
+
+        order["status"] = "Cancelled"
+        self.statistics["cancellations"] += 1
+        print(f"✗ Amazon CANCELLED: Order {result['order_number']}")
+        return True
+
     def process_confirmation_emails(
         self, folder: str, ignore_cache: bool = False, date_filter: Optional[str] = None
-    ) -> List[Dict]:
+    ) -> OrderCollection:
         print(f"\nProcessing Amazon confirmation emails in folder: {folder}")
 
         use_uid_filter = not ignore_cache
@@ -1117,76 +814,28 @@ class AmazonEmailHandler(BaseEmailHandler):
         )
 
         if not success:
-            return []
+            return OrderCollection()
 
         print(f"Found {len(messages)} Amazon confirmation emails")
-        orders = []
-
-        if len(messages) > 10:
-            print("Using batch fetching for efficiency...")
-            email_data_list = self.connector.fetch_emails_batch(
-                messages, use_uid=use_uid_filter
-            )
-
-            print("⚡ Using parallel processing for email parsing...")
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                future_to_data = {
-                    executor.submit(
-                        self.processor.process_amazon_confirmation_email, email_data
-                    ): (email_data, idx)
-                    for idx, email_data in enumerate(email_data_list)
-                    if email_data
-                }
-
-                for future in as_completed(future_to_data):
-                    email_data, idx = future_to_data[future]
-                    try:
-                        result = future.result()
-                        if result.get("order_number"):
-                            split_items = self._split_order_by_items(result)
-                            orders.extend(split_items)
-                            self.statistics["confirmations"] += len(split_items)
-                            print(
-                                f"✓ Amazon CONFIRMED: Order {result['order_number']} ({len(split_items)} items split)"
-                            )
-
-                            if idx < len(messages):
-                                self.connector.mark_uid_processed(messages[idx])
-
-                        self._update_stats(bool(result.get("order_number")))
-                    except Exception as e:
-                        logger.error(f"Error processing email: {e}")
-                        self._update_stats(False)
-        else:
-            for msg_id in messages:
-                success, email_data = self.connector.fetch_email(
-                    msg_id, use_uid=use_uid_filter
-                )
-                if not success:
-                    continue
-
-                result = self.processor.process_amazon_confirmation_email(email_data)
-                if result.get("order_number"):
-                    split_items = self._split_order_by_items(result)
-                    orders.extend(split_items)
-                    self.statistics["confirmations"] += len(split_items)
-                    print(
-                        f"✓ Amazon CONFIRMED: Order {result['order_number']} ({len(split_items)} items split)"
-                    )
-                    self.connector.mark_uid_processed(msg_id)
-
-                self._update_stats(bool(result.get("order_number")))
-
+        orders = OrderCollection()
+        self._process_messages(
+            messages,
+            "process_amazon_confirmation_email",
+            lambda result: self._apply_confirmation_result(result, orders),
+            use_uid=use_uid_filter,
+            orders=orders,
+        )
         return orders
 
     def process_cancellation_emails(
         self,
         folder: str,
-        orders: List[Dict],
+        orders: Union[OrderCollection, List[Dict]],
         ignore_cache: bool = False,
         date_filter: Optional[str] = None,
     ) -> None:
         print(f"\nProcessing Amazon cancellation emails in folder: {folder}")
+        orders = OrderCollection.wrap(orders)
 
         use_uid_filter = not ignore_cache
         search_criteria = get_search_criteria_with_date(
@@ -1200,66 +849,16 @@ class AmazonEmailHandler(BaseEmailHandler):
             return
 
         print(f"Found {len(messages)} Amazon cancellation emails")
-
-        if len(messages) > 10:
-            print("Using batch fetching for efficiency...")
-            email_data_list = self.connector.fetch_emails_batch(
-                messages, use_uid=use_uid_filter
-            )
-
-            print("⚡ Using parallel processing for email parsing...")
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                future_to_data = {
-                    executor.submit(
-                        self.processor.process_amazon_cancellation_email, email_data
-                    ): (email_data, idx)
-                    for idx, email_data in enumerate(email_data_list)
-                    if email_data
-                }
-
-                for future in as_completed(future_to_data):
-                    email_data, idx = future_to_data[future]
-                    try:
-                        result = future.result()
-                        if result.get("order_number"):
-                            for order in orders:
-                                if order["number"] == result["order_number"]:
-                                    order["status"] = "Cancelled"
-                                    self.statistics["cancellations"] += 1
-                                    print(
-                                        f"✗ Amazon CANCELLED: Order {result['order_number']}"
-                                    )
-                                    break
-
-                            if idx < len(messages):
-                                self.connector.mark_uid_processed(messages[idx])
-
-                        self._update_stats(bool(result.get("order_number")))
-                    except Exception as e:
-                        logger.error(f"Error processing email: {e}")
-                        self._update_stats(False)
-        else:
-            for msg_id in messages:
-                success, email_data = self.connector.fetch_email(
-                    msg_id, use_uid=use_uid_filter
-                )
-                if not success:
-                    continue
-
-                result = self.processor.process_amazon_cancellation_email(email_data)
-                if result.get("order_number"):
-                    for order in orders:
-                        if order["number"] == result["order_number"]:
-                            order["status"] = "Cancelled"
-                            self.statistics["cancellations"] += 1
-                            print(f"✗ Amazon CANCELLED: Order {result['order_number']}")
-                            self.connector.mark_uid_processed(msg_id)
-                            break
-
-                self._update_stats(bool(result.get("order_number")))
+        self._process_messages(
+            messages,
+            "process_amazon_cancellation_email",
+            lambda result: self._apply_cancellation_result(result, orders),
+            use_uid=use_uid_filter,
+            orders=orders,
+        )
 
     def _process_shipped_result(
-        self, result: Dict, orders: List[Dict], db_manager=None
+        self, result: Dict, orders: OrderCollection, db_manager=None
     ) -> int:
         if not result.get("order_number"):
             return 0
@@ -1276,10 +875,7 @@ class AmazonEmailHandler(BaseEmailHandler):
 
         matched_count = 0
 
-        for order in orders:
-            if order["number"] != order_number:
-                continue
-
+        for order in orders.find_all(order_number):
             if order.get("status") == "Cancelled":
                 logger.debug(
                     f"Skipping shipped update for cancelled order: {order['number']}"
@@ -1334,15 +930,29 @@ class AmazonEmailHandler(BaseEmailHandler):
 
         return matched_count
 
+    def _apply_shipped_result(
+        self, result: Dict, orders: OrderCollection, db_manager=None
+    ) -> bool:
+        if not result.get("order_number"):
+            return False
+
+        matched_count = self._process_shipped_result(result, orders, db_manager)
+        self.statistics["shipped"] += matched_count
+        print(
+            f"📦 Amazon SHIPPED: Order {result['order_number']} ({matched_count} items)"
+        )
+        return True
+
     def process_shipped_emails(
         self,
         folder: str,
-        orders: List[Dict],
+        orders: Union[OrderCollection, List[Dict]],
         db_manager=None,
         ignore_cache: bool = False,
         date_filter: Optional[str] = None,
     ) -> None:
         print(f"\nProcessing Amazon shipped emails in folder: {folder}")
+        orders = OrderCollection.wrap(orders)
 
         use_uid_filter = not ignore_cache
         search_criteria = get_search_criteria_with_date(
@@ -1356,65 +966,13 @@ class AmazonEmailHandler(BaseEmailHandler):
             return
 
         print(f"Found {len(messages)} Amazon shipped emails")
-
-        if len(messages) > 10:
-            print("Using batch fetching for efficiency...")
-            email_data_list = self.connector.fetch_emails_batch(
-                messages, use_uid=use_uid_filter
-            )
-
-            print("⚡ Using parallel processing for email parsing...")
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                future_to_data = {
-                    executor.submit(
-                        self.processor.process_amazon_shipped_email, email_data
-                    ): (email_data, idx)
-                    for idx, email_data in enumerate(email_data_list)
-                    if email_data
-                }
-
-                for future in as_completed(future_to_data):
-                    email_data, idx = future_to_data[future]
-                    try:
-                        result = future.result()
-                        if result.get("order_number"):
-                            matched_count = self._process_shipped_result(
-                                result, orders, db_manager
-                            )
-
-                            self.statistics["shipped"] += matched_count
-                            print(
-                                f"📦 Amazon SHIPPED: Order {result['order_number']} ({matched_count} items)"
-                            )
-
-                            if idx < len(messages):
-                                self.connector.mark_uid_processed(messages[idx])
-
-                        self._update_stats(bool(result.get("order_number")))
-                    except Exception as e:
-                        logger.error(f"Error processing email: {e}")
-                        self._update_stats(False)
-        else:
-            for msg_id in messages:
-                success, email_data = self.connector.fetch_email(
-                    msg_id, use_uid=use_uid_filter
-                )
-                if not success:
-                    continue
-
-                result = self.processor.process_amazon_shipped_email(email_data)
-                if result.get("order_number"):
-                    matched_count = self._process_shipped_result(
-                        result, orders, db_manager
-                    )
-
-                    self.statistics["shipped"] += matched_count
-                    print(
-                        f"📦 Amazon SHIPPED: Order {result['order_number']} ({matched_count} items)"
-                    )
-                    self.connector.mark_uid_processed(msg_id)
-
-                self._update_stats(bool(result.get("order_number")))
+        self._process_messages(
+            messages,
+            "process_amazon_shipped_email",
+            lambda result: self._apply_shipped_result(result, orders, db_manager),
+            use_uid=use_uid_filter,
+            orders=orders,
+        )
 
     def get_statistics(self) -> Dict:
         return self.statistics
@@ -1439,9 +997,89 @@ class WalmartEmailHandler(BaseEmailHandler):
             }
         )
 
+    def _apply_confirmation_result(self, result: Dict, orders: OrderCollection) -> bool:
+        if not result.get("order_number"):
+            return False
+
+        orders.append(
+            {
+                "date": result["date"],
+                "number": result["order_number"],
+                "status": "",
+                "tracking": [],
+                "products": result.get("products", []),
+                "total_price": result.get("total_price", "N/A"),
+                "email_address": result.get("email_address", ""),
+                "state": result.get("state", ""),
+                "zip": result.get("zip", ""),
+                "website": "Walmart",
+            }
+        )
+        self.statistics["confirmations"] += 1
+        print(f"Processed Walmart confirmation: Order {result['order_number']}")
+        return True
+
+    def _apply_cancellation_result(self, result: Dict, orders: OrderCollection) -> bool:
+        if not result.get("order_number"):
+            return False
+
+        order = orders.find(result["order_number"])
+        if order is None:
+            return False
+
+        order["status"] = "Cancelled"
+        self.statistics["cancellations"] += 1
+        print(f"Processed Walmart cancellation: Order {result['order_number']}")
+        return True
+
+    def _apply_shipped_result(self, result: Dict, orders: OrderCollection) -> bool:
+        if not result.get("order_number"):
+            return False
+
+        order = orders.find(result["order_number"])
+        if order is not None:
+            if order.get("status") == "Cancelled":
+                return True
+            order["status"] = "Shipped"
+            new_tracking = result.get("tracking_numbers", [])
+            orders.merge_tracking(order, new_tracking)
+
+            if result.get("state") and not order.get("state"):
+                order["state"] = result["state"]
+            if result.get("zip") and not order.get("zip"):
+                order["zip"] = result["zip"]
+
+            self.statistics["shipped"] += 1
+            self.statistics["tracking_numbers"] += len(new_tracking)
+            print(f"Processed Walmart shipped: Order {result['order_number']}")
+            return True
+
+        if not result.get("tracking_numbers"):
+            return False
+
+        orders.append(
+            {
+                "number": result["order_number"],
+                "status": "Shipped",
+                "tracking": result["tracking_numbers"],
+                "products": result.get("products", []),
+                "total_price": result.get("total_price", "N/A"),
+                "email_address": result.get("email_address", ""),
+                "state": result.get("state", ""),
+                "zip": result.get("zip", ""),
+                "website": "Walmart",
+            }
+        )
+        self.statistics["shipped"] += 1
+        self.statistics["tracking_numbers"] += len(result["tracking_numbers"])
+        print(
+            f"Processed Walmart shipped: Order {result['order_number']} (from shipped email only)"
+        )
+        return True
+
     def process_confirmation_emails(
         self, folder: str, ignore_cache: bool = False, date_filter: Optional[str] = None
-    ) -> List[Dict]:
+    ) -> OrderCollection:
         print(f"\nProcessing Walmart confirmation emails in folder: {folder}")
 
         use_uid_filter = not ignore_cache
@@ -1453,98 +1091,28 @@ class WalmartEmailHandler(BaseEmailHandler):
         )
 
         if not success:
-            return []
+            return OrderCollection()
 
         print(f"Found {len(messages)} Walmart confirmation emails")
-        orders = []
-
-        if len(messages) > 10:
-            email_data_list = self.connector.fetch_emails_batch(
-                messages, use_uid=use_uid_filter
-            )
-
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                future_to_data = {
-                    executor.submit(
-                        self.processor.process_walmart_confirmation_email, email_data
-                    ): (email_data, idx)
-                    for idx, email_data in enumerate(email_data_list)
-                    if email_data
-                }
-
-                for future in as_completed(future_to_data):
-                    email_data, idx = future_to_data[future]
-                    try:
-                        result = future.result()
-                        if result.get("order_number"):
-                            orders.append(
-                                {
-                                    "date": result["date"],
-                                    "number": result["order_number"],
-                                    "status": "",
-                                    "tracking": [],
-                                    "products": result.get("products", []),
-                                    "total_price": result.get("total_price", "N/A"),
-                                    "email_address": result.get("email_address", ""),
-                                    "state": result.get("state", ""),
-                                    "zip": result.get("zip", ""),
-                                    "website": "Walmart",
-                                }
-                            )
-                            self.statistics["confirmations"] += 1
-                            print(
-                                f"Processed Walmart confirmation: Order {result['order_number']}"
-                            )
-
-                            if idx < len(messages):
-                                self.connector.mark_uid_processed(messages[idx])
-
-                        self._update_stats(bool(result.get("order_number")))
-                    except Exception as e:
-                        logger.error(f"Error processing email: {e}")
-                        self._update_stats(False)
-        else:
-            for msg_id in messages:
-                success, email_data = self.connector.fetch_email(
-                    msg_id, use_uid=use_uid_filter
-                )
-                if not success:
-                    continue
-
-                result = self.processor.process_walmart_confirmation_email(email_data)
-                if result.get("order_number"):
-                    orders.append(
-                        {
-                            "date": result["date"],
-                            "number": result["order_number"],
-                            "status": "",
-                            "tracking": [],
-                            "products": result.get("products", []),
-                            "total_price": result.get("total_price", "N/A"),
-                            "email_address": result.get("email_address", ""),
-                            "state": result.get("state", ""),
-                            "zip": result.get("zip", ""),
-                            "website": "Walmart",
-                        }
-                    )
-                    self.statistics["confirmations"] += 1
-                    print(
-                        f"Processed Walmart confirmation: Order {result['order_number']}"
-                    )
-                    self.connector.mark_uid_processed(msg_id)
-
-                self._update_stats(bool(result.get("order_number")))
-
+        orders = OrderCollection()
+        self._process_messages(
+            messages,
+            "process_walmart_confirmation_email",
+            lambda result: self._apply_confirmation_result(result, orders),
+            use_uid=use_uid_filter,
+            orders=orders,
+        )
         return orders
 
     def process_cancellation_emails(
         self,
         folder: str,
-        orders: List[Dict],
+        orders: Union[OrderCollection, List[Dict]],
         ignore_cache: bool = False,
         date_filter: Optional[str] = None,
     ) -> None:
         print(f"\nProcessing Walmart cancellation emails in folder: {folder}")
+        orders = OrderCollection.wrap(orders)
 
         use_uid_filter = not ignore_cache
         search_criteria = get_search_criteria_with_date(
@@ -1558,73 +1126,24 @@ class WalmartEmailHandler(BaseEmailHandler):
             return
 
         print(f"Found {len(messages)} Walmart cancellation emails")
-
-        if len(messages) > 10:
-            email_data_list = self.connector.fetch_emails_batch(
-                messages, use_uid=use_uid_filter
-            )
-
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                future_to_data = {
-                    executor.submit(
-                        self.processor.process_walmart_cancellation_email, email_data
-                    ): (email_data, idx)
-                    for idx, email_data in enumerate(email_data_list)
-                    if email_data
-                }
-
-                for future in as_completed(future_to_data):
-                    email_data, idx = future_to_data[future]
-                    try:
-                        result = future.result()
-                        if result.get("order_number"):
-                            for order in orders:
-                                if order["number"] == result["order_number"]:
-                                    order["status"] = "Cancelled"
-                                    self.statistics["cancellations"] += 1
-                                    print(
-                                        f"Processed Walmart cancellation: Order {result['order_number']}"
-                                    )
-                                    break
-
-                            if idx < len(messages):
-                                self.connector.mark_uid_processed(messages[idx])
-
-                        self._update_stats(bool(result.get("order_number")))
-                    except Exception as e:
-                        logger.error(f"Error processing email: {e}")
-                        self._update_stats(False)
-        else:
-            for msg_id in messages:
-                success, email_data = self.connector.fetch_email(
-                    msg_id, use_uid=use_uid_filter
-                )
-                if not success:
-                    continue
-
-                result = self.processor.process_walmart_cancellation_email(email_data)
-                if result.get("order_number"):
-                    for order in orders:
-                        if order["number"] == result["order_number"]:
-                            order["status"] = "Cancelled"
-                            self.statistics["cancellations"] += 1
-                            print(
-                                f"Processed Walmart cancellation: Order {result['order_number']}"
-                            )
-                            self.connector.mark_uid_processed(msg_id)
-                            break
-
-                self._update_stats(bool(result.get("order_number")))
+        self._process_messages(
+            messages,
+            "process_walmart_cancellation_email",
+            lambda result: self._apply_cancellation_result(result, orders),
+            use_uid=use_uid_filter,
+            orders=orders,
+        )
 
     def process_shipped_emails(
         self,
         folder: str,
-        orders: List[Dict],
+        orders: Union[OrderCollection, List[Dict]],
         db_manager=None,
         ignore_cache: bool = False,
         date_filter: Optional[str] = None,
     ) -> None:
         print(f"\nProcessing Walmart shipped emails in folder: {folder}")
+        orders = OrderCollection.wrap(orders)
 
         use_uid_filter = not ignore_cache
         search_criteria = get_search_criteria_with_date(
@@ -1638,144 +1157,13 @@ class WalmartEmailHandler(BaseEmailHandler):
             return
 
         print(f"Found {len(messages)} Walmart shipped emails")
-
-        if len(messages) > 10:
-            email_data_list = self.connector.fetch_emails_batch(
-                messages, use_uid=use_uid_filter
-            )
-
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                future_to_data = {
-                    executor.submit(
-                        self.processor.process_walmart_shipped_email, email_data
-                    ): (email_data, idx)
-                    for idx, email_data in enumerate(email_data_list)
-                    if email_data
-                }
-
-                for future in as_completed(future_to_data):
-                    email_data, idx = future_to_data[future]
-                    try:
-                        result = future.result()
-                        if result.get("order_number"):
-                            matched = False
-                            for order in orders:
-                                if order["number"] == result["order_number"]:
-                                    if order.get("status") == "Cancelled":
-                                        break
-                                    order["status"] = "Shipped"
-                                    existing_tracking = order.get("tracking", [])
-                                    new_tracking = result.get("tracking_numbers", [])
-                                    order["tracking"] = list(
-                                        set(existing_tracking + new_tracking)
-                                    )
-
-                                    if result.get("state") and not order.get("state"):
-                                        order["state"] = result["state"]
-                                    if result.get("zip") and not order.get("zip"):
-                                        order["zip"] = result["zip"]
-
-                                    self.statistics["shipped"] += 1
-                                    self.statistics["tracking_numbers"] += len(
-                                        new_tracking
-                                    )
-                                    print(
-                                        f"Processed Walmart shipped: Order {result['order_number']}"
-                                    )
-                                    matched = True
-                                    break
-
-                            if not matched and result.get("tracking_numbers"):
-                                orders.append(
-                                    {
-                                        "number": result["order_number"],
-                                        "status": "Shipped",
-                                        "tracking": result["tracking_numbers"],
-                                        "products": result.get("products", []),
-                                        "total_price": result.get("total_price", "N/A"),
-                                        "email_address": result.get(
-                                            "email_address", ""
-                                        ),
-                                        "state": result.get("state", ""),
-                                        "zip": result.get("zip", ""),
-                                        "website": "Walmart",
-                                    }
-                                )
-                                self.statistics["shipped"] += 1
-                                self.statistics["tracking_numbers"] += len(
-                                    result["tracking_numbers"]
-                                )
-                                print(
-                                    f"Processed Walmart shipped: Order {result['order_number']} (from shipped email only)"
-                                )
-
-                            if idx < len(messages):
-                                self.connector.mark_uid_processed(messages[idx])
-
-                        self._update_stats(bool(result.get("order_number")))
-                    except Exception as e:
-                        logger.error(f"Error processing email: {e}")
-                        self._update_stats(False)
-        else:
-            for msg_id in messages:
-                success, email_data = self.connector.fetch_email(
-                    msg_id, use_uid=use_uid_filter
-                )
-                if not success:
-                    continue
-
-                result = self.processor.process_walmart_shipped_email(email_data)
-                if result.get("order_number"):
-                    matched = False
-                    for order in orders:
-                        if order["number"] == result["order_number"]:
-                            if order.get("status") == "Cancelled":
-                                break
-                            order["status"] = "Shipped"
-                            existing_tracking = order.get("tracking", [])
-                            new_tracking = result.get("tracking_numbers", [])
-                            order["tracking"] = list(
-                                set(existing_tracking + new_tracking)
-                            )
-
-                            if result.get("state") and not order.get("state"):
-                                order["state"] = result["state"]
-                            if result.get("zip") and not order.get("zip"):
-                                order["zip"] = result["zip"]
-
-                            self.statistics["shipped"] += 1
-                            self.statistics["tracking_numbers"] += len(new_tracking)
-                            print(
-                                f"Processed Walmart shipped: Order {result['order_number']}"
-                            )
-                            self.connector.mark_uid_processed(msg_id)
-                            matched = True
-                            break
-
-                    if not matched and result.get("tracking_numbers"):
-                        orders.append(
-                            {
-                                "number": result["order_number"],
-                                "status": "Shipped",
-                                "tracking": result["tracking_numbers"],
-                                "products": result.get("products", []),
-                                "total_price": result.get("total_price", "N/A"),
-                                "email_address": result.get("email_address", ""),
-                                "state": result.get("state", ""),
-                                "zip": result.get("zip", ""),
-                                "website": "Walmart",
-                            }
-                        )
-                        self.statistics["shipped"] += 1
-                        self.statistics["tracking_numbers"] += len(
-                            result["tracking_numbers"]
-                        )
-                        print(
-                            f"Processed Walmart shipped: Order {result['order_number']} (from shipped email only)"
-                        )
-                        self.connector.mark_uid_processed(msg_id)
-
-                self._update_stats(bool(result.get("order_number")))
+        self._process_messages(
+            messages,
+            "process_walmart_shipped_email",
+            lambda result: self._apply_shipped_result(result, orders),
+            use_uid=use_uid_filter,
+            orders=orders,
+        )
 
     def get_statistics(self) -> Dict:
         return self.statistics
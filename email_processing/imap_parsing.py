@@ -0,0 +1,256 @@
+import logging
+from email.header import decode_header, make_header
+from typing import Any, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+_ATOM_END = b" ()"
+
+
+class FetchedMessage(NamedTuple):
+    # Indexes like imaplib's (response, message) pair so parsers that read
+    # ``email_data[1]`` keep working.
+    response: bytes
+    data: bytes
+    uid: Optional[bytes] = None
+    size: Optional[int] = None
+    internal_date: Optional[str] = None
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def at_end(self) -> bool:
+        self.skip_spaces()
+        return self.pos >= len(self.data)
+
+    def skip_spaces(self) -> None:
+        while self.pos < len(self.data) and self.data[self.pos] in b" \r\n":
+            self.pos += 1
+
+    def read_value(self) -> Any:
+        self.skip_spaces()
+        char = self.data[self.pos : self.pos + 1]
+        if char == b"(":
+            return self._read_list()
+        if char == b'"':
+            return self._read_quoted()
+        if char == b"{":
+            return self._read_literal()
+        atom = self._read_atom()
+        return None if atom.upper() == b"NIL" else atom
+
+    def _read_list(self) -> List[Any]:
+        self.pos += 1
+        items = []
+        while True:
+            self.skip_spaces()
+            if self.pos >= len(self.data):
+                raise ValueError("Unterminated list in IMAP response")
+            if self.data[self.pos : self.pos + 1] == b")":
+                self.pos += 1
+                return items
+            items.append(self.read_value())
+
+    def _read_quoted(self) -> bytes:
+        self.pos += 1
+        value = bytearray()
+        while self.pos < len(self.data):
+            char = self.data[self.pos : self.pos + 1]
+            if char == b"\\":
+                value += self.data[self.pos + 1 : self.pos + 2]
+                self.pos += 2
+                continue
+            self.pos += 1
+            if char == b'"':
+                return bytes(value)
+            value += char
+        raise ValueError("Unterminated quoted string in IMAP response")
+
+    def _read_literal(self) -> bytes:
+        end = self.data.index(b"}", self.pos)
+        size = int(self.data[self.pos + 1 : end])
+        self.pos = end + 1
+        if self.data[self.pos : self.pos + 2] == b"\r\n":
+            self.pos += 2
+        value = self.data[self.pos : self.pos + size]
+        self.pos += size
+        return value
+
+    def _read_atom(self) -> bytes:
+        start = self.pos
+        depth = 0
+        while self.pos < len(self.data):
+            char = self.data[self.pos : self.pos + 1]
+            if char in b"[<":
+                depth += 1
+            elif char in b"]>":
+                depth -= 1
+            elif depth <= 0 and char in _ATOM_END:
+                break
+            self.pos += 1
+        if self.pos == start:
+            raise ValueError(f"Unexpected character in IMAP response at {self.pos}")
+        return self.data[start : self.pos]
+
+
+def _join_response(msg_data: List[Any]) -> bytes:
+    chunks = []
+    for item in msg_data or []:
+        if isinstance(item, tuple) and len(item) >= 2:
+            chunks.append(item[0] + b"\r\n" + item[1])
+        elif isinstance(item, bytes):
+            chunks.append(item)
+    return b"".join(chunks)
+
+
+def parse_fetch_response(msg_data: List[Any]) -> List[Dict[str, Any]]:
+    reader = _Reader(_join_response(msg_data))
+    messages = []
+    while not reader.at_end():
+        sequence = reader.read_value()
+        items = reader.read_value()
+        if not isinstance(items, list):
+            continue
+        fields = {"SEQ": sequence}
+        for i in range(0, len(items) - 1, 2):
+            key = items[i]
+            if isinstance(key, bytes):
+                fields[key.decode("ascii", errors="ignore").upper()] = items[i + 1]
+        messages.append(fields)
+    return messages
+
+
+def parse_status_response(status_data: List[Any]) -> Dict[str, int]:
+    reader = _Reader(_join_response(status_data))
+    if reader.at_end():
+        return {}
+    reader.read_value()
+    items = reader.read_value()
+    if not isinstance(items, list):
+        return {}
+    values = {}
+    for i in range(0, len(items) - 1, 2):
+        try:
+            values[_text(items[i]).upper()] = int(items[i + 1])
+        except (TypeError, ValueError):
+            continue
+    return values
+
+
+def fetch_item(fields: Dict[str, Any], prefix: str) -> Any:
+    prefix = prefix.upper()
+    for key, value in fields.items():
+        if key.startswith(prefix):
+            return value
+    return None
+
+
+def fetched_message(fields: Dict[str, Any], data: bytes) -> FetchedMessage:
+    uid = fields.get("UID")
+    sequence = fields.get("SEQ") or uid or b""
+    try:
+        size = int(fields["RFC822.SIZE"])
+    except (KeyError, TypeError, ValueError):
+        size = len(data)
+    return FetchedMessage(
+        response=b"%s (UID %s)" % (sequence, uid) if uid else sequence,
+        data=data,
+        uid=uid,
+        size=size,
+        internal_date=_text(fields.get("INTERNALDATE")) or None,
+    )
+
+
+def _decode_header_value(value: str) -> str:
+    try:
+        return str(make_header(decode_header(value)))
+    except Exception:
+        return value
+
+
+def parse_header_block(header_bytes: bytes) -> Dict[str, str]:
+    headers: Dict[str, str] = {}
+    last_key = None
+    for line in header_bytes.decode("utf-8", errors="ignore").splitlines():
+        if not line.strip():
+            continue
+        if line[0] in " \t" and last_key:
+            headers[last_key] += " " + line.strip()
+            continue
+        if ":" in line:
+            key, value = line.split(":", 1)
+            last_key = key.strip().lower()
+            headers[last_key] = value.strip()
+    return {key: _decode_header_value(value) for key, value in headers.items()}
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="ignore")
+    return "" if value is None else str(value)
+
+
+def _params(value: Any) -> Dict[str, str]:
+    if not isinstance(value, list):
+        return {}
+    return {
+        _text(value[i]).lower(): _text(value[i + 1])
+        for i in range(0, len(value) - 1, 2)
+    }
+
+
+def find_html_part(structure: Any, part: str = "") -> Optional[Dict[str, Any]]:
+    if not isinstance(structure, list) or not structure:
+        return None
+
+    if isinstance(structure[0], list):
+        index = 0
+        for child in structure:
+            if not isinstance(child, list):
+                break
+            index += 1
+            found = find_html_part(child, f"{part}.{index}" if part else str(index))
+            if found:
+                return found
+        return None
+
+    if len(structure) < 7:
+        return None
+    if (_text(structure[0]).lower(), _text(structure[1]).lower()) != ("text", "html"):
+        return None
+
+    try:
+        size = int(structure[6])
+    except (TypeError, ValueError):
+        size = 0
+    return {
+        "part": part or "1",
+        "charset": _params(structure[2]).get("charset", ""),
+        "encoding": _text(structure[5]) or "7bit",
+        "size": size,
+    }
+
+
+def build_partial_message(
+    header_bytes: Optional[bytes],
+    body_bytes: bytes,
+    html_part: Dict[str, Any],
+    decoded: bool = False,
+) -> bytes:
+    content_type = "text/html"
+    if html_part.get("charset"):
+        content_type += f'; charset="{html_part["charset"]}"'
+    encoding = "8bit" if decoded else html_part.get("encoding") or "7bit"
+
+    headers = (header_bytes or b"").rstrip(b"\r\n")
+    if headers:
+        headers += b"\r\n"
+    mime_headers = (
+        "MIME-Version: 1.0\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Transfer-Encoding: {encoding}\r\n\r\n"
+    ).encode("ascii")
+    return headers + mime_headers + (body_bytes or b"")
@@ -0,0 +1,77 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+
+def order_key(order: Dict) -> str:
+    return str(order.get("number") or order.get("order_number") or "")
+
+
+class OrderCollection:
+    def __init__(self, orders: Optional[List[Dict]] = None):
+        # The backing list is shared with the caller so appends stay visible to
+        # code that still holds the plain list.
+        self._orders: List[Dict] = orders if orders is not None else []
+        self._by_number: Dict[str, List[Dict]] = {}
+        self._tracking: Dict[int, Tuple[List[str], Set[str]]] = {}
+        for order in self._orders:
+            self._index(order)
+
+    @classmethod
+    def wrap(
+        cls, orders: Union["OrderCollection", List[Dict], None]
+    ) -> "OrderCollection":
+        if isinstance(orders, OrderCollection):
+            return orders
+        return cls(orders if isinstance(orders, list) else list(orders or []))
+
+    def _index(self, order: Dict) -> None:
+        key = order_key(order)
+        if key:
+            self._by_number.setdefault(key, []).append(order)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self._orders)
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __getitem__(self, index):
+        return self._orders[index]
+
+    def __contains__(self, order_number: str) -> bool:
+        return order_number in self._by_number
+
+    def append(self, order: Dict) -> None:
+        self._orders.append(order)
+        self._index(order)
+
+    def extend(self, orders: Iterable[Dict]) -> None:
+        for order in orders:
+            self.append(order)
+
+    def find(self, order_number: str) -> Optional[Dict]:
+        matches = self._by_number.get(order_number)
+        return matches[0] if matches else None
+
+    def find_all(self, order_number: str) -> List[Dict]:
+        return self._by_number.get(order_number, [])
+
+    def merge_tracking(self, order: Dict, tracking_numbers: Iterable[str]) -> int:
+        tracking = order.get("tracking")
+        if not isinstance(tracking, list):
+            tracking = list(tracking or [])
+            order["tracking"] = tracking
+
+        cached = self._tracking.get(id(order))
+        if cached is None or cached[0] is not tracking:
+            tracking[:] = list(dict.fromkeys(tracking))
+            cached = (tracking, set(tracking))
+            self._tracking[id(order)] = cached
+        seen = cached[1]
+
+        added = 0
+        for number in tracking_numbers or []:
+            if number not in seen:
+                seen.add(number)
+                tracking.append(number)
+                added += 1
+        return added
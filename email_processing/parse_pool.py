@@ -0,0 +1,70 @@
+import atexit
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from .parsers.bb_parser import OrderParser
+from .parsers.costco_parser import CostcoParser
+from .processor import EmailProcessor
+
+logger = logging.getLogger(__name__)
+
+_worker_processor: Optional[EmailProcessor] = None
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _init_worker() -> None:
+    global _worker_processor
+    OrderParser._load_selectors()
+    CostcoParser._load_selectors()
+    _worker_processor = EmailProcessor()
+
+
+def parse_raw_message(parse_method: str, raw_message: bytes, parse_kwargs: Dict):
+    processor = _worker_processor
+    if processor is None:
+        _init_worker()
+        processor = _worker_processor
+    return getattr(processor, parse_method)(raw_message, **parse_kwargs)
+
+
+def default_worker_count() -> int:
+    return max(os.cpu_count() or 1, 1)
+
+
+def get_parse_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    workers = max_workers or default_worker_count()
+    with _pool_lock:
+        if _pool is not None and _pool_workers != workers:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+        if _pool is None:
+            logger.info("Starting parse pool with %s worker processes", workers)
+            _pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+            _pool_workers = workers
+        return _pool
+
+
+def reset_parse_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def shutdown_parse_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown_parse_pool)
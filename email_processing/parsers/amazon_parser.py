@@ -1,9 +1,11 @@
 import logging
 import re
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 
 from bs4 import BeautifulSoup
 
+from .parsed_email import ParsedEmail
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,7 +38,7 @@ class AmazonParser:
 
     @classmethod
     def extract_order_number(
-        cls, soup: BeautifulSoup, subject: str = None
+        cls, soup: Union[BeautifulSoup, ParsedEmail], subject: str = None
     ) -> Optional[str]:
         if subject:
             match = cls.ORDER_ID_PATTERN.search(subject)
@@ -44,7 +46,7 @@ class AmazonParser:
                 logger.debug(f"Extracted order number from subject: {match.group()}")
                 return match.group()
 
-        text_content = soup.get_text()
+        text_content = ParsedEmail.wrap(soup).text
         order_marker = text_content.find("Order #")
         if order_marker != -1:
             search_area = text_content[order_marker : order_marker + 50]
@@ -232,9 +234,11 @@ class AmazonParser:
         return tracking_numbers
 
     @classmethod
-    def extract_tracking_numbers_from_html(cls, soup: BeautifulSoup) -> List[str]:
+    def extract_tracking_numbers_from_html(
+        cls, soup: Union[BeautifulSoup, ParsedEmail]
+    ) -> List[str]:
         tracking_numbers = []
-        text_content = soup.get_text()
+        text_content = ParsedEmail.wrap(soup).text
 
         carrier_patterns = [
             r"(?:UPS|USPS|FedEx|DHL|OnTrac)\s*(?:tracking|#|number)?[:\s]*([A-Z0-9]{10,30})",
@@ -365,7 +369,9 @@ class AmazonParser:
         return f"${total:.2f}"
 
     @classmethod
-    def extract_products(cls, soup: BeautifulSoup) -> List[Dict]:
+    def extract_products(cls, soup: Union[BeautifulSoup, ParsedEmail]) -> List[Dict]:
+        parsed = ParsedEmail.wrap(soup)
+        soup = parsed.soup
         products = []
         seen_asins = set()
 
@@ -490,7 +496,7 @@ class AmazonParser:
             products = cls._extract_products_from_tables(soup)
 
         if not products:
-            products = cls._extract_products_text_fallback(soup)
+            products = cls._extract_products_text_fallback(parsed)
 
         return products
 
@@ -575,9 +581,13 @@ class AmazonParser:
         return products
 
     @classmethod
-    def _extract_products_text_fallback(cls, soup: BeautifulSoup) -> List[Dict]:
+    def _extract_products_text_fallback(
+        cls, soup: Union[BeautifulSoup, ParsedEmail]
+    ) -> List[Dict]:
+        parsed = ParsedEmail.wrap(soup)
+        soup = parsed.soup
         products = []
-        text_content = soup.get_text()
+        text_content = parsed.text
 
         for img in soup.find_all("img"):
             alt_text = img.get("alt", "").strip()
@@ -662,7 +672,11 @@ class AmazonParser:
         return products
 
     @classmethod
-    def extract_grand_total(cls, soup: BeautifulSoup) -> Optional[str]:
+    def extract_grand_total(
+        cls, soup: Union[BeautifulSoup, ParsedEmail]
+    ) -> Optional[str]:
+        parsed = ParsedEmail.wrap(soup)
+        soup = parsed.soup
         for td in soup.find_all("td"):
             text = cls._clean_text(td.get_text())
             if (
@@ -704,7 +718,7 @@ class AmazonParser:
                         logger.debug(f"Extracted total from table text: {total}")
                         return total
 
-        text_content = soup.get_text()
+        text_content = parsed.text
         total_patterns = [
             r"Grand Total:?\s*\$[\d,]+\.?\d*",
             r"Total:?\s*\$[\d,]+\.?\d*",
@@ -722,18 +736,21 @@ class AmazonParser:
         return None
 
     @classmethod
-    def parse_confirmation_email(cls, html_content: str, subject: str = None) -> Dict:
-        soup = BeautifulSoup(html_content, "lxml")
+    def parse_confirmation_email(
+        cls, html_content: Union[str, ParsedEmail], subject: str = None
+    ) -> Dict:
+        parsed = ParsedEmail.wrap(html_content)
+        soup = parsed.soup
 
-        order_number = cls.extract_order_number(soup, subject)
+        order_number = cls.extract_order_number(parsed, subject)
         if not order_number:
             logger.warning("Could not extract Amazon order number")
             return {}
 
         recipient_location = cls.extract_recipient_location(soup)
         state = cls.extract_state_from_location(recipient_location)
-        products = cls.extract_products(soup)
-        grand_total = cls.extract_grand_total(soup)
+        products = cls.extract_products(parsed)
+        grand_total = cls.extract_grand_total(parsed)
 
         logger.info(
             f"Amazon confirmation - Order: {order_number}, Products: {len(products)}, Total: {grand_total}"
@@ -756,10 +773,12 @@ class AmazonParser:
         }
 
     @classmethod
-    def parse_cancellation_email(cls, html_content: str, subject: str = None) -> Dict:
-        soup = BeautifulSoup(html_content, "lxml")
+    def parse_cancellation_email(
+        cls, html_content: Union[str, ParsedEmail], subject: str = None
+    ) -> Dict:
+        parsed = ParsedEmail.wrap(html_content)
 
-        order_number = cls.extract_order_number(soup, subject)
+        order_number = cls.extract_order_number(parsed, subject)
         if not order_number:
             logger.warning("Could not extract Amazon cancellation order number")
             return {}
@@ -767,10 +786,13 @@ class AmazonParser:
         return {"order_number": order_number, "status": "Cancelled"}
 
     @classmethod
-    def parse_shipped_email(cls, html_content: str, subject: str = None) -> Dict:
-        soup = BeautifulSoup(html_content, "lxml")
+    def parse_shipped_email(
+        cls, html_content: Union[str, ParsedEmail], subject: str = None
+    ) -> Dict:
+        parsed = ParsedEmail.wrap(html_content)
+        soup = parsed.soup
 
-        order_number = cls.extract_order_number(soup, subject)
+        order_number = cls.extract_order_number(parsed, subject)
         if not order_number:
             logger.warning("Could not extract Amazon shipped order number")
             return {}
@@ -778,8 +800,8 @@ class AmazonParser:
         recipient_location = cls.extract_recipient_location(soup)
         state = cls.extract_state_from_location(recipient_location)
         track_package_link = cls.extract_track_package_link(soup)
-        products = cls.extract_products(soup)
-        total = cls.extract_grand_total(soup)
+        products = cls.extract_products(parsed)
+        total = cls.extract_grand_total(parsed)
 
         tracking_with_links = cls.extract_all_track_package_links(soup)
 
@@ -789,7 +811,7 @@ class AmazonParser:
             if track_package_link:
                 tracking_numbers = cls.extract_tracking_from_link(track_package_link)
             if not tracking_numbers:
-                tracking_numbers = cls.extract_tracking_numbers_from_html(soup)
+                tracking_numbers = cls.extract_tracking_numbers_from_html(parsed)
 
         logger.debug(
             f"Shipped email - Order: {order_number}, Products: {len(products)}, Tracking: {tracking_numbers}"
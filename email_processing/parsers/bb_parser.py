@@ -1,15 +1,50 @@
 import json
 import logging
 import os
-from typing import Dict, List, Tuple
+import re
+from typing import Dict, List, Optional, Tuple, Union
 
 from bs4 import BeautifulSoup
+from lxml import etree
+
+from .compiled_selectors import SINGLE_STRING, CompiledSelector, compile_selectors
+from .parsed_email import ParsedEmail
 
 logger = logging.getLogger(__name__)
 
+ORDER_NUMBER_PATTERN = re.compile(r"BBY\d{2}-\d{9,15}")
+
+_PARENT_ROW = etree.XPath("ancestor::tr[1]")
+_PRODUCT_IMAGE = etree.XPath(".//img[contains(@alt, 'Product Image For:')]")
+_PRODUCT_IMAGE_FALLBACK = etree.XPath(
+    ".//img[contains(@src, 'bbystatic.com/image2/BestBuy_US/images/products/')]"
+)
+_NEXT_QTY_VALUE = etree.XPath(
+    f"(descendant::td | following::td)[{SINGLE_STRING}][. = 'Qty:'][1]"
+    "/following-sibling::td[1]"
+)
+_NEXT_MODEL_VALUE = etree.XPath(
+    f"(descendant::td | following::td)[{SINGLE_STRING}]"
+    "[contains(., 'Model') and contains(., '#')][1]/following-sibling::td[1]"
+)
+_DOLLAR_SPANS = etree.XPath(f".//span[{SINGLE_STRING}][contains(., '$')]")
+_TRACKING_TDS = etree.XPath(
+    f"//td[{SINGLE_STRING}][contains(translate(., 'TRACKING', 'tracking'), 'tracking')]"
+)
+_ALL_TDS = etree.XPath("//td")
+_SPANS = etree.XPath(".//span")
+_NEXT_ROW = etree.XPath("following-sibling::tr[1]")
+_ADDRESS_SPAN = etree.XPath(".//span[contains(@style, 'font-size: 16px')][1]")
+_TEXT_NODES = etree.XPath(".//text()", smart_strings=False)
+
+
+def _joined_text(element, separator: str) -> str:
+    return separator.join(_TEXT_NODES(element))
+
 
 class OrderParser:
     _config = None
+    _selectors = None
 
     @classmethod
     def _load_config(cls):
@@ -20,90 +55,26 @@ class OrderParser:
         return cls._config
 
     @classmethod
-    def _find_elements(cls, soup, selector_config):
-        config = selector_config
-        tag = config["tag"]
-
-        kwargs = {}
-        if "attributes" in config:
-            for attr, value in config["attributes"].items():
-                if attr == "style_contains":
-                    kwargs["style"] = lambda v, val=value: v and val in v
-                elif attr == "style_contains_all":
-                    kwargs["style"] = lambda v, val=value: (
-                        v and all(part in v for part in val)
-                    )
-                elif attr == "href_contains":
-                    kwargs["href"] = lambda v, val=value: v and val in v
-                else:
-                    kwargs[attr] = value
-
-        elements = soup.find_all(tag, **kwargs)
-
-        if "text_contains" in config:
-            text_filter = config["text_contains"]
-            elements = [elem for elem in elements if text_filter in elem.text]
-
-        if "text_min_length" in config:
-            min_length = config["text_min_length"]
-            elements = [
-                elem for elem in elements if len(elem.get_text().strip()) >= min_length
-            ]
-
-        return elements
-
-    @classmethod
-    def _find_element(cls, soup, selector_config):
-        config = selector_config
-        tag = config["tag"]
-
-        kwargs = {}
-        if "attributes" in config:
-            for attr, value in config["attributes"].items():
-                if attr == "style_contains":
-                    kwargs["style"] = lambda v, val=value: v and val in v
-                elif attr == "style_contains_all":
-                    kwargs["style"] = lambda v, val=value: (
-                        v and all(part in v for part in val)
-                    )
-                elif attr == "href_contains":
-                    kwargs["href"] = lambda v, val=value: v and val in v
-                else:
-                    kwargs[attr] = value
-
-        if "text_contains" in config or "text_min_length" in config:
-            elements = soup.find_all(tag, **kwargs)
-
-            if "text_contains" in config:
-                text_filter = config["text_contains"]
-                elements = [elem for elem in elements if text_filter in elem.text]
-
-            if "text_min_length" in config:
-                min_length = config["text_min_length"]
-                elements = [
-                    elem
-                    for elem in elements
-                    if len(elem.get_text().strip()) >= min_length
-                ]
-
-            return elements[0] if elements else None
-
-        return soup.find(tag, **kwargs)
+    def _load_selectors(cls):
+        if cls._selectors is None:
+            config = cls._load_config()
+            selectors = compile_selectors(config)
+            # Prices are matched on the span's own string, as bs4's string= did
+            selectors["product_parsing"]["price"] = CompiledSelector(
+                config["product_parsing"]["price"], string_match=True
+            )
+            cls._selectors = selectors
+        return cls._selectors
 
     @staticmethod
     def _extract_product_image(section) -> str:
-        parent_row = section.find_parent("tr")
-        if not parent_row:
+        parent_rows = _PARENT_ROW(section)
+        if not parent_rows:
             return ""
-        img = parent_row.find("img", alt=lambda a: a and "Product Image For:" in a)
-        if not img:
-            img = parent_row.find(
-                "img",
-                src=lambda s: (
-                    s and "bbystatic.com/image2/BestBuy_US/images/products/" in s
-                ),
-            )
-        src = (img.get("src") or "").strip() if img else ""
+        images = _PRODUCT_IMAGE(parent_rows[0]) or _PRODUCT_IMAGE_FALLBACK(
+            parent_rows[0]
+        )
+        src = (images[0].get("src") or "").strip() if images else ""
         if src:
             logger.debug("Extracted Best Buy product image: %s", src[:120])
         return src
@@ -118,63 +89,46 @@ class OrderParser:
 
     @staticmethod
     def parse_product_details(
-        html_content: str,
+        html_content: Union[str, ParsedEmail],
     ) -> Tuple[List[Dict[str, str]], str, List[Dict[str, str]]]:
-        config = OrderParser._load_config()
-        soup = BeautifulSoup(html_content, "lxml")
+        parsed = ParsedEmail.wrap(html_content)
         products = []
         xbox_items = []
 
-        product_config = config["product_parsing"]
+        product_selectors = OrderParser._load_selectors()["product_parsing"]
 
-        product_sections = OrderParser._find_elements(
-            soup, product_config["product_sections"]
-        )
+        product_sections = product_selectors["product_sections"].find_all(parsed)
 
         for section in product_sections:
-            title_tag = OrderParser._find_element(section, product_config["title"])
-            if not title_tag:
+            title_tag = product_selectors["title"].find(section)
+            if title_tag is None:
                 continue
 
-            title = title_tag.text.strip()
+            title = title_tag.text_content().strip()
             item_image = OrderParser._extract_product_image(section)
 
             if OrderParser._is_skipped_perk(title):
                 logger.debug("Skipping perk item: %s", title[:80])
                 continue
 
-            qty_tag = section.find_next("td", string="Qty:")
-            qty = qty_tag.find_next_sibling("td").text.strip() if qty_tag else "N/A"
+            qty_values = _NEXT_QTY_VALUE(section)
+            qty = qty_values[0].text_content().strip() if qty_values else "N/A"
 
-            model_tag = section.find_next(
-                "td", string=lambda t: t and "Model" in t and "#" in t
-            )
-            model_number = ""
-            if model_tag:
-                model_val_td = model_tag.find_next_sibling("td")
-                if model_val_td:
-                    model_number = model_val_td.text.strip()
-
-            dollar_spans = section.find_all(
-                "span", string=lambda text: text and "$" in text
+            model_values = _NEXT_MODEL_VALUE(section)
+            model_number = (
+                model_values[0].text_content().strip() if model_values else ""
             )
 
-            price_tag = section.find(
-                product_config["price"]["tag"],
-                string=lambda text: text and "$" in text,
-                style=lambda value: (
-                    value
-                    and product_config["price"]["attributes"]["style_contains"] in value
-                ),
-            )
+            price_tag = product_selectors["price"].find(section)
 
-            if not price_tag and dollar_spans:
-                for span in dollar_spans:
-                    if "$" in span.text and span.text.strip() not in ["$0.00", "$"]:
+            if price_tag is None:
+                for span in _DOLLAR_SPANS(section):
+                    span_text = span.text_content()
+                    if "$" in span_text and span_text.strip() not in ["$0.00", "$"]:
                         price_tag = span
                         break
 
-            price = price_tag.text.strip() if price_tag else "N/A"
+            price = price_tag.text_content().strip() if price_tag is not None else "N/A"
 
             if OrderParser._is_xbox_item(title):
                 xbox_items.append(
@@ -201,162 +155,100 @@ class OrderParser:
             if item_image:
                 logger.info("Scraped product image for: %s", title[:80])
 
-        total_td = OrderParser._find_element(soup, product_config["total"])
-        total_price = total_td.text.strip() if total_td else "N/A"
+        total_td = product_selectors["total"].find(parsed)
+        total_price = total_td.text_content().strip() if total_td is not None else "N/A"
 
         return products, total_price, xbox_items
 
     @staticmethod
-    def extract_order_number(soup: BeautifulSoup, email_type: str) -> str:
-        config = OrderParser._load_config()
-        order_config = config["order_number"]
+    def find_order_number(html_content: str) -> Optional[str]:
+        matches = set(ORDER_NUMBER_PATTERN.findall(html_content or ""))
+        if len(matches) == 1:
+            return matches.pop()
+        return None
+
+    @staticmethod
+    def extract_order_number(
+        soup: Union[BeautifulSoup, ParsedEmail], email_type: str, fast: bool = False
+    ) -> str:
+        parsed = ParsedEmail.wrap(soup)
+        if fast:
+            order_number = OrderParser.find_order_number(parsed.html)
+            if order_number:
+                return order_number
+
+        order_selectors = OrderParser._load_selectors()["order_number"]
 
         if email_type == "confirmation":
-            order_span = OrderParser._find_element(soup, order_config["confirmation"])
-            return order_span.text.strip() if order_span else None
+            order_span = order_selectors["confirmation"].find(parsed)
+            return order_span.text_content().strip() if order_span is not None else None
 
         if email_type == "cancellation":
-            cancelled_config = order_config["cancelled"]
-            order_tds = OrderParser._find_elements(soup, cancelled_config["container"])
-            for td in order_tds:
-                if cancelled_config["container"]["text_contains"] in td.text:
-                    order_span = td.find(
-                        cancelled_config["target"]["tag"],
-                        style=lambda value: (
-                            value
-                            and all(
-                                part in value
-                                for part in cancelled_config["target"]["attributes"][
-                                    "style_contains_all"
-                                ]
-                            )
-                        ),
-                    )
-                    if order_span:
-                        return order_span.text.strip()
-
-        order_span = OrderParser._find_element(soup, order_config["shipped_cancelled"])
-        if order_span:
-            text = order_span.text.strip()
-            replace_config = order_config["shipped_cancelled"]["text_replace"]
+            cancelled = order_selectors["cancelled"]
+            for td in cancelled["container"].find_all(parsed):
+                order_span = cancelled["target"].find(td)
+                if order_span is not None:
+                    return order_span.text_content().strip()
+
+        shipped_cancelled = order_selectors["shipped_cancelled"]
+        order_span = shipped_cancelled.find(parsed)
+        if order_span is not None:
+            text = order_span.text_content().strip()
+            replace_config = shipped_cancelled.config["text_replace"]
             return text.replace(replace_config["from"], replace_config["to"])
 
-        alt_config = order_config["alternative"]
-        order_tds = OrderParser._find_elements(soup, alt_config["container"])
-        for td in order_tds:
-            if alt_config["container"]["text_contains"] in td.text:
-                order_span = td.find(
-                    alt_config["target"]["tag"],
-                    style=lambda value: (
-                        value
-                        and all(
-                            part in value
-                            for part in alt_config["target"]["attributes"][
-                                "style_contains_all"
-                            ]
-                        )
-                    ),
-                )
-                if order_span:
-                    return order_span.text.strip()
+        alternative = order_selectors["alternative"]
+        for td in alternative["container"].find_all(parsed):
+            order_span = alternative["target"].find(td)
+            if order_span is not None:
+                return order_span.text_content().strip()
 
         # Fallback to regex for order number if HTML selectors fail
-        import re
-
-        html_content = str(soup)
-        match = re.search(r"BBY\d{2}-\d{9,15}", html_content)
+        match = ORDER_NUMBER_PATTERN.search(parsed.html)
         if match:
             return match.group(0)
 
         return None
 
     @staticmethod
-    def extract_tracking_numbers(soup: BeautifulSoup) -> List[str]:
-        config = OrderParser._load_config()
-        tracking_config = config["tracking_numbers"]
+    def extract_tracking_numbers(soup: Union[BeautifulSoup, ParsedEmail]) -> List[str]:
+        parsed = ParsedEmail.wrap(soup)
+        tracking_selectors = OrderParser._load_selectors()["tracking_numbers"]
         tracking_numbers = []
 
-        format1_config = tracking_config["format_1"]
-        tracking_spans = soup.find_all(
-            format1_config["container"]["tag"],
-            **format1_config["container"]["attributes"],
-        )
+        format1 = tracking_selectors["format_1"]
+        tracking_spans = format1["container"].find_all(parsed)
         print(f"     Format 1 - Found {len(tracking_spans)} potential tracking spans")
         for span in tracking_spans:
-            if format1_config["container"]["text_contains"] in span.text:
-                tracking_link = span.find(format1_config["target"]["tag"])
-                if tracking_link:
-                    tracking_num = tracking_link.text.strip()
-                    print(f"     ✓ Format 1 - Extracted: {tracking_num}")
-                    tracking_numbers.append(tracking_num)
-
-        format2_config = tracking_config["format_2"]
-        tracking_tds = OrderParser._find_elements(soup, format2_config["container"])
-        print(f"     Format 2 - Found {len(tracking_tds)} potential tracking TDs")
-        for td in tracking_tds:
-            if format2_config["container"]["text_contains"] in td.text:
-                print("     Format 2 - Text match found in TD")
-                tracking_span = td.find(
-                    format2_config["target"]["tag"],
-                    style=lambda value: (
-                        value
-                        and all(
-                            part in value
-                            for part in format2_config["target"]["attributes"][
-                                "style_contains_all"
-                            ]
-                        )
-                    ),
-                )
-                if tracking_span:
-                    tracking_num = tracking_span.text.strip()
-                    print(f"     ✓ Format 2 - Extracted: {tracking_num}")
-                    tracking_numbers.append(tracking_num)
-
-        format3_config = tracking_config["format_3"]
-        tracking_tds = OrderParser._find_elements(soup, format3_config["container"])
-        print(f"     Format 3 - Found {len(tracking_tds)} potential tracking TDs")
-        for td in tracking_tds:
-            if format3_config["container"]["text_contains"] in td.text:
-                print("     Format 3 - Text match found in TD")
-                tracking_span = td.find(
-                    format3_config["target"]["tag"],
-                    style=lambda value: (
-                        value
-                        and all(
-                            part in value
-                            for part in format3_config["target"]["attributes"][
-                                "style_contains_all"
-                            ]
-                        )
-                    ),
-                )
-                if tracking_span:
-                    tracking_num = tracking_span.text.strip()
-                    print(f"     ✓ Format 3 - Extracted: {tracking_num}")
+            tracking_link = format1["target"].find(span)
+            if tracking_link is not None:
+                tracking_num = tracking_link.text_content().strip()
+                print(f"     ✓ Format 1 - Extracted: {tracking_num}")
+                tracking_numbers.append(tracking_num)
+
+        for label in ("format_2", "format_3"):
+            selectors = tracking_selectors[label]
+            name = label.replace("format_", "Format ")
+            tracking_tds = selectors["container"].find_all(parsed)
+            print(f"     {name} - Found {len(tracking_tds)} potential tracking TDs")
+            for td in tracking_tds:
+                print(f"     {name} - Text match found in TD")
+                tracking_span = selectors["target"].find(td)
+                if tracking_span is not None:
+                    tracking_num = tracking_span.text_content().strip()
+                    print(f"     ✓ {name} - Extracted: {tracking_num}")
                     tracking_numbers.append(tracking_num)
 
         if not tracking_numbers:
-            all_tds_with_tracking = soup.find_all(
-                "td", string=lambda text: text and "tracking" in text.lower()
+            all_tds_with_tracking = (
+                _TRACKING_TDS(parsed.tree) if parsed.tree is not None else []
             )
             if all_tds_with_tracking:
                 print(
                     f"     ⚠ Found {len(all_tds_with_tracking)} TDs containing 'tracking' but couldn't extract numbers"
                 )
                 for td in all_tds_with_tracking[:3]:
-                    print(f"       Sample: {td.text.strip()[:100]}")
-
-        if not tracking_numbers:
-            all_tds_with_tracking = soup.find_all(
-                "td", string=lambda text: text and "tracking" in text.lower()
-            )
-            if all_tds_with_tracking:
-                print(
-                    f"     ⚠ Found {len(all_tds_with_tracking)} TDs containing 'tracking' but couldn't extract numbers"
-                )
-                for td in all_tds_with_tracking[:3]:
-                    print(f"       Sample: {td.text.strip()[:100]}")
+                    print(f"       Sample: {td.text_content().strip()[:100]}")
 
         return tracking_numbers
 
@@ -382,27 +274,31 @@ class OrderParser:
         return ""
 
     @staticmethod
-    def extract_shipping_address(soup: BeautifulSoup) -> str:
+    def extract_shipping_address(soup: Union[BeautifulSoup, ParsedEmail]) -> str:
+        tree = ParsedEmail.wrap(soup).tree
         logger.debug("Starting shipping address extraction")
-        shipping_tds = soup.find_all("td")
+        if tree is None:
+            logger.warning("No state/zip found in shipping address")
+            return ""
+        shipping_tds = [(td, td.text_content()) for td in _ALL_TDS(tree)]
         old_format_tds = [
-            td for td in shipping_tds if "Your order is shipping to:" in td.get_text()
+            td for td, text in shipping_tds if "Your order is shipping to:" in text
         ]
         logger.debug(
             f"Old format - Found {len(old_format_tds)} TDs with 'Your order is shipping to:'"
         )
 
         for td in old_format_tds:
-            spans = td.find_all("span")
+            spans = _SPANS(td)
             logger.debug(f"Old format - Found {len(spans)} spans in TD")
 
             for span in spans:
-                span_text = span.get_text().strip()
+                span_text = span.text_content().strip()
                 span_style = span.get("style", "")
 
                 is_address = (
                     len(span_text.split()) > 3
-                    and ("," in span_text or "<br>" in str(span))
+                    and ("," in span_text or span.find(".//br") is not None)
                     and any(char.isdigit() for char in span_text)
                     and not span_text.lower().startswith(
                         ("status", "ready", "product", "shipped", "delivered")
@@ -418,7 +314,7 @@ class OrderParser:
                 )
 
                 if is_address and has_style:
-                    address_text = span.get_text(separator="\n")
+                    address_text = _joined_text(span, "\n")
                     lines = [
                         line.strip()
                         for line in address_text.split("\n")
@@ -434,24 +330,21 @@ class OrderParser:
 
         new_format_tds = [
             td
-            for td in shipping_tds
-            if "Shipping to:" in td.get_text()
-            and "Your order is shipping to:" not in td.get_text()
+            for td, text in shipping_tds
+            if "Shipping to:" in text and "Your order is shipping to:" not in text
         ]
         logger.debug(
             f"New format - Found {len(new_format_tds)} TDs with 'Shipping to:'"
         )
 
         for td in new_format_tds:
-            parent = td.find_parent("tr")
+            parent = _PARENT_ROW(td)
             if parent:
-                next_row = parent.find_next_sibling("tr")
+                next_row = _NEXT_ROW(parent[0])
                 if next_row:
-                    address_span = next_row.find(
-                        "span", style=lambda v: v and "font-size: 16px" in v
-                    )
+                    address_span = _ADDRESS_SPAN(next_row[0])
                     if address_span:
-                        address_text = address_span.get_text(separator="\n").strip()
+                        address_text = _joined_text(address_span[0], "\n").strip()
                         logger.debug(f"New format - Address text: '{address_text}'")
                         location = OrderParser._location_line(address_text)
                         if location:
@@ -461,16 +354,15 @@ class OrderParser:
         return ""
 
     @staticmethod
-    def extract_order_details_link(soup: BeautifulSoup) -> str:
-        config = OrderParser._load_config()
-        if "details_link" not in config:
+    def extract_order_details_link(soup: Union[BeautifulSoup, ParsedEmail]) -> str:
+        selectors = OrderParser._load_selectors()
+        if "details_link" not in selectors:
             print("     ⚠ 'details_link' not found in config")
             return ""
 
-        details_link_config = config["details_link"]["confirmation"]
-        link_tag = OrderParser._find_element(soup, details_link_config)
+        link_tag = selectors["details_link"]["confirmation"].find(soup)
 
-        if link_tag:
+        if link_tag is not None:
             href = link_tag.get("href")
             if href:
                 print(f"     ✓ Extracted order details link: {href[:50]}...")
@@ -0,0 +1,107 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from lxml import etree
+
+from .parsed_email import ParsedEmail
+
+logger = logging.getLogger(__name__)
+
+# Mirrors BeautifulSoup's ``string=`` matching: the tag's text must be a single
+# string, either directly or through a chain of single-child tags.
+SINGLE_STRING = "count(node()) = 1 and not(descendant::*[count(node()) != 1])"
+
+
+def xpath_literal(value: str) -> str:
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    parts = ', "\'", '.join(f"'{part}'" for part in value.split("'"))
+    return f"concat({parts})"
+
+
+def _attribute_predicates(attributes: Dict[str, Any]) -> List[str]:
+    predicates = []
+    for attr, value in attributes.items():
+        if attr == "style_contains":
+            predicates.append(f"contains(@style, {xpath_literal(value)})")
+        elif attr == "style_contains_all":
+            predicates.extend(
+                f"contains(@style, {xpath_literal(part)})" for part in value
+            )
+        elif attr == "href_contains":
+            predicates.append(f"contains(@href, {xpath_literal(value)})")
+        elif attr == "class":
+            predicates.append(
+                "contains(concat(' ', normalize-space(@class), ' '), "
+                f"{xpath_literal(f' {value} ')})"
+            )
+        else:
+            predicates.append(f"@{attr} = {xpath_literal(value)}")
+    return predicates
+
+
+def resolve_root(root):
+    if isinstance(root, etree._Element):
+        return root
+    return ParsedEmail.wrap(root).tree
+
+
+class CompiledSelector:
+    def __init__(self, config: Dict[str, Any], string_match: bool = False):
+        self.config = config
+        self.min_length = config.get("text_min_length")
+
+        predicates = _attribute_predicates(config.get("attributes", {}))
+        if "text_contains" in config:
+            if string_match:
+                predicates.append(SINGLE_STRING)
+            predicates.append(f"contains(., {xpath_literal(config['text_contains'])})")
+        if "search_string" in config:
+            predicates.append(SINGLE_STRING)
+            predicates.append(f". = {xpath_literal(config['search_string'])}")
+
+        axis = (
+            "following-sibling::"
+            if config.get("method") == "find_next_sibling"
+            else "descendant::"
+        )
+        self.expression = axis + config.get("tag", "*")
+        self.expression += "".join(f"[{predicate}]" for predicate in predicates)
+        self._all = etree.XPath(self.expression)
+        self._first = etree.XPath(f"({self.expression})[1]")
+
+    def find_all(self, root) -> List[etree._Element]:
+        node = resolve_root(root)
+        if node is None:
+            return []
+        elements = self._all(node)
+        if self.min_length is not None:
+            elements = [
+                element
+                for element in elements
+                if len(element.text_content().strip()) >= self.min_length
+            ]
+        return elements
+
+    def find(self, root) -> Optional[etree._Element]:
+        if self.min_length is not None:
+            elements = self.find_all(root)
+            return elements[0] if elements else None
+        node = resolve_root(root)
+        if node is None:
+            return None
+        elements = self._first(node)
+        return elements[0] if elements else None
+
+    def __repr__(self) -> str:
+        return f"CompiledSelector({self.expression!r})"
+
+
+def compile_selectors(config):
+    if isinstance(config, dict):
+        if isinstance(config.get("tag"), str):
+            return CompiledSelector(config)
+        return {key: compile_selectors(value) for key, value in config.items()}
+    return config
@@ -2,15 +2,37 @@ import json
 import logging
 import os
 import re
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
 from bs4 import BeautifulSoup
+from lxml import etree
+
+from .compiled_selectors import compile_selectors
+from .parsed_email import ParsedEmail
 
 logger = logging.getLogger(__name__)
 
+_LOWER_HREF = (
+    "translate(@href, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+)
+_TRACKING_LINKS = etree.XPath(
+    f".//a[contains({_LOWER_HREF}, 'shipmenttracking.costco.com')]"
+)
+_COSTCO_LINKS = etree.XPath(f".//a[contains({_LOWER_HREF}, 'costco.com')]")
+
+UPS_TRACKING_PATTERN = re.compile(r"1Z[A-Z0-9]{16}", re.IGNORECASE)
+FEDEX_TRACKING_PATTERNS = [
+    re.compile(pattern)
+    for pattern in (r"\b\d{12}\b", r"\b\d{15}\b", r"\b\d{20}\b", r"\b\d{22}\b")
+]
+USPS_TRACKING_PATTERN = re.compile(r"94\d{20,22}")
+ONTRAC_TRACKING_PATTERN = re.compile(r"C\d{14}", re.IGNORECASE)
+LASERSHIP_TRACKING_PATTERN = re.compile(r"L[A-Z]\d{8}", re.IGNORECASE)
+
 
 class CostcoParser:
     _config = None
+    _selectors = None
 
     @classmethod
     def _load_config(cls):
@@ -21,83 +43,10 @@ class CostcoParser:
         return cls._config
 
     @classmethod
-    def _find_elements(cls, soup, selector_config):
-        config = selector_config
-        tag = config["tag"]
-
-        kwargs = {}
-        if "attributes" in config:
-            for attr, value in config["attributes"].items():
-                if attr == "style_contains":
-                    kwargs["style"] = lambda v, val=value: v and val in v
-                elif attr == "style_contains_all":
-                    kwargs["style"] = lambda v, val=value: (
-                        v and all(part in v for part in val)
-                    )
-                elif attr == "href_contains":
-                    kwargs["href"] = lambda v, val=value: v and val in v
-                elif attr == "class":
-                    kwargs["class_"] = value
-                elif attr == "id":
-                    kwargs["id"] = value
-                else:
-                    kwargs[attr] = value
-
-        elements = soup.find_all(tag, **kwargs)
-
-        if "text_contains" in config:
-            text_filter = config["text_contains"]
-            elements = [elem for elem in elements if text_filter in elem.text]
-
-        if "text_min_length" in config:
-            min_length = config["text_min_length"]
-            elements = [
-                elem for elem in elements if len(elem.get_text().strip()) >= min_length
-            ]
-
-        return elements
-
-    @classmethod
-    def _find_element(cls, soup, selector_config):
-        config = selector_config
-        tag = config["tag"]
-
-        kwargs = {}
-        if "attributes" in config:
-            for attr, value in config["attributes"].items():
-                if attr == "style_contains":
-                    kwargs["style"] = lambda v, val=value: v and val in v
-                elif attr == "style_contains_all":
-                    kwargs["style"] = lambda v, val=value: (
-                        v and all(part in v for part in val)
-                    )
-                elif attr == "href_contains":
-                    kwargs["href"] = lambda v, val=value: v and val in v
-                elif attr == "class":
-                    kwargs["class_"] = value
-                elif attr == "id":
-                    kwargs["id"] = value
-                else:
-                    kwargs[attr] = value
-
-        if "text_contains" in config or "text_min_length" in config:
-            elements = soup.find_all(tag, **kwargs)
-
-            if "text_contains" in config:
-                text_filter = config["text_contains"]
-                elements = [elem for elem in elements if text_filter in elem.text]
-
-            if "text_min_length" in config:
-                min_length = config["text_min_length"]
-                elements = [
-                    elem
-                    for elem in elements
-                    if len(elem.get_text().strip()) >= min_length
-                ]
-
-            return elements[0] if elements else None
-
-        return soup.find(tag, **kwargs)
+    def _load_selectors(cls):
+        if cls._selectors is None:
+            cls._selectors = compile_selectors(cls._load_config())
+        return cls._selectors
 
     @staticmethod
     def _clean_text(text: str) -> str:
@@ -161,7 +110,7 @@ class CostcoParser:
 
     @staticmethod
     def extract_order_number(
-        soup: BeautifulSoup, email_type: str, subject: str = None
+        soup: Union[BeautifulSoup, ParsedEmail], email_type: str, subject: str = None
     ) -> Optional[str]:
         if subject:
             order_num = CostcoParser.extract_order_number_from_subject(
@@ -170,45 +119,28 @@ class CostcoParser:
             if order_num:
                 return order_num
 
-        config = CostcoParser._load_config()
-        costco_config = config.get("costco_parsing", {})
-        order_config = costco_config.get("order_number", {})
-
-        if email_type == "confirmation":
-            selector = order_config.get("confirmation", {})
-            order_link = CostcoParser._find_element(soup, selector)
-            if order_link:
-                order_num = CostcoParser._clean_text(order_link.text)
-                if CostcoParser._is_valid_costco_order_number(order_num):
-                    logger.debug(f"Extracted order number from HTML: {order_num}")
-                    return order_num
-
-        elif email_type == "cancellation":
-            selector = order_config.get("cancellation", {})
-            order_link = CostcoParser._find_element(soup, selector)
-            if order_link:
-                order_num = CostcoParser._clean_text(order_link.text)
-                if CostcoParser._is_valid_costco_order_number(order_num):
-                    logger.debug(
-                        f"Extracted cancellation order number from HTML: {order_num}"
-                    )
-                    return order_num
+        tree = ParsedEmail.wrap(soup).tree
+        if tree is None:
+            return None
+        order_selectors = (
+            CostcoParser._load_selectors()
+            .get("costco_parsing", {})
+            .get("order_number", {})
+        )
 
-        elif email_type == "shipped":
-            selector = order_config.get("shipped", {})
-            order_link = CostcoParser._find_element(soup, selector)
-            if order_link:
-                order_num = CostcoParser._clean_text(order_link.text)
+        selector = order_selectors.get(email_type)
+        if selector is not None:
+            order_link = selector.find(tree)
+            if order_link is not None:
+                order_num = CostcoParser._clean_text(order_link.text_content())
                 if CostcoParser._is_valid_costco_order_number(order_num):
                     logger.debug(
-                        f"Extracted shipped order number from HTML: {order_num}"
+                        f"Extracted {email_type} order number from HTML: {order_num}"
                     )
                     return order_num
 
-            tracking_links = soup.find_all(
-                "a", href=lambda h: h and "shipmenttracking.costco.com" in h.lower()
-            )
-            for link in tracking_links:
+        if email_type == "shipped":
+            for link in _TRACKING_LINKS(tree):
                 href = link.get("href", "")
                 match = re.search(r"/odn/(\d{10})", href)
                 if match:
@@ -219,9 +151,8 @@ class CostcoParser:
                         )
                         return order_num
 
-        order_links = soup.find_all("a", href=lambda h: h and "costco.com" in h.lower())
-        for link in order_links:
-            text = CostcoParser._clean_text(link.text)
+        for link in _COSTCO_LINKS(tree):
+            text = CostcoParser._clean_text(link.text_content())
             if CostcoParser._is_valid_costco_order_number(text):
                 logger.debug(f"Extracted order number from link: {text}")
                 return text
@@ -229,7 +160,9 @@ class CostcoParser:
         return None
 
     @staticmethod
-    def extract_order_date(soup: BeautifulSoup) -> Optional[str]:
+    def extract_order_date(soup: Union[BeautifulSoup, ParsedEmail]) -> Optional[str]:
+        parsed = ParsedEmail.wrap(soup)
+        soup = parsed.soup
         tds = soup.find_all("td", class_="order-placed-text")
         for td in tds:
             if "Order Placed" in td.get_text():
@@ -263,7 +196,7 @@ class CostcoParser:
                     )
                     return date_match.group()
 
-        page_text = soup.get_text()
+        page_text = parsed.text
         date_match = re.search(
             r"Order Placed\s*[:\s]*\s*(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},\s+\d{4}",
             page_text,
@@ -283,8 +216,10 @@ class CostcoParser:
         return None
 
     @staticmethod
-    def extract_cancellation_date(soup: BeautifulSoup) -> Optional[str]:
-        tds = soup.find_all("td")
+    def extract_cancellation_date(
+        soup: Union[BeautifulSoup, ParsedEmail],
+    ) -> Optional[str]:
+        tds = ParsedEmail.wrap(soup).soup.find_all("td")
         for td in tds:
             if "Cancellation Date" in td.get_text():
                 next_td = td.find_next("td")
@@ -297,8 +232,10 @@ class CostcoParser:
         return None
 
     @staticmethod
-    def extract_membership_number(soup: BeautifulSoup) -> Optional[str]:
-        page_text = soup.get_text()
+    def extract_membership_number(
+        soup: Union[BeautifulSoup, ParsedEmail],
+    ) -> Optional[str]:
+        page_text = ParsedEmail.wrap(soup).text
         match = re.search(r"\d{11,12}", page_text)
         if match:
             membership = match.group(0)
@@ -310,7 +247,10 @@ class CostcoParser:
         return "N/A"
 
     @staticmethod
-    def extract_shipping_address(soup: BeautifulSoup) -> Dict[str, str]:
+    def extract_shipping_address(
+        soup: Union[BeautifulSoup, ParsedEmail],
+    ) -> Dict[str, str]:
+        soup = ParsedEmail.wrap(soup).soup
         address = {
             "name": "",
             "address1": "",
@@ -411,8 +351,10 @@ class CostcoParser:
 
     @staticmethod
     def extract_tracking_numbers(
-        soup: BeautifulSoup, html_content: str = None
+        soup: Union[BeautifulSoup, ParsedEmail], html_content: str = None
     ) -> List[str]:
+        parsed = ParsedEmail.wrap(soup)
+        soup = parsed.soup
         tracking_numbers = []
 
         carrier_line_pattern = re.compile(
@@ -494,7 +436,7 @@ class CostcoParser:
                             )
 
         if not tracking_numbers:
-            page_text = soup.get_text()
+            page_text = parsed.text
             ups_matches = re.findall(r"1Z[A-Za-z0-9]{16}", page_text)
             for match in ups_matches:
                 match_upper = match.upper()
@@ -529,9 +471,7 @@ class CostcoParser:
     def _extract_tracking_regex_fallback(html_content: str) -> List[str]:
         tracking_numbers = []
 
-        ups_pattern = r"1Z[A-Z0-9]{16}"
-        ups_matches = re.findall(ups_pattern, html_content, re.IGNORECASE)
-        for match in ups_matches:
+        for match in UPS_TRACKING_PATTERN.findall(html_content):
             match_upper = match.upper()
             if (
                 CostcoParser._is_valid_tracking(match_upper)
@@ -540,10 +480,8 @@ class CostcoParser:
                 tracking_numbers.append(match_upper)
                 logger.info(f"Regex fallback - UPS tracking: {match_upper}")
 
-        fedex_patterns = [r"\b\d{12}\b", r"\b\d{15}\b", r"\b\d{20}\b", r"\b\d{22}\b"]
-        for pattern in fedex_patterns:
-            fedex_matches = re.findall(pattern, html_content)
-            for match in fedex_matches:
+        for pattern in FEDEX_TRACKING_PATTERNS:
+            for match in pattern.findall(html_content):
                 if (
                     CostcoParser._is_valid_tracking(match)
                     and match not in tracking_numbers
@@ -551,16 +489,12 @@ class CostcoParser:
                     tracking_numbers.append(match)
                     logger.info(f"Regex fallback - FedEx tracking: {match}")
 
-        usps_pattern = r"94\d{20,22}"
-        usps_matches = re.findall(usps_pattern, html_content)
-        for match in usps_matches:
+        for match in USPS_TRACKING_PATTERN.findall(html_content):
             if CostcoParser._is_valid_tracking(match) and match not in tracking_numbers:
                 tracking_numbers.append(match)
                 logger.info(f"Regex fallback - USPS tracking: {match}")
 
-        ontrac_pattern = r"C\d{14}"
-        ontrac_matches = re.findall(ontrac_pattern, html_content, re.IGNORECASE)
-        for match in ontrac_matches:
+        for match in ONTRAC_TRACKING_PATTERN.findall(html_content):
             match_upper = match.upper()
             if (
                 CostcoParser._is_valid_tracking(match_upper)
@@ -569,9 +503,7 @@ class CostcoParser:
                 tracking_numbers.append(match_upper)
                 logger.info(f"Regex fallback - OnTrac tracking: {match_upper}")
 
-        lasership_pattern = r"L[A-Z]\d{8}"
-        lasership_matches = re.findall(lasership_pattern, html_content, re.IGNORECASE)
-        for match in lasership_matches:
+        for match in LASERSHIP_TRACKING_PATTERN.findall(html_content):
             match_upper = match.upper()
             if (
                 CostcoParser._is_valid_tracking(match_upper)
@@ -627,8 +559,11 @@ class CostcoParser:
         return ""
 
     @staticmethod
-    def parse_product_details(html_content: str) -> Tuple[List[Dict[str, str]], str]:
-        soup = BeautifulSoup(html_content, "lxml")
+    def parse_product_details(
+        html_content: Union[str, ParsedEmail],
+    ) -> Tuple[List[Dict[str, str]], str]:
+        parsed = ParsedEmail.wrap(html_content)
+        soup = parsed.soup
         products = []
 
         item_sections = soup.find_all("div", class_="item-desc-column")
@@ -687,13 +622,14 @@ class CostcoParser:
                 products.append(product)
                 logger.debug(f"Extracted product: {product}")
 
-        total_price = CostcoParser._extract_total_price(soup)
+        total_price = CostcoParser._extract_total_price(parsed)
 
         return products, total_price
 
     @staticmethod
-    def _extract_total_price(soup: BeautifulSoup) -> str:
-        h2_tags = soup.find_all("h2")
+    def _extract_total_price(soup: Union[BeautifulSoup, ParsedEmail]) -> str:
+        parsed = ParsedEmail.wrap(soup)
+        h2_tags = parsed.soup.find_all("h2")
         for h2 in h2_tags:
             h2_text = h2.get_text().strip()
             if h2_text == "Total" or (
@@ -716,7 +652,7 @@ class CostcoParser:
                         if price_match:
                             return CostcoParser._normalize_price(price_match.group())
 
-        page_text = soup.get_text()
+        page_text = parsed.text
         total_match = re.search(r"Total[:\s]*\$\s*[\d,]+\.?\d*", page_text)
         if total_match:
             price_match = re.search(r"\$\s*[\d,]+\.?\d*", total_match.group())
@@ -726,10 +662,12 @@ class CostcoParser:
         return "N/A"
 
     @staticmethod
-    def extract_price_summary(soup: BeautifulSoup) -> Dict[str, str]:
+    def extract_price_summary(
+        soup: Union[BeautifulSoup, ParsedEmail],
+    ) -> Dict[str, str]:
         summary = {"subtotal": "N/A", "shipping": "N/A", "tax": "N/A", "total": "N/A"}
 
-        h2_tags = soup.find_all(["h2", "h3"])
+        h2_tags = ParsedEmail.wrap(soup).soup.find_all(["h2", "h3"])
         for tag in h2_tags:
             text = tag.get_text()
             parent_tr = tag.find_parent("tr")
@@ -0,0 +1,104 @@
+from typing import List, Optional, Union
+
+import lxml.html
+from bs4 import BeautifulSoup
+from lxml import etree
+
+# Same strings BeautifulSoup's ``.strings`` yields: text and tails in document
+# order, without comments or script/style bodies.
+_VISIBLE_STRINGS = etree.XPath(
+    "//text()[not(parent::script or parent::style)]", smart_strings=False
+)
+
+
+class ParsedEmail:
+    def __init__(
+        self, html: Optional[str] = None, soup: Optional[BeautifulSoup] = None
+    ):
+        self._html = html
+        self._soup = soup
+        self._tree = None
+        self._tree_built = False
+        self._strings: Optional[List[str]] = None
+        self._text: Optional[str] = None
+        self._spaced_text: Optional[str] = None
+        self._text_lower: Optional[str] = None
+        self._html_lower: Optional[str] = None
+
+    @classmethod
+    def wrap(
+        cls, value: Union["ParsedEmail", BeautifulSoup, str, None]
+    ) -> "ParsedEmail":
+        if isinstance(value, ParsedEmail):
+            return value
+        if isinstance(value, BeautifulSoup):
+            return cls(soup=value)
+        return cls(html=str(value or ""))
+
+    @property
+    def html(self) -> str:
+        if self._html is None:
+            self._html = str(self._soup) if self._soup is not None else ""
+        return self._html
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.html, "lxml")
+        return self._soup
+
+    @staticmethod
+    def _parse_tree(html: str) -> etree._Element:
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:
+            # lxml refuses str input that carries an XML encoding declaration
+            return lxml.html.document_fromstring(html.encode("utf-8"))
+
+    @property
+    def tree(self) -> Optional[etree._Element]:
+        if not self._tree_built:
+            self._tree_built = True
+            html = self.html
+            if html.strip():
+                try:
+                    self._tree = self._parse_tree(html)
+                except etree.ParserError:
+                    self._tree = None
+        return self._tree
+
+    @property
+    def strings(self) -> List[str]:
+        if self._strings is None:
+            tree = self.tree
+            if tree is not None:
+                self._strings = _VISIBLE_STRINGS(tree)
+            elif self.html.strip():
+                self._strings = list(self.soup.strings)
+            else:
+                self._strings = []
+        return self._strings
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "".join(self.strings)
+        return self._text
+
+    @property
+    def spaced_text(self) -> str:
+        if self._spaced_text is None:
+            self._spaced_text = " ".join(self.strings)
+        return self._spaced_text
+
+    @property
+    def text_lower(self) -> str:
+        if self._text_lower is None:
+            self._text_lower = self.text.lower()
+        return self._text_lower
+
+    @property
+    def html_lower(self) -> str:
+        if self._html_lower is None:
+            self._html_lower = self.html.lower()
+        return self._html_lower
@@ -2,13 +2,18 @@ import json
 import logging
 import os
 import re
-from typing import Dict, Optional
+from typing import Dict, Optional, Union
 
-from bs4 import BeautifulSoup
+from .compiled_selectors import compile_selectors
+from .parsed_email import ParsedEmail
 
 logger = logging.getLogger(__name__)
 
 CODE_PATTERN = re.compile(r"^[A-Z0-9]{5}(?:-[A-Z0-9]{5}){4}$", re.IGNORECASE)
+CODE_SEARCH_PATTERN = re.compile(
+    r"(?<![A-Z0-9-])[A-Z0-9]{5}(?:-[A-Z0-9]{5}){4}(?![A-Z0-9-])", re.IGNORECASE
+)
+CODE_MARKER = "Here is your code:"
 XBOX_KEYWORDS = ("xbox", "game pass")
 REJECT_KEYWORDS = ("norton",)
 
@@ -18,32 +23,10 @@ class XboxParser:
         config_path = os.path.join(os.path.dirname(__file__), "html_selectors.json")
         with open(config_path, "r") as f:
             self.selectors = json.load(f)["xbox_parsing"]
+        self.compiled = compile_selectors(self.selectors)
 
-    def _find_element_by_selector(self, soup: BeautifulSoup, selector_config: dict):
-        tag = selector_config.get("tag")
-        attributes = selector_config.get("attributes", {})
-        text_contains = selector_config.get("text_contains")
-
-        elements = soup.find_all(tag)
-
-        for element in elements:
-            if text_contains and text_contains not in element.get_text():
-                continue
-
-            style = element.get("style", "")
-            if "style_contains_all" in attributes:
-                if not all(attr in style for attr in attributes["style_contains_all"]):
-                    continue
-            elif "style_contains" in attributes:
-                if attributes["style_contains"] not in style:
-                    continue
-
-            return element
-
-        return None
-
-    def _is_xbox_email(self, html_content: str) -> bool:
-        text = html_content.lower()
+    def _is_xbox_email(self, html_content: Union[str, ParsedEmail]) -> bool:
+        text = ParsedEmail.wrap(html_content).html_lower
         if any(keyword in text for keyword in REJECT_KEYWORDS):
             logger.info("Skipping non-Xbox perk email (reject keyword matched)")
             return False
@@ -64,28 +47,49 @@ class XboxParser:
             return None
         return normalized
 
-    def extract_xbox_code(self, html_content: str) -> Optional[Dict[str, str]]:
-        if not html_content or not self._is_xbox_email(html_content):
+    def find_xbox_code(self, html_content: str) -> Optional[str]:
+        marker = html_content.find(CODE_MARKER)
+        if marker == -1:
+            return None
+        codes = {
+            code
+            for code in CODE_SEARCH_PATTERN.findall(html_content, marker)
+            if code.upper().endswith("Z")
+        }
+        if len(codes) != 1:
             return None
+        return self._normalize_code(codes.pop())
 
-        soup = BeautifulSoup(html_content, "lxml")
+    def extract_xbox_code(
+        self, html_content: Union[str, ParsedEmail], details: bool = True
+    ) -> Optional[Dict[str, str]]:
+        parsed = ParsedEmail.wrap(html_content)
+        if not parsed.html or not self._is_xbox_email(parsed):
+            return None
 
-        title_element = self._find_element_by_selector(soup, self.selectors["title"])
-        title = title_element.get_text().strip() if title_element else None
+        if not details:
+            code = self.find_xbox_code(parsed.html)
+            if code:
+                logger.info("Extracted Xbox code: %s", code)
+                return {"code": code}
 
-        code_container = self._find_element_by_selector(
-            soup, self.selectors["code_extraction"]["container"]
+        title_element = self.compiled["title"].find(parsed)
+        title = (
+            title_element.text_content().strip() if title_element is not None else None
         )
-        if not code_container:
+
+        code_extraction = self.compiled["code_extraction"]
+        code_container = code_extraction["container"].find(parsed)
+        if code_container is None:
             logger.info("Xbox code container not found")
             return None
 
-        code_element = code_container.find_next_sibling("strong")
-        if not code_element:
+        code_element = code_extraction["target"].find(code_container)
+        if code_element is None:
             logger.info("Xbox code element not found after container")
             return None
 
-        code = self._normalize_code(code_element.get_text())
+        code = self._normalize_code(code_element.text_content())
         if not code:
             return None
 
@@ -0,0 +1,188 @@
+import logging
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config.settings import BACKFILL_SETTINGS, PARSE_SETTINGS
+
+from .backfill import ShardedBackfill
+from .parse_pool import (
+    default_worker_count,
+    get_parse_pool,
+    parse_raw_message,
+    reset_parse_pool,
+)
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class EmailPipeline:
+    def __init__(
+        self,
+        connector,
+        processor,
+        max_workers: Optional[int] = None,
+        queue_depth=None,
+        backend: Optional[str] = None,
+    ):
+        self.connector = connector
+        self.processor = processor
+        self.backend = backend or PARSE_SETTINGS.get("backend", "thread")
+        self.max_workers = max_workers or PARSE_SETTINGS.get("max_workers")
+        self.queue_depth = queue_depth or max(connector.batch_size * 2, 50)
+
+    def _worker_count(self) -> int:
+        if self.max_workers:
+            return self.max_workers
+        return default_worker_count() if self.backend == "process" else 4
+
+    def _fetch_source(self, message_ids: List[bytes], use_uid: bool):
+        if (
+            use_uid
+            and BACKFILL_SETTINGS["enabled"]
+            and len(message_ids) >= BACKFILL_SETTINGS["min_messages"]
+        ):
+            backfill = ShardedBackfill(self.connector)
+            if backfill.connections > 1:
+                return backfill
+        return self.connector
+
+    def _produce(
+        self,
+        source,
+        message_ids: List[bytes],
+        use_uid: bool,
+        raw_queue: queue.Queue,
+        stop: threading.Event,
+    ) -> None:
+        def _put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    raw_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            for batch in source.iter_fetch_batches(message_ids, use_uid=use_uid):
+                for email_data in batch:
+                    if email_data and not _put(email_data):
+                        return
+        except Exception as e:
+            print(f"Error fetching emails: {e}")
+            logger.exception("Pipeline producer failed")
+        finally:
+            _put(_DONE)
+
+    def _create_executor(self):
+        if self.backend == "process":
+            try:
+                return get_parse_pool(self._worker_count()), False
+            except Exception as e:
+                print(f"⚠ Process parsing unavailable ({e}); using threads instead")
+                self.backend = "thread"
+        return ThreadPoolExecutor(max_workers=self._worker_count()), True
+
+    def _fallback_to_threads(self, executor, owned: bool):
+        if self.backend != "process":
+            return executor, owned
+        print("⚠ Parse worker pool failed; falling back to thread parsing")
+        reset_parse_pool()
+        self.backend = "thread"
+        return self._create_executor()
+
+    def _submit(self, executor, parse_method: str, email_data, parse_kwargs: Dict):
+        if self.backend == "process":
+            raw_message = email_data[1] if isinstance(email_data, tuple) else email_data
+            return executor.submit(
+                parse_raw_message, parse_method, raw_message, parse_kwargs
+            )
+        parse = getattr(self.processor, parse_method)
+        return executor.submit(parse, email_data, **parse_kwargs)
+
+    def run(
+        self,
+        message_ids: List[bytes],
+        parse_method: str,
+        use_uid: bool = True,
+        **parse_kwargs,
+    ) -> Iterator[Tuple[int, Any, Dict]]:
+        raw_queue: queue.Queue = queue.Queue(maxsize=self.queue_depth)
+        stop = threading.Event()
+        source = self._fetch_source(message_ids, use_uid)
+        record_done = getattr(source, "record_done", None)
+        producer = threading.Thread(
+            target=self._produce,
+            args=(source, message_ids, use_uid, raw_queue, stop),
+            daemon=True,
+        )
+        producer.start()
+
+        executor, owned = self._create_executor()
+        max_in_flight = self._worker_count() * 2
+        in_flight = {}
+        next_idx = 0
+        exhausted = False
+
+        try:
+            while not exhausted or in_flight:
+                while not exhausted and len(in_flight) < max_in_flight:
+                    try:
+                        email_data = raw_queue.get(timeout=0.05 if in_flight else None)
+                    except queue.Empty:
+                        break
+                    if email_data is _DONE:
+                        exhausted = True
+                        break
+                    try:
+                        future = self._submit(
+                            executor, parse_method, email_data, parse_kwargs
+                        )
+                    except BrokenProcessPool:
+                        executor, owned = self._fallback_to_threads(executor, owned)
+                        future = self._submit(
+                            executor, parse_method, email_data, parse_kwargs
+                        )
+                    in_flight[future] = (next_idx, email_data)
+                    next_idx += 1
+
+                if not in_flight:
+                    continue
+
+                done, _ = wait(
+                    list(in_flight), timeout=0.05, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    idx, email_data = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        executor, owned = self._fallback_to_threads(executor, owned)
+                        result = getattr(self.processor, parse_method)(
+                            email_data, **parse_kwargs
+                        )
+                    except Exception as e:
+                        print(f"Error processing email: {e}")
+                        result = {}
+                    yield idx, email_data, result or {}
+                    if record_done:
+                        record_done(email_data)
+        finally:
+            stop.set()
+            while True:
+                try:
+                    raw_queue.get_nowait()
+                except queue.Empty:
+                    break
+            producer.join(timeout=5)
+            for future in in_flight:
+                future.cancel()
+            if owned:
+                executor.shutdown(wait=True, cancel_futures=True)
+            if record_done:
+                source.save()
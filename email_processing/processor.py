@@ -4,13 +4,14 @@ import logging
 import re
 from datetime import datetime
 from email.header import decode_header
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple, Union
 
 from bs4 import BeautifulSoup
 
 from .parsers.amazon_parser import AmazonParser
 from .parsers.bb_parser import OrderParser
 from .parsers.costco_parser import CostcoParser
+from .parsers.parsed_email import ParsedEmail
 from .parsers.xbox_parser import XboxParser
 
 logger = logging.getLogger(__name__)
@@ -90,21 +91,17 @@ def _location_from_text(value: str) -> dict:
 
 
 def _fallback_bestbuy_fulfillment(
-    html_content: str, soup: BeautifulSoup, order_parser: OrderParser
+    parsed: ParsedEmail, order_parser: OrderParser
 ) -> Dict[str, str]:
     details: Dict[str, str] = {}
 
     try:
-        address_info = order_parser.extract_shipping_address(soup)
+        address_info = order_parser.extract_shipping_address(parsed)
         details.update(_location_from_text(address_info))
     except Exception as exc:
         logger.debug("Best Buy fallback address extraction failed: %s", exc)
 
-    text = _normalize_text(
-        soup.get_text(" ")
-        if soup is not None
-        else BeautifulSoup(html_content or "", "html.parser").get_text(" ")
-    )
+    text = _normalize_text(parsed.spaced_text)
     if not (details.get("state") or details.get("zip")):
         details.update(_location_from_text(text))
 
@@ -118,7 +115,7 @@ def _fallback_bestbuy_fulfillment(
 
 
 def _extract_bestbuy_fulfillment(
-    html_content: str, soup: BeautifulSoup, order_parser: OrderParser
+    parsed: ParsedEmail, order_parser: OrderParser
 ) -> Dict[str, str]:
     try:
         bestbuy_parser = importlib.import_module("services.bestbuy_email_parser")
@@ -126,11 +123,12 @@ def _extract_bestbuy_fulfillment(
             bestbuy_parser, "extract_bestbuy_confirmation_fulfillment", None
         )
         if callable(extractor):
-            return extractor(html_content, soup) or {}
+            # The external helper's API takes a soup; the local path stays on lxml.
+            return extractor(parsed.html, parsed.soup) or {}
 
         parser = getattr(bestbuy_parser, "parse_bestbuy_fulfillment_details", None)
         if callable(parser):
-            return parser(html_content) or {}
+            return parser(parsed.html) or {}
 
         logger.warning(
             "Best Buy fulfilment helper is not available; using local fallback"
@@ -140,7 +138,7 @@ def _extract_bestbuy_fulfillment(
             "Best Buy fulfilment helper import failed; using local fallback: %s", exc
         )
 
-    return _fallback_bestbuy_fulfillment(html_content, soup, order_parser)
+    return _fallback_bestbuy_fulfillment(parsed, order_parser)
 
 
 class EmailProcessor:
@@ -219,11 +217,11 @@ class EmailProcessor:
 
         return email_address, email_date, html_content
 
-    def _bestbuy_catalog_fields(self, html_content: str, soup: BeautifulSoup) -> Dict:
+    def _bestbuy_catalog_fields(self, parsed: ParsedEmail) -> Dict:
         products, total_price, xbox_items = self.order_parser.parse_product_details(
-            html_content
+            parsed
         )
-        order_details_link = self.order_parser.extract_order_details_link(soup)
+        order_details_link = self.order_parser.extract_order_details_link(parsed)
         item_image = next(
             (p.get("item_image") for p in products if p.get("item_image")),
             "",
@@ -233,9 +231,7 @@ class EmailProcessor:
                 (p.get("item_image") for p in xbox_items if p.get("item_image")),
                 "",
             )
-        fulfillment = _extract_bestbuy_fulfillment(
-            html_content, soup, self.order_parser
-        )
+        fulfillment = _extract_bestbuy_fulfillment(parsed, self.order_parser)
         return {
             "products": products,
             "xbox_items": xbox_items,
@@ -259,16 +255,18 @@ class EmailProcessor:
                 print("Warning: No HTML content found in email")
                 return {}
 
-            soup = BeautifulSoup(html_content, "lxml")
-            order_number = self.order_parser.extract_order_number(soup, "confirmation")
+            parsed = ParsedEmail(html_content)
+            order_number = self.order_parser.extract_order_number(
+                parsed, "confirmation"
+            )
             if not order_number:
                 print("Warning: Could not extract order number")
                 return {}
 
             products, total_price, xbox_items = self.order_parser.parse_product_details(
-                html_content
+                parsed
             )
-            order_details_link = self.order_parser.extract_order_details_link(soup)
+            order_details_link = self.order_parser.extract_order_details_link(parsed)
             item_image = next(
                 (p.get("item_image") for p in products if p.get("item_image")), ""
             )
@@ -283,9 +281,7 @@ class EmailProcessor:
                     len(xbox_items),
                 )
 
-            fulfillment = _extract_bestbuy_fulfillment(
-                html_content, soup, self.order_parser
-            )
+            fulfillment = _extract_bestbuy_fulfillment(parsed, self.order_parser)
             if fulfillment.get("state") or fulfillment.get("zip"):
                 logger.info(
                     "Best Buy confirmation %s: state=%s zip=%s",
@@ -328,7 +324,9 @@ class EmailProcessor:
             print(f"Error processing confirmation email: {str(e)}")
             return {}
 
-    def process_cancellation_email(self, email_data: tuple) -> Dict[str, Any]:
+    def process_cancellation_email(
+        self, email_data: tuple, details: bool = True
+    ) -> Dict[str, Any]:
         try:
             subject = self._extract_subject(email_data)
             email_address, email_date, html_content = self._parse_email_metadata(
@@ -337,14 +335,25 @@ class EmailProcessor:
             if not html_content:
                 return {}
 
-            soup = BeautifulSoup(html_content, "lxml")
-            order_number = self.order_parser.extract_order_number(soup, "cancelled")
+            parsed = ParsedEmail(html_content)
+            order_number = self.order_parser.extract_order_number(
+                parsed, "cancelled", fast=not details
+            )
             cancellation_type = (
                 "payment_declined"
-                if self._is_bestbuy_payment_update(subject, html_content)
+                if self._is_bestbuy_payment_update(subject, parsed)
                 else "cancelled"
             )
-            catalog = self._bestbuy_catalog_fields(html_content, soup)
+            if not details:
+                return {
+                    "date": email_date,
+                    "order_number": order_number,
+                    "cancellation_type": cancellation_type,
+                    "subject": subject,
+                    "email_address": email_address,
+                }
+
+            catalog = self._bestbuy_catalog_fields(parsed)
             if catalog.get("products"):
                 logger.info(
                     "Best Buy cancellation %s: scraped %s product(s)",
@@ -369,8 +378,10 @@ class EmailProcessor:
             print(f"Error processing cancellation email: {str(e)}")
             return {}
 
-    def _is_bestbuy_payment_update(self, subject: str, html_content: str = "") -> bool:
-        text = f"{subject or ''} {html_content or ''}".lower()
+    def _is_bestbuy_payment_update(
+        self, subject: str, html_content: Union[str, ParsedEmail] = ""
+    ) -> bool:
+        text = f"{(subject or '').lower()} {ParsedEmail.wrap(html_content).html_lower}"
         return (
             "update your payment information" in text
             or "payment information needs to be updated" in text
@@ -386,16 +397,16 @@ class EmailProcessor:
             if not html_content:
                 return {}
 
-            soup = BeautifulSoup(html_content, "lxml")
-            order_number = self.order_parser.extract_order_number(soup, "shipped")
+            parsed = ParsedEmail(html_content)
+            order_number = self.order_parser.extract_order_number(parsed, "shipped")
             if not order_number:
                 return {}
 
-            tracking_numbers = self.order_parser.extract_tracking_numbers(soup)
-            catalog = self._bestbuy_catalog_fields(html_content, soup)
+            tracking_numbers = self.order_parser.extract_tracking_numbers(parsed)
+            catalog = self._bestbuy_catalog_fields(parsed)
             address_info = catalog.get(
                 "zip_and_state"
-            ) or self.order_parser.extract_shipping_address(soup)
+            ) or self.order_parser.extract_shipping_address(parsed)
             if (
                 catalog.get("state")
                 or catalog.get("zip")
@@ -559,7 +570,9 @@ class EmailProcessor:
             print(f"Error processing price match credit email: {str(e)}")
             return {}
 
-    def process_xbox_email(self, email_data: tuple) -> Dict[str, Any]:
+    def process_xbox_email(
+        self, email_data: tuple, details: bool = True
+    ) -> Dict[str, Any]:
         try:
             email_address, email_date, html_content = self._parse_email_metadata(
                 email_data
@@ -567,7 +580,9 @@ class EmailProcessor:
             if not html_content:
                 return {}
 
-            result = self.xbox_parser.extract_xbox_code(html_content)
+            result = self.xbox_parser.extract_xbox_code(
+                ParsedEmail(html_content), details=details
+            )
             if not result:
                 return {}
 
@@ -608,22 +623,20 @@ class EmailProcessor:
                 logger.warning("No HTML content found in Costco confirmation email")
                 return {}
 
-            soup = BeautifulSoup(html_content, "lxml")
+            parsed = ParsedEmail(html_content)
 
             order_number = self.costco_parser.extract_order_number(
-                soup, "confirmation", subject
+                parsed, "confirmation", subject
             )
             if not order_number:
                 logger.warning("Could not extract Costco order number")
                 return {}
 
-            order_date = self.costco_parser.extract_order_date(soup)
-            membership_number = self.costco_parser.extract_membership_number(soup)
-            shipping_address = self.costco_parser.extract_shipping_address(soup)
-            products, total_price = self.costco_parser.parse_product_details(
-                html_content
-            )
-            price_summary = self.costco_parser.extract_price_summary(soup)
+            order_date = self.costco_parser.extract_order_date(parsed)
+            membership_number = self.costco_parser.extract_membership_number(parsed)
+            shipping_address = self.costco_parser.extract_shipping_address(parsed)
+            products, total_price = self.costco_parser.parse_product_details(parsed)
+            price_summary = self.costco_parser.extract_price_summary(parsed)
             item_image = next(
                 (p.get("item_image") for p in products if p.get("item_image")), ""
             )
@@ -667,12 +680,12 @@ class EmailProcessor:
             if not html_content:
                 return {}
 
-            soup = BeautifulSoup(html_content, "lxml")
+            parsed = ParsedEmail(html_content)
 
             order_number = self.costco_parser.extract_order_number(
-                soup, "cancellation", subject
+                parsed, "cancellation", subject
             )
-            cancellation_date = self.costco_parser.extract_cancellation_date(soup)
+            cancellation_date = self.costco_parser.extract_cancellation_date(parsed)
 
             return {
                 "date": email_date,
@@ -699,18 +712,18 @@ class EmailProcessor:
             if not html_content:
                 return {}
 
-            soup = BeautifulSoup(html_content, "lxml")
+            parsed = ParsedEmail(html_content)
 
             order_number = self.costco_parser.extract_order_number(
-                soup, "shipped", subject
+                parsed, "shipped", subject
             )
             if not order_number:
                 return {}
 
             tracking_numbers = self.costco_parser.extract_tracking_numbers(
-                soup, html_content
+                parsed, html_content
             )
-            shipping_address = self.costco_parser.extract_shipping_address(soup)
+            shipping_address = self.costco_parser.extract_shipping_address(parsed)
 
             return {
                 "date": email_date,
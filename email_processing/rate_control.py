@@ -0,0 +1,143 @@
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+TUNED_FIELDS = ("batch_size", "batch_delay", "fetch_delay", "concurrency")
+THROTTLE_MARKERS = (
+    "[throttled]",
+    "[limit]",
+    "[unavailable]",
+    "too many",
+    "rate limit",
+    "bandwidth limit",
+    "try again later",
+)
+MISSING_MESSAGE_MARKERS = ("no such message", "invalid message")
+
+
+def is_throttle_response(text: Any) -> bool:
+    text = str(text).lower()
+    return any(marker in text for marker in THROTTLE_MARKERS)
+
+
+def is_throttle_reply(typ: str, data: Any) -> bool:
+    if typ == "OK":
+        return False
+    if is_throttle_response(data):
+        return True
+    text = str(data).lower()
+    return not any(marker in text for marker in MISSING_MESSAGE_MARKERS)
+
+
+class RateController:
+    # AIMD: every healthy batch nudges batch size up and delays down by one
+    # step; a throttling signal halves the batch size and doubles the delays.
+    def __init__(
+        self,
+        limits: Dict[str, Any],
+        state_path: Optional[Union[str, Path]] = None,
+        adaptive: bool = True,
+    ):
+        self.limits = limits
+        self.state_path = Path(state_path) if state_path else None
+        self.adaptive = adaptive
+        self.slow_command_seconds = limits.get("slow_command_seconds", 5.0)
+        self.values: Dict[str, float] = {
+            field: limits[field]["start"] for field in TUNED_FIELDS
+        }
+        self.latency: Optional[float] = None
+        self.throttle_count = 0
+        self._dirty = False
+        # Worker connections share one controller across fetch threads.
+        self._lock = threading.RLock()
+        self._load()
+
+    def _clamp(self, field: str, value: float) -> float:
+        bounds = self.limits[field]
+        value = min(max(value, bounds["min"]), bounds["max"])
+        if isinstance(bounds["start"], int):
+            return int(round(value))
+        return round(value, 3)
+
+    def _load(self) -> None:
+        if not self.adaptive or not self.state_path or not self.state_path.exists():
+            return
+        try:
+            with open(self.state_path, "r") as f:
+                saved = json.load(f)
+            for field in TUNED_FIELDS:
+                if field in saved:
+                    self.values[field] = self._clamp(field, saved[field])
+            logger.info("Loaded learned IMAP pacing: %s", self.values)
+        except Exception as e:
+            print(f"Warning: Could not load IMAP pacing from {self.state_path}: {e}")
+
+    def save(self) -> None:
+        if not self.adaptive or not self.state_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                with open(self.state_path, "w") as f:
+                    json.dump({**self.values, "updated_at": time.time()}, f, indent=2)
+                self._dirty = False
+            except Exception as e:
+                print(f"Warning: Could not save IMAP pacing: {e}")
+
+    def get(self, field: str):
+        return self.values[field]
+
+    def set(self, field: str, value: float) -> None:
+        self.values[field] = value
+
+    def _update(self, field: str, value: float) -> None:
+        value = self._clamp(field, value)
+        if value != self.values[field]:
+            self.values[field] = value
+            self._dirty = True
+
+    def record_command(self, seconds: float) -> None:
+        with self._lock:
+            if self.latency is None:
+                self.latency = seconds
+            else:
+                self.latency = 0.8 * self.latency + 0.2 * seconds
+
+    def record_success(self) -> None:
+        if not self.adaptive:
+            return
+        if self.latency is not None and self.latency > self.slow_command_seconds:
+            return
+
+        step = self.limits["batch_size"]["step"]
+        with self._lock:
+            at_max = self.values["batch_size"] >= self.limits["batch_size"]["max"]
+            self._update("batch_size", self.values["batch_size"] + step)
+            for field in ("batch_delay", "fetch_delay"):
+                self._update(field, self.values[field] - self.limits[field]["step"])
+            if at_max:
+                self._update("concurrency", self.values["concurrency"] + 1)
+
+    def record_throttle(self, reason: Any) -> None:
+        with self._lock:
+            self.throttle_count += 1
+            if not self.adaptive:
+                return
+
+            self._update("batch_size", self.values["batch_size"] / 2)
+            for field in ("batch_delay", "fetch_delay"):
+                self._update(
+                    field, max(self.values[field] * 2, self.limits[field]["step"] * 4)
+                )
+            self._update("concurrency", self.values["concurrency"] // 2)
+        print(
+            f"⚠ Server is throttling ({str(reason)[:80]}); slowing down to "
+            f"{self.values['batch_size']} emails per batch, "
+            f"{self.values['batch_delay']}s between batches"
+        )
@@ -0,0 +1,119 @@
+import logging
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config.settings import (
+    AMAZON_SEARCH_CRITERIA,
+    COSTCO_SEARCH_CRITERIA,
+    SEARCH_CRITERIA,
+    WALMART_SEARCH_CRITERIA,
+)
+
+from .connector import EmailConnector
+from .handlers import get_search_criteria_with_date
+
+logger = logging.getLogger(__name__)
+
+RETAILER_CRITERIA = {
+    "bestbuy": SEARCH_CRITERIA,
+    "amazon": AMAZON_SEARCH_CRITERIA,
+    "costco": COSTCO_SEARCH_CRITERIA,
+    "walmart": WALMART_SEARCH_CRITERIA,
+}
+
+QUOTED_VALUE_PATTERN = re.compile(r'"([^"]+)"')
+
+ScanKey = Tuple[str, str]
+
+
+def _quoted_values(*criteria: str) -> List[str]:
+    values = []
+    for text in criteria:
+        for value in QUOTED_VALUE_PATTERN.findall(text or ""):
+            value = value.lower()
+            if value not in values:
+                values.append(value)
+    return values
+
+
+class FolderScanner:
+    def __init__(
+        self,
+        connector: EmailConnector,
+        scan_types: Sequence[ScanKey],
+        date_filter: Optional[str] = None,
+    ):
+        self.connector = connector
+        self.rules = []
+        for retailer, email_type in scan_types:
+            criteria = get_search_criteria_with_date(
+                email_type, date_filter, RETAILER_CRITERIA[retailer]
+            )
+            expanded = connector._expand_subject_criteria(criteria)
+            self.rules.append(
+                {
+                    "key": (retailer, email_type),
+                    "query": connector.build_search_query(criteria),
+                    "senders": _quoted_values(criteria.get("from", "")),
+                    "subjects": _quoted_values(
+                        criteria.get("subject", ""), expanded.get("subject", "")
+                    ),
+                }
+            )
+
+    def combined_query(self) -> str:
+        queries = [rule["query"] for rule in self.rules]
+        query = f"({queries[-1]})"
+        for previous in reversed(queries[:-1]):
+            query = f"OR ({previous}) {query}"
+        return query
+
+    def classify(self, headers: dict) -> List[ScanKey]:
+        sender = headers.get("from", "").lower()
+        subject = headers.get("subject", "").lower()
+        matches = []
+        for rule in self.rules:
+            if rule["senders"] and not any(s in sender for s in rule["senders"]):
+                continue
+            if rule["subjects"] and not any(s in subject for s in rule["subjects"]):
+                continue
+            matches.append(rule["key"])
+        return matches
+
+    def scan(self, folder: str) -> Dict[ScanKey, List[bytes]]:
+        results: Dict[ScanKey, List[bytes]] = {rule["key"]: [] for rule in self.rules}
+        if not self.rules:
+            return results
+
+        print(f"\n🔎 Scanning '{folder}' once for {len(self.rules)} email types...")
+        self.connector.scan_results.clear()
+        success, uids = self.connector.search_emails(
+            folder,
+            self.combined_query(),
+            scan_keys=[rule["query"] for rule in self.rules],
+        )
+        if not success:
+            print("⚠ Combined scan failed; each email type will be searched separately")
+            return results
+
+        unmatched = 0
+        for uid, headers in self.connector.fetch_headers_batch(uids):
+            matches = self.classify(headers)
+            if not matches:
+                unmatched += 1
+                logger.debug("Scan could not classify UID %s: %s", uid, headers)
+            for key in matches:
+                results[key].append(uid)
+
+        for rule in self.rules:
+            self.connector.scan_results[(folder, rule["query"])] = results[rule["key"]]
+
+        summary = ", ".join(
+            f"{retailer} {email_type}: {len(matched)}"
+            for (retailer, email_type), matched in results.items()
+            if matched
+        )
+        print(
+            f"✓ Classified {len(uids) - unmatched}/{len(uids)} emails ({summary or 'none'})"
+        )
+        return results
@@ -0,0 +1,363 @@
+import bisect
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+LEGACY_FOLDER = ""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS uid_ranges (
+    folder TEXT NOT NULL,
+    uidvalidity INTEGER NOT NULL,
+    first_uid INTEGER NOT NULL,
+    last_uid INTEGER NOT NULL,
+    PRIMARY KEY (folder, uidvalidity, first_uid)
+);
+CREATE TABLE IF NOT EXISTS uid_journal (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    folder TEXT NOT NULL,
+    uidvalidity INTEGER NOT NULL,
+    uid INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS search_cache (
+    folder TEXT NOT NULL,
+    criteria TEXT NOT NULL,
+    uidvalidity INTEGER NOT NULL,
+    modseq INTEGER NOT NULL,
+    uids TEXT NOT NULL,
+    PRIMARY KEY (folder, criteria)
+);
+CREATE TABLE IF NOT EXISTS high_water (
+    folder TEXT NOT NULL,
+    criteria TEXT NOT NULL,
+    uidvalidity INTEGER NOT NULL,
+    last_uid INTEGER NOT NULL,
+    audited_at REAL NOT NULL,
+    PRIMARY KEY (folder, criteria)
+);
+CREATE TABLE IF NOT EXISTS backfill_shards (
+    folder TEXT NOT NULL,
+    criteria TEXT NOT NULL,
+    uidvalidity INTEGER NOT NULL,
+    first_uid INTEGER NOT NULL,
+    last_uid INTEGER NOT NULL,
+    done_uid INTEGER NOT NULL,
+    PRIMARY KEY (folder, criteria, first_uid)
+);
+"""
+
+
+class UidSet:
+    def __init__(self, ranges: Iterable[Tuple[int, int]] = ()):
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._count = 0
+        for first, last in sorted(ranges):
+            self._add_range(first, last)
+
+    def _add_range(self, first: int, last: int) -> None:
+        if self._ends and first <= self._ends[-1] + 1:
+            if last > self._ends[-1]:
+                self._count += last - self._ends[-1]
+                self._ends[-1] = last
+            return
+        self._starts.append(first)
+        self._ends.append(last)
+        self._count += last - first + 1
+
+    def __contains__(self, uid: int) -> bool:
+        i = bisect.bisect_right(self._starts, uid) - 1
+        return i >= 0 and uid <= self._ends[i]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self):
+        for first, last in zip(self._starts, self._ends):
+            yield from range(first, last + 1)
+
+    def add(self, uid: int) -> bool:
+        i = bisect.bisect_right(self._starts, uid) - 1
+        if i >= 0 and uid <= self._ends[i]:
+            return False
+
+        joins_left = i >= 0 and self._ends[i] == uid - 1
+        joins_right = i + 1 < len(self._starts) and self._starts[i + 1] == uid + 1
+        if joins_left and joins_right:
+            self._ends[i] = self._ends[i + 1]
+            del self._starts[i + 1]
+            del self._ends[i + 1]
+        elif joins_left:
+            self._ends[i] = uid
+        elif joins_right:
+            self._starts[i + 1] = uid
+        else:
+            self._starts.insert(i + 1, uid)
+            self._ends.insert(i + 1, uid)
+        self._count += 1
+        return True
+
+    def update(self, uids: Iterable[int]) -> None:
+        for uid in uids:
+            self.add(uid)
+
+    def ranges(self) -> List[Tuple[int, int]]:
+        return list(zip(self._starts, self._ends))
+
+    def to_text(self) -> str:
+        return ",".join(
+            str(first) if first == last else f"{first}-{last}"
+            for first, last in self.ranges()
+        )
+
+    def to_imap(self) -> str:
+        return ",".join(
+            str(first) if first == last else f"{first}:{last}"
+            for first, last in self.ranges()
+        )
+
+    @classmethod
+    def from_text(cls, text: str) -> "UidSet":
+        ranges = []
+        for chunk in (text or "").split(","):
+            if not chunk:
+                continue
+            first, _, last = chunk.partition("-")
+            ranges.append((int(first), int(last or first)))
+        return cls(ranges)
+
+
+class SyncStateStore:
+    def __init__(self, path: Union[str, Path], compact_threshold: int = 5000):
+        self.path = Path(path)
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self._sets: Dict[Tuple[str, int], UidSet] = {}
+        self._pending: List[Tuple[str, int, int]] = []
+
+        self.connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self._journal_rows = self.connection.execute(
+            "SELECT COUNT(*) FROM uid_journal"
+        ).fetchone()[0]
+
+    def _adopt_legacy(self, folder: str, uidvalidity: int) -> None:
+        if folder == LEGACY_FOLDER:
+            return
+        cursor = self.connection.cursor()
+        legacy = cursor.execute(
+            "SELECT COUNT(*) FROM uid_ranges WHERE folder = ?", (LEGACY_FOLDER,)
+        ).fetchone()[0]
+        if not legacy:
+            return
+        own = cursor.execute(
+            "SELECT COUNT(*) FROM uid_ranges WHERE folder = ? AND uidvalidity = ?",
+            (folder, uidvalidity),
+        ).fetchone()[0]
+        if own:
+            return
+        cursor.execute(
+            "UPDATE uid_ranges SET folder = ?, uidvalidity = ? WHERE folder = ?",
+            (folder, uidvalidity, LEGACY_FOLDER),
+        )
+        self.connection.commit()
+        print(f"📋 Moved legacy processed UID cache to folder '{folder}'")
+
+    def processed(self, folder: str, uidvalidity: int) -> UidSet:
+        key = (folder, uidvalidity)
+        with self._lock:
+            if key not in self._sets:
+                self._adopt_legacy(folder, uidvalidity)
+                cursor = self.connection.cursor()
+                uid_set = UidSet(
+                    cursor.execute(
+                        "SELECT first_uid, last_uid FROM uid_ranges "
+                        "WHERE folder = ? AND uidvalidity = ?",
+                        key,
+                    ).fetchall()
+                )
+                uid_set.update(
+                    row[0]
+                    for row in cursor.execute(
+                        "SELECT uid FROM uid_journal WHERE folder = ? AND uidvalidity = ?",
+                        key,
+                    )
+                )
+                self._sets[key] = uid_set
+            return self._sets[key]
+
+    def mark_processed(self, folder: str, uidvalidity: int, uid: int) -> None:
+        with self._lock:
+            if self.processed(folder, uidvalidity).add(uid):
+                self._pending.append((folder, uidvalidity, uid))
+
+    def processed_count(self) -> int:
+        with self._lock:
+            return sum(len(uid_set) for uid_set in self._sets.values())
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        self.connection.executemany(
+            "INSERT INTO uid_journal (folder, uidvalidity, uid) VALUES (?, ?, ?)",
+            self._pending,
+        )
+        self.connection.commit()
+        self._journal_rows += len(self._pending)
+        self._pending.clear()
+
+    def checkpoint(self) -> None:
+        with self._lock:
+            self._flush()
+            if self._journal_rows >= self.compact_threshold:
+                self.compact()
+
+    def compact(self) -> None:
+        with self._lock:
+            self._flush()
+            keys = self.connection.execute(
+                "SELECT DISTINCT folder, uidvalidity FROM uid_journal"
+            ).fetchall()
+            try:
+                for folder, uidvalidity in keys:
+                    uid_set = self.processed(folder, uidvalidity)
+                    self._write_ranges(folder, uidvalidity, uid_set)
+                    self.connection.execute(
+                        "DELETE FROM uid_journal WHERE folder = ? AND uidvalidity = ?",
+                        (folder, uidvalidity),
+                    )
+                self.connection.commit()
+            except Exception:
+                self.connection.rollback()
+                raise
+            logger.info(
+                "Compacted %s journal entries into UID ranges", self._journal_rows
+            )
+            self._journal_rows = 0
+
+    def _write_ranges(self, folder: str, uidvalidity: int, uid_set: UidSet) -> None:
+        self.connection.execute(
+            "DELETE FROM uid_ranges WHERE folder = ? AND uidvalidity = ?",
+            (folder, uidvalidity),
+        )
+        self.connection.executemany(
+            "INSERT INTO uid_ranges (folder, uidvalidity, first_uid, last_uid) "
+            "VALUES (?, ?, ?, ?)",
+            [(folder, uidvalidity, first, last) for first, last in uid_set.ranges()],
+        )
+
+    def get_search(self, folder: str, criteria: str) -> Optional[dict]:
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT uidvalidity, modseq, uids FROM search_cache "
+                "WHERE folder = ? AND criteria = ?",
+                (folder, criteria),
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            "uidvalidity": row[0],
+            "modseq": row[1],
+            "uids": UidSet.from_text(row[2]),
+        }
+
+    def save_search(
+        self,
+        folder: str,
+        criteria: str,
+        uidvalidity: int,
+        modseq: int,
+        uids: UidSet,
+    ) -> None:
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO search_cache "
+                "(folder, criteria, uidvalidity, modseq, uids) VALUES (?, ?, ?, ?, ?)",
+                (folder, criteria, uidvalidity, modseq, uids.to_text()),
+            )
+            self.connection.commit()
+
+    def get_high_water(self, folder: str, criteria: str) -> Optional[dict]:
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT uidvalidity, last_uid, audited_at FROM high_water "
+                "WHERE folder = ? AND criteria = ?",
+                (folder, criteria),
+            ).fetchone()
+        if not row:
+            return None
+        return {"uidvalidity": row[0], "last_uid": row[1], "audited_at": row[2]}
+
+    def save_high_water(
+        self,
+        folder: str,
+        criteria: str,
+        uidvalidity: int,
+        last_uid: int,
+        audited_at: float,
+    ) -> None:
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO high_water "
+                "(folder, criteria, uidvalidity, last_uid, audited_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (folder, criteria, uidvalidity, last_uid, audited_at),
+            )
+            self.connection.commit()
+
+    def get_shards(self, folder: str, criteria: str, uidvalidity: int) -> List[dict]:
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT first_uid, last_uid, done_uid FROM backfill_shards "
+                "WHERE folder = ? AND criteria = ? AND uidvalidity = ? "
+                "ORDER BY first_uid",
+                (folder, criteria, uidvalidity),
+            ).fetchall()
+        return [
+            {"first_uid": row[0], "last_uid": row[1], "done_uid": row[2]}
+            for row in rows
+        ]
+
+    def save_shards(
+        self,
+        folder: str,
+        criteria: str,
+        uidvalidity: int,
+        shards: Iterable[Tuple[int, int, int]],
+    ) -> None:
+        with self._lock:
+            self.connection.execute(
+                "DELETE FROM backfill_shards "
+                "WHERE folder = ? AND criteria = ? AND uidvalidity != ?",
+                (folder, criteria, uidvalidity),
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO backfill_shards "
+                "(folder, criteria, uidvalidity, first_uid, last_uid, done_uid) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (folder, criteria, uidvalidity, first, last, done)
+                    for first, last, done in shards
+                ],
+            )
+            self.connection.commit()
+
+    def import_legacy_uids(self, uids: Iterable[int]) -> int:
+        uid_set = UidSet((uid, uid) for uid in uids)
+        with self._lock:
+            self._write_ranges(LEGACY_FOLDER, 0, uid_set)
+            self.connection.commit()
+        return len(uid_set)
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self.checkpoint()
+            finally:
+                self.connection.close()
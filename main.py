@@ -16,8 +16,20 @@ from email_processing.handlers import (
     OrderEmailHandler,
     XboxEmailHandler,
 )
+from email_processing.orders import OrderCollection
+from email_processing.scanner import FolderScanner
 from output.file_handlers import OutputHandler
 
+ALL_MODE_SCAN_TYPES = [
+    ("bestbuy", "confirmation"),
+    ("bestbuy", "cancellation"),
+    ("bestbuy", "shipped"),
+    ("bestbuy", "xbox"),
+    ("costco", "confirmation"),
+    ("costco", "cancellation"),
+    ("costco", "shipped"),
+]
+
 
 class BBOSApplication:
     def __init__(self):
@@ -185,6 +197,8 @@ class BBOSApplication:
             print("=" * 50)
 
             order_handler = OrderEmailHandler(self.email_connector)
+            if self.output_handler:
+                order_handler.persist = self.output_handler.persist_orders
 
             orders = order_handler.process_confirmation_emails(
                 folder, ignore_cache=ignore_cache, date_filter=date_filter
@@ -193,26 +207,11 @@ class BBOSApplication:
             if not orders:
                 print("No new confirmation emails found")
                 if self.output_handler and self.output_handler.db_manager:
-                    existing_order_numbers = (
-                        self.output_handler.db_manager.get_all_orders()
-                    )
-                    if existing_order_numbers:
-                        print(
-                            f"Loading {len(existing_order_numbers)} existing orders from database for processing..."
-                        )
-                        orders = []
-                        for order_data in existing_order_numbers:
-                            full_order = (
-                                self.output_handler.db_manager.get_order_by_number(
-                                    order_data["number"]
-                                )
-                            )
-                            if full_order:
-                                orders.append(full_order)
-                        if orders:
-                            print(f"Loaded {len(orders)} orders with full details")
-                        else:
-                            print("No orders with full details found")
+                    print("Loading existing orders from database for processing...")
+                    orders = OrderCollection()
+                    orders.extend(self.output_handler.db_manager.iter_orders())
+                    if orders:
+                        print(f"Loaded {len(orders)} orders with full details")
                     else:
                         print("No existing orders found in database")
 
@@ -264,6 +263,8 @@ class BBOSApplication:
             print("=" * 50)
 
             costco_handler = CostcoEmailHandler(self.email_connector)
+            if self.output_handler:
+                costco_handler.persist = self.output_handler.persist_orders
 
             orders = costco_handler.process_confirmation_emails(
                 folder, ignore_cache=ignore_cache, date_filter=date_filter
@@ -272,26 +273,11 @@ class BBOSApplication:
             if not orders:
                 print("No new Costco confirmation emails found")
                 if self.output_handler and self.output_handler.db_manager:
-                    existing_order_numbers = (
-                        self.output_handler.db_manager.get_all_orders()
-                    )
-                    if existing_order_numbers:
-                        print(
-                            f"Loading {len(existing_order_numbers)} existing orders from database for processing..."
-                        )
-                        orders = []
-                        for order_data in existing_order_numbers:
-                            full_order = (
-                                self.output_handler.db_manager.get_order_by_number(
-                                    order_data["number"]
-                                )
-                            )
-                            if full_order:
-                                orders.append(full_order)
-                        if orders:
-                            print(f"Loaded {len(orders)} orders with full details")
-                        else:
-                            print("No orders with full details found")
+                    print("Loading existing orders from database for processing...")
+                    orders = OrderCollection()
+                    orders.extend(self.output_handler.db_manager.iter_orders())
+                    if orders:
+                        print(f"Loaded {len(orders)} orders with full details")
                     else:
                         print("No existing orders found in database")
 
@@ -515,10 +501,15 @@ class BBOSApplication:
                 elif choice == "4":
                     self.process_xbox_codes(folder, ignore_cache, date_filter)
                 elif choice == "5":
+                    if not ignore_cache:
+                        FolderScanner(
+                            self.email_connector, ALL_MODE_SCAN_TYPES, date_filter
+                        ).scan(folder)
                     self.process_bestbuy_orders(folder, ignore_cache, date_filter)
                     self.process_amazon_orders(folder, ignore_cache, date_filter)
                     self.process_costco_orders(folder, ignore_cache, date_filter)
                     self.process_xbox_codes(folder, ignore_cache, date_filter)
+                    self.email_connector.scan_results.clear()
                 elif choice == "6":
                     break
 
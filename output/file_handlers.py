@@ -8,6 +8,18 @@ from config.settings import (
 )
 from core.database import DatabaseManager
 
+# insert_orders skips orders without these, e.g. shipped emails for orders
+# whose confirmation has not been seen yet
+STORED_ORDER_FIELDS = (
+    "number",
+    "date",
+    "total_price",
+    "status",
+    "email_address",
+    "products",
+    "tracking",
+)
+
 
 def get_output_settings(service: str = "bestbuy") -> Dict:
     if service.lower() == "costco":
@@ -74,21 +86,36 @@ class OutputHandler:
             print("CSV output disabled in settings - skipping CSV save operations")
 
         try:
-            for order in orders:
-                self.db_manager.insert_order(order)
+            self.db_manager.insert_orders(orders)
 
-                if self.service == "costco" and order.get("membership_number"):
-                    self.db_manager.insert_membership_number(
+            if self.service == "costco":
+                stored = self.db_manager.insert_membership_numbers(
+                    [
                         {
                             "membership_number": order["membership_number"],
                             "email_address": order.get("email_address", ""),
                             "date": order.get("date", ""),
                         }
-                    )
+                        for order in orders
+                        if order.get("membership_number")
+                    ]
+                )
+                if stored:
+                    print(f"Stored {stored} new membership numbers")
+            self.db_manager.flush()
             print("Orders saved to SQLite database successfully")
         except Exception as e:
             print(f"Error saving orders to database: {str(e)}")
 
+    def persist_orders(self, orders: List[Dict]) -> None:
+        complete = [
+            order
+            for order in orders
+            if all(field in order for field in STORED_ORDER_FIELDS)
+        ]
+        if self.db_manager and complete:
+            self.db_manager.insert_orders(complete, wait=False)
+
     def save_xbox_codes(self, codes: List[Dict]) -> None:
         if OUTPUT_SETTINGS["enable_output"]:
             try:
@@ -107,8 +134,7 @@ class OutputHandler:
             print("CSV output disabled in settings - skipping CSV save operations")
 
         try:
-            for code in codes:
-                self.db_manager.insert_xbox_code(code)
+            self.db_manager.insert_xbox_codes(codes)
             print("Xbox codes saved to SQLite database successfully")
         except Exception as e:
             print(f"Error saving Xbox codes to database: {str(e)}")
@@ -0,0 +1,99 @@
+import io
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from email_processing.backfill import ShardedBackfill, plan_shards  # noqa: E402
+from email_processing.imap_parsing import FetchedMessage  # noqa: E402
+from email_processing.sync_store import SyncStateStore  # noqa: E402
+
+
+class FakeRate:
+    limits = {"concurrency": {"max": 3}}
+
+
+class FakeConnector:
+    batch_size = 5
+    rate = FakeRate()
+    current_folder = "INBOX"
+    current_criteria = 'SUBJECT "Thanks for your order"'
+    current_uidvalidity = 7
+
+    def __init__(self, sync_store):
+        self.sync_store = sync_store
+        self.workers = []
+
+    def open_worker(self):
+        worker = FakeConnector(self.sync_store)
+        self.workers.append(worker)
+        return worker
+
+    def close_worker(self):
+        self.closed = True
+
+    def iter_fetch_batches(self, message_ids, use_uid=True):
+        for i in range(0, len(message_ids), self.batch_size):
+            yield [
+                FetchedMessage(b"%s (UID %s)" % (uid, uid), b"body", uid=uid)
+                for uid in message_ids[i : i + self.batch_size]
+            ]
+
+
+class ShardedBackfillTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.store = SyncStateStore(Path(self._tmp.name) / "sync.db")
+        self.connector = FakeConnector(self.store)
+        self.message_ids = [str(uid).encode() for uid in range(1, 61)]
+
+    def tearDown(self):
+        self.store.close()
+        self._tmp.cleanup()
+
+    def _run(self, backfill, stop_after=None):
+        seen = []
+        with redirect_stdout(io.StringIO()):
+            for batch in backfill.iter_fetch_batches(self.message_ids):
+                for record in batch:
+                    seen.append(record.uid)
+                    backfill.record_done(record)
+                    if stop_after and len(seen) >= stop_after:
+                        backfill.save()
+                        return seen
+        backfill.save()
+        return seen
+
+    def test_plan_splits_contiguous_uid_ranges(self):
+        shards = plan_shards([b"9", b"1", b"5", b"3", b"7"], 2)
+        self.assertEqual(shards, [[b"1", b"3", b"5"], [b"7", b"9"]])
+
+    def test_shards_fetch_on_separate_connections(self):
+        backfill = ShardedBackfill(self.connector, connections=8)
+        seen = self._run(backfill)
+
+        self.assertEqual(backfill.connections, 3)
+        self.assertEqual(sorted(seen, key=int), self.message_ids)
+        self.assertEqual(len(self.connector.workers), 2)
+        self.assertTrue(all(worker.closed for worker in self.connector.workers))
+
+    def test_interrupted_backfill_resumes_per_shard(self):
+        self.connector.rate = type("Rate", (), {"limits": {"concurrency": {"max": 1}}})
+        self._run(ShardedBackfill(self.connector), stop_after=25)
+
+        saved = self.store.get_shards(
+            "INBOX", FakeConnector.current_criteria, FakeConnector.current_uidvalidity
+        )
+        self.assertEqual(saved[0]["done_uid"], 25)
+
+        seen = self._run(ShardedBackfill(self.connector))
+        self.assertEqual(seen[0], b"26")
+        self.assertEqual(len(seen), 35)
+
+
+if __name__ == "__main__":
+    unittest.main()
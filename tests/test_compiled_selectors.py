@@ -0,0 +1,75 @@
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from email_processing.parsers.compiled_selectors import (  # noqa: E402
+    CompiledSelector,
+    xpath_literal,
+)
+from email_processing.parsers.parsed_email import ParsedEmail  # noqa: E402
+
+HTML = """
+<table>
+  <tr><td style="padding-bottom:12px;">Order number:
+    <span style="font-weight: 700; font-size: 14px">BBY01-123</span></td></tr>
+  <tr><td class="align-column wide">Cancellation Date</td></tr>
+  <tr><td><a href="https://click.emailinfo2.bestbuy.com/a">short</a>
+    <a href="https://click.emailinfo2.bestbuy.com/b">A much longer title</a></td></tr>
+</table>
+"""
+
+
+class CompiledSelectorTests(unittest.TestCase):
+    def setUp(self):
+        self.parsed = ParsedEmail(HTML)
+
+    def test_attribute_and_text_predicates(self):
+        container = CompiledSelector(
+            {
+                "tag": "td",
+                "attributes": {"style": "padding-bottom:12px;"},
+                "text_contains": "Order number:",
+            }
+        )
+        target = CompiledSelector(
+            {
+                "tag": "span",
+                "attributes": {"style_contains_all": ["font-weight: 700", "14px"]},
+            }
+        )
+
+        td = container.find(self.parsed)
+        self.assertEqual(target.find(td).text_content(), "BBY01-123")
+
+    def test_class_matches_single_token(self):
+        selector = CompiledSelector(
+            {"tag": "td", "attributes": {"class": "align-column"}}
+        )
+        self.assertEqual(len(selector.find_all(self.parsed)), 1)
+
+    def test_text_min_length(self):
+        selector = CompiledSelector(
+            {
+                "tag": "a",
+                "attributes": {"href_contains": "click.emailinfo2.bestbuy.com"},
+                "text_min_length": 10,
+            }
+        )
+        self.assertEqual(
+            selector.find(self.parsed).text_content(), "A much longer title"
+        )
+
+    def test_empty_document(self):
+        selector = CompiledSelector({"tag": "td"})
+        self.assertEqual(selector.find_all(ParsedEmail("")), [])
+        self.assertIsNone(selector.find(ParsedEmail("  ")))
+
+    def test_literal_with_both_quote_kinds(self):
+        self.assertEqual(xpath_literal('it\'s "x"'), "concat('it', \"'\", 's \"x\"')")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,245 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from email_processing.connector import EmailConnector  # noqa: E402
+from email_processing.handlers import BaseEmailHandler  # noqa: E402
+
+
+class FakeIMAP:
+    capabilities = ("IMAP4REV1", "CONDSTORE", "ENABLE")
+
+    def __init__(self, uids):
+        self.uids = list(uids)
+        self.uidvalidity = 7
+        self.modseq = 100
+        self.searches = []
+        self.status_calls = []
+        self._responses = {}
+
+    def enable(self, capability):
+        return "OK", [b"ENABLED"]
+
+    def select(self, folder, readonly=False):
+        self._responses = {
+            "EXISTS": [str(len(self.uids)).encode()],
+            "UIDNEXT": [str(max(self.uids) + 1).encode()],
+            "UIDVALIDITY": [str(self.uidvalidity).encode()],
+            "HIGHESTMODSEQ": [str(self.modseq).encode()],
+        }
+        return "OK", [str(len(self.uids)).encode()]
+
+    def status(self, folder, items):
+        self.status_calls.append(folder)
+        return "OK", [f"{folder} (UIDNEXT {max(self.uids) + 1})".encode()]
+
+    def response(self, code):
+        return code, self._responses.pop(code, [None])
+
+    def uid(self, command, *args):
+        criteria = args[-1].decode()
+        self.searches.append(criteria)
+        uids = self.uids
+        if criteria.startswith("UID "):
+            uid_set = criteria.split()[1]
+            if uid_set.endswith(":*"):
+                first = int(uid_set[:-2])
+                uids = [uid for uid in uids if uid >= first] or [max(uids)]
+            else:
+                wanted = set()
+                for part in uid_set.split(","):
+                    first, _, last = part.partition(":")
+                    wanted.update(range(int(first), int(last or first) + 1))
+                uids = [uid for uid in uids if uid in wanted]
+        if criteria.startswith("MODSEQ"):
+            uids = [uid for uid in uids if uid > self.changed_after]
+        return "OK", [" ".join(str(uid) for uid in uids).encode()]
+
+    def add_message(self, uid):
+        self.changed_after = max(self.uids)
+        self.uids.append(uid)
+        self.modseq += 1
+
+    def expunge(self, uid):
+        self.changed_after = max(self.uids)
+        self.uids.remove(uid)
+        self.modseq += 1
+
+
+class SyncTestCase(unittest.TestCase):
+    capabilities = FakeIMAP.capabilities
+    criteria = {"subject": 'SUBJECT "Thanks for your order"'}
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self.imap = FakeIMAP([3, 5, 9])
+        self.imap.capabilities = self.capabilities
+        self.connector = self._connector()
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def _connector(self):
+        connector = EmailConnector("buyer@example.com", "secret", "gmail")
+        connector.connection = self.imap
+        connector._enable_condstore()
+        return connector
+
+    def _search(self):
+        success, uids = self.connector.search_emails("INBOX", self.criteria)
+        self.assertTrue(success)
+        return uids
+
+
+class ConnectorSyncTests(SyncTestCase):
+    def test_unchanged_mailbox_skips_server_search(self):
+        self.assertEqual(self._search(), [b"3", b"5", b"9"])
+        self.assertEqual(self._search(), [b"3", b"5", b"9"])
+        self.assertEqual(len(self.imap.searches), 1)
+
+    def test_changed_mailbox_searches_since_stored_modseq(self):
+        self._search()
+        self.connector.mark_uid_processed(b"3")
+        self.imap.add_message(12)
+
+        self.assertEqual(self._search(), [b"5", b"9", b"12"])
+        self.assertTrue(self.imap.searches[-2].startswith("MODSEQ 101 "))
+        self.assertEqual(self.imap.searches[-1], "UID 3,5,9")
+
+    def test_expunged_messages_leave_the_cached_results(self):
+        self._search()
+        self.imap.expunge(5)
+        self.imap.add_message(12)
+
+        self.assertEqual(self._search(), [b"3", b"9", b"12"])
+        self.assertIn("UID 3,5,9", self.imap.searches)
+
+    def test_modseq_going_backwards_resets_the_cache(self):
+        self._search()
+        self.imap.uids.remove(9)
+        self.imap.modseq = 50
+
+        self.assertEqual(self._search(), [b"3", b"5"])
+        self.assertEqual(self.imap.searches[-1], self.imap.searches[0])
+
+    def test_selected_folder_status_comes_from_select(self):
+        self.assertEqual(self.connector.folder_status("INBOX"), {"UIDNEXT": 10})
+        self._search()
+        self.imap.add_message(12)
+
+        status = self.connector.folder_status("INBOX")
+
+        self.assertEqual(
+            status,
+            {"UIDNEXT": 13, "MESSAGES": 4, "UIDVALIDITY": 7, "HIGHESTMODSEQ": 101},
+        )
+        self.assertEqual(self.imap.status_calls, ["INBOX"])
+
+    def test_state_survives_restart_and_resets_on_uidvalidity(self):
+        self._search()
+        self.connector = self._connector()
+        self._search()
+        self.assertEqual(len(self.imap.searches), 1)
+
+        self.imap.uidvalidity = 8
+        self._search()
+        self.assertEqual(len(self.imap.searches), 2)
+
+
+class HighWaterSearchTests(SyncTestCase):
+    capabilities = ("IMAP4REV1",)
+
+    def _process(self, *uids):
+        for uid in uids:
+            self.connector.mark_uid_processed(uid)
+        self.connector.checkpoint()
+
+    def test_search_starts_above_processed_uids(self):
+        self.assertEqual(self._search(), [b"3", b"5", b"9"])
+        self._process(b"3", b"5")
+
+        self.assertEqual(self._search(), [b"9"])
+        self.assertTrue(self.imap.searches[-1].startswith("UID 6:* "))
+
+        self._process(b"9")
+        self.assertEqual(self._search(), [])
+        self.imap.add_message(12)
+        self.assertEqual(self._search(), [b"12"])
+        self.assertTrue(self.imap.searches[-1].startswith("UID 10:* "))
+
+    def test_unparseable_message_does_not_pin_high_water(self):
+        self.imap.uids = [3, 5, 9, 11, 13]
+        uids = self._search()
+        handler = BaseEmailHandler(self.connector)
+        self.connector.fetch_email = lambda uid, use_uid=True: (True, (b"", uid))
+        handler.processor.parse_order = lambda email_data: (
+            {} if email_data[1] == b"9" else {"order_number": email_data[1]}
+        )
+        handler._process_messages(
+            uids,
+            "parse_order",
+            lambda result: bool(result.get("order_number")),
+        )
+
+        self.assertEqual(self._search(), [])
+        self.assertTrue(self.imap.searches[-1].startswith("UID 14:* "))
+
+    def test_unapplied_order_stays_below_high_water(self):
+        self.imap.uids = [3, 5, 9, 11, 13]
+        uids = self._search()
+        handler = BaseEmailHandler(self.connector)
+        self.connector.fetch_email = lambda uid, use_uid=True: (True, (b"", uid))
+        handler.processor.parse_order = lambda email_data: {
+            "order_number": email_data[1]
+        }
+
+        handler._process_messages(
+            uids, "parse_order", lambda result: result["order_number"] != b"9"
+        )
+
+        self.assertEqual(self._search(), [b"9"])
+        self.assertTrue(self.imap.searches[-1].startswith("UID 6:* "))
+
+    def test_failed_apply_leaves_message_unexamined(self):
+        uids = self._search()
+        handler = BaseEmailHandler(self.connector)
+        self.connector.fetch_email = lambda uid, use_uid=True: (True, (b"", uid))
+        handler.processor.parse_order = lambda email_data: {}
+
+        def apply(result):
+            raise ValueError("bad row")
+
+        with self.assertRaises(ValueError):
+            handler._process_messages(uids, "parse_order", apply)
+        self.connector.checkpoint()
+
+        self.assertEqual(self._search(), [b"3", b"5", b"9"])
+
+    def test_search_without_uid_filter_drops_high_water_state(self):
+        self._search()
+        self.assertIsNotNone(self.connector._high_water)
+
+        self.connector.search_emails("INBOX", self.criteria, use_uid_filter=False)
+        self.assertIsNone(self.connector._high_water)
+
+    def test_periodic_audit_searches_full_range(self):
+        self._search()
+        self._process(b"3", b"5", b"9")
+        store = self.connector.sync_store
+        mark = store.get_high_water("INBOX", self.imap.searches[0])
+        store.save_high_water("INBOX", self.imap.searches[0], 7, mark["last_uid"], 0)
+
+        self.assertEqual(self._search(), [])
+        self.assertEqual(self.imap.searches[-1], self.imap.searches[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
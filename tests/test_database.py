@@ -0,0 +1,257 @@
+import io
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from config.settings import COSTCO_DB_SETTINGS, DB_SETTINGS  # noqa: E402
+from core.database import DatabaseManager  # noqa: E402
+from core.migrations import SCHEMA_VERSION  # noqa: E402
+
+
+def make_order(number, status="Confirmed", tracking=()):
+    return {
+        "number": number,
+        "date": "2025-11-04",
+        "total_price": "$19.99",
+        "status": status,
+        "email_address": "buyer@example.com",
+        "state": "NY",
+        "products": [{"title": f"Item {number}", "price": "$19.99", "quantity": "1"}],
+        "tracking": list(tracking),
+    }
+
+
+class BulkWriteTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db = self._open(DB_SETTINGS)
+
+    def tearDown(self):
+        self.db.close()
+        self._tmp.cleanup()
+
+    def _open(self, settings):
+        config = {**settings, "filename": str(Path(self._tmp.name) / "orders.db")}
+        with redirect_stdout(io.StringIO()):
+            return DatabaseManager(db_config=config)
+
+    def _count(self, table):
+        return self.db.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_bulk_insert_then_upsert_replaces_children(self):
+        orders = [make_order(f"BBY01-{i}") for i in range(2000)]
+        self.assertEqual(self.db.insert_orders(orders), 2000)
+
+        updated = make_order("BBY01-7", status="Shipped", tracking=["1Z1", "1Z2"])
+        self.assertEqual(self.db.insert_orders([updated, make_order("BBY01-new")]), 2)
+
+        self.assertEqual(self._count("orders"), 2001)
+        self.assertEqual(self._count("products"), 2001)
+        order = self.db.get_order_by_number("BBY01-7")
+        self.assertEqual(order["status"], "Shipped")
+        self.assertEqual(order["tracking"], ["1Z1", "1Z2"])
+        self.assertEqual(len(order["products"]), 1)
+
+    def test_malformed_order_is_skipped(self):
+        broken = {"number": "BBY01-broken", "date": "2025-11-04"}
+        with redirect_stdout(io.StringIO()):
+            stored = self.db.insert_orders([broken, make_order("BBY01-1")])
+
+        self.assertEqual(stored, 1)
+        self.assertIsNone(self.db.get_order_by_number("BBY01-broken"))
+
+    def test_date_window_uses_normalised_day_index(self):
+        orders = [
+            make_order("BBY01-1", tracking=["1Z1"]),
+            {**make_order("BBY01-2", tracking=["1Z2"]), "date": "Nov 10, 2025"},
+            {**make_order("BBY01-3", tracking=["1Z3"]), "date": "Unknown"},
+            make_order("BBY01-4"),
+        ]
+        orders[1]["total_price"] = "$1,299.99"
+        self.db.insert_orders(orders)
+
+        found = self.db.get_orders_with_tracking_since_date("2025-11-01", "2025-11-30")
+        self.assertEqual([o["number"] for o in found], ["BBY01-2", "BBY01-1"])
+        self.assertEqual(found[0]["total_cents"], 129999)
+
+        plan = self.db.connection.execute(
+            "EXPLAIN QUERY PLAN SELECT order_number FROM orders "
+            "WHERE order_day BETWEEN ? AND ? ORDER BY order_day DESC",
+            ("2025-11-01", "2025-11-30"),
+        ).fetchall()
+        self.assertIn("idx_orders_order_day", str(plan))
+
+    def test_bulk_loader_assembles_orders_in_three_queries(self):
+        orders = [
+            make_order(f"BBY01-{i:04d}", tracking=[f"1Z{i}"]) for i in range(1200)
+        ]
+        orders[5]["products"].append({"title": "Cable", "price": "$5", "quantity": "2"})
+        orders[6]["tracking"] = []
+        self.db.insert_orders(orders)
+
+        statements = []
+        self.db.reader().set_trace_callback(statements.append)
+        loaded = list(self.db.iter_orders())
+        self.db.reader().set_trace_callback(None)
+
+        self.assertEqual(len(statements), 3)
+        self.assertEqual(len(loaded), 1200)
+        by_number = {order["number"]: order for order in loaded}
+        self.assertEqual(len(by_number["BBY01-0005"]["products"]), 2)
+        self.assertEqual(by_number["BBY01-0006"]["tracking"], [])
+        self.assertEqual(by_number["BBY01-0007"]["tracking"], ["1Z7"])
+
+        wanted = [f"BBY01-{i:04d}" for i in range(0, 1200, 2)] + ["missing"]
+        selected = self.db.get_orders(wanted)
+        self.assertEqual(len(selected), 600)
+        self.assertEqual(selected["BBY01-0010"], by_number["BBY01-0010"])
+        self.assertEqual(self.db.get_order_by_number("BBY01-0005"), loaded[5])
+
+        windowed = self.db.get_orders(start_date="2025-11-01", end_date="2025-11-03")
+        self.assertEqual(windowed, {})
+
+    def test_xbox_codes_and_memberships_ignore_duplicates(self):
+        codes = [{"code": "AAAA", "date": "2025-11-04"}] * 2
+        self.assertEqual(self.db.insert_xbox_codes(codes), 1)
+        self.assertEqual(self.db.insert_xbox_codes(codes), 0)
+
+        self.db.close()
+        self.db = self._open(COSTCO_DB_SETTINGS)
+        memberships = [
+            {"membership_number": "111", "email_address": "a@example.com"},
+            {"membership_number": "111", "email_address": "a@example.com"},
+            {"membership_number": "222", "date": "2025-11-01"},
+        ]
+        self.assertEqual(self.db.insert_membership_numbers(memberships), 2)
+        self.assertEqual(len(self.db.get_membership_numbers()), 2)
+
+
+class ConnectionLayerTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        config = {**DB_SETTINGS, "filename": str(Path(self._tmp.name) / "orders.db")}
+        with redirect_stdout(io.StringIO()):
+            self.db = DatabaseManager(db_config=config)
+
+    def tearDown(self):
+        self.db.close()
+        self._tmp.cleanup()
+
+    def test_write_connection_uses_wal(self):
+        mode = self.db.connection.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+        self.assertEqual(
+            self.db.connection.execute("PRAGMA synchronous").fetchone()[0], 1
+        )
+        with self.assertRaises(sqlite3.OperationalError):
+            self.db.reader().execute("DELETE FROM orders")
+
+    def test_queued_writes_from_threads_are_group_committed(self):
+        self.assertIsNotNone(self.db.writer)
+
+        def _queue(start):
+            for i in range(start, start + 50):
+                self.db.insert_orders([make_order(f"BBY01-{i}")], wait=False)
+
+        threads = [threading.Thread(target=_queue, args=(n * 50,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.db.flush()
+        self.assertEqual(len(self.db.get_all_orders()), 200)
+        self.assertEqual(self.db.writer.writes, 200)
+        self.assertLessEqual(self.db.writer.commits, 200)
+
+    def test_reads_do_not_wait_for_queued_writes(self):
+        self.db.insert_orders([make_order("BBY01-1")])
+        release = threading.Event()
+
+        def _blocked(cursor):
+            release.wait(5)
+            return 0
+
+        self.db.writer.submit(_blocked, "blocked write")
+        self.db.insert_orders([make_order("BBY01-2")], wait=False)
+
+        found = []
+        reader = threading.Thread(
+            target=lambda: found.extend(self.db.get_orders(["BBY01-1", "BBY01-2"]))
+        )
+        reader.start()
+        reader.join(timeout=2)
+        self.assertFalse(reader.is_alive())
+        self.assertEqual(found, ["BBY01-1"])
+
+        release.set()
+        self.db.flush()
+        self.assertIsNotNone(self.db.get_order_by_number("BBY01-2"))
+
+    def test_failed_write_does_not_drop_the_rest_of_the_group(self):
+        with redirect_stdout(io.StringIO()):
+            self.db.writer.submit(
+                lambda cursor: cursor.execute("INSERT INTO nope"), "bad"
+            )
+            self.db.insert_orders([make_order("BBY01-ok")], wait=False)
+            self.db.flush()
+
+        self.assertIsNotNone(self.db.get_order_by_number("BBY01-ok"))
+
+
+class MigrationTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "legacy.db"
+        legacy = sqlite3.connect(self.path)
+        legacy.execute(
+            "CREATE TABLE orders (order_number TEXT PRIMARY KEY, order_date TEXT, "
+            "total_price TEXT, status TEXT, email_address TEXT)"
+        )
+        legacy.execute(
+            "INSERT INTO orders VALUES ('BBY01-1', '2025-11-04', '$5', 'Confirmed', '')"
+        )
+        legacy.commit()
+        legacy.close()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _open(self):
+        with redirect_stdout(io.StringIO()):
+            return DatabaseManager(
+                db_config={**DB_SETTINGS, "filename": str(self.path)}
+            )
+
+    def test_legacy_database_is_upgraded_once(self):
+        db = self._open()
+        version = db.connection.execute("PRAGMA user_version").fetchone()[0]
+        self.assertEqual(version, SCHEMA_VERSION)
+
+        db.update_order_address("BBY01-1", "NY")
+        self.assertEqual(db.get_order_by_number("BBY01-1")["state"], "NY")
+        self.assertFalse(db.is_tracking_key_submitted("BBY01-1:1Z1"))
+        self.assertEqual(db.get_membership_numbers(), [])
+        self.assertEqual(db.get_order_by_number("BBY01-1")["total_cents"], 500)
+        day = db.connection.execute("SELECT order_day FROM orders").fetchone()[0]
+        self.assertEqual(day, "2025-11-04")
+        db.close()
+
+        db = self._open()
+        statements = []
+        db.connection.set_trace_callback(statements.append)
+        db.add_submitted_tracking_key("BBY01-1", "1Z1", "BBY01-1:1Z1")
+        self.assertTrue(db.is_tracking_key_submitted("BBY01-1:1Z1"))
+        self.assertFalse(any("sqlite_master" in sql for sql in statements))
+        db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
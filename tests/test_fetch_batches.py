@@ -0,0 +1,134 @@
+import imaplib
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from email_processing.connector import EmailConnector  # noqa: E402
+
+INTERNALDATE = b"04-Nov-2025 10:00:00 -0500"
+
+
+class FakeIMAP:
+    capabilities = ("IMAP4REV1",)
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.strict = False
+        self.transient_failures = 0
+        self.commands = 0
+        self.fetched_batches = []
+
+    def _response(self, uid, body, seq):
+        head = b'%d (UID %d RFC822.SIZE %d INTERNALDATE "%s" BODY[] {%d}' % (
+            seq,
+            uid,
+            len(body),
+            INTERNALDATE,
+            len(body),
+        )
+        return [(head, body), b")"]
+
+    def _sizes(self, requested):
+        return "OK", [
+            b"%d (UID %d RFC822.SIZE %d)" % (seq, uid, len(self.messages[uid]))
+            for seq, uid in enumerate(requested, start=1)
+            if uid in self.messages
+        ]
+
+    def uid(self, command, id_set, items):
+        if items == "(UID RFC822.SIZE)":
+            return self._sizes([int(uid) for uid in id_set.split(b",")])
+        self.commands += 1
+        self.fetched_batches.append(id_set.split(b","))
+        if self.transient_failures:
+            self.transient_failures -= 1
+            raise OSError("connection reset")
+        requested = [int(uid) for uid in id_set.split(b",")]
+        if self.strict and any(uid not in self.messages for uid in requested):
+            raise imaplib.IMAP4.error("No such message")
+        response = []
+        # Servers answer in mailbox order and silently drop expunged UIDs.
+        for seq, uid in enumerate(sorted(requested), start=1):
+            if uid in self.messages:
+                response.extend(self._response(uid, self.messages[uid], seq))
+        return "OK", response or [None]
+
+
+class FetchBatchTests(unittest.TestCase):
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self.imap = FakeIMAP(
+            {3: b"Subject: three\r\n\r\n3", 9: b"Subject: nine\r\n\r\n9"}
+        )
+        self.connector = EmailConnector("buyer@example.com", "secret", "gmail")
+        self.connector.connection = self.imap
+        self.connector.partial_fetch = False
+        self.connector.fetch_delay = 0
+        self.connector.batch_delay = 0
+
+    def tearDown(self):
+        self.connector.sync_store.close()
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def test_records_carry_uid_from_fetch_response(self):
+        records = self.connector.fetch_emails_batch([b"9", b"5", b"3"])
+
+        self.assertEqual([record.uid for record in records], [b"3", b"9"])
+        self.assertEqual(records[1].data, self.imap.messages[9])
+        self.assertEqual(records[1][1], self.imap.messages[9])
+        self.assertEqual(records[1].size, len(self.imap.messages[9]))
+        self.assertEqual(records[1].internal_date, INTERNALDATE.decode())
+
+    def test_missing_message_is_isolated_by_bisection(self):
+        self.imap.messages = {uid: b"Subject: x\r\n\r\nx" for uid in range(1, 201)}
+        del self.imap.messages[77]
+        self.imap.strict = True
+
+        records = self.connector.fetch_emails_batch(
+            [str(uid).encode() for uid in range(1, 201)]
+        )
+
+        self.assertEqual(len(records), 199)
+        self.assertNotIn(b"77", [record.uid for record in records])
+        self.assertLessEqual(self.imap.commands, 17)
+
+    def test_transient_error_retries_only_the_chunk(self):
+        self.imap.transient_failures = 1
+
+        with mock.patch("email_processing.connector.time.sleep"):
+            records = self.connector.fetch_emails_batch([b"3", b"9"])
+
+        self.assertEqual([record.uid for record in records], [b"3", b"9"])
+        self.assertEqual(self.imap.commands, 2)
+
+    def test_batches_are_packed_by_size(self):
+        small = b"Subject: small\r\n\r\n" + b"x" * 1000
+        self.imap.messages = {uid: small for uid in range(1, 31)}
+        self.imap.messages[12] = b"x" * 6000
+
+        with mock.patch.dict(
+            "email_processing.connector.FETCH_SETTINGS",
+            {"batch_bytes": 10 * 1024, "large_message_bytes": 5000},
+        ):
+            records = self.connector.fetch_emails_batch(
+                [str(uid).encode() for uid in range(1, 31)]
+            )
+
+        self.assertEqual(len(records), 30)
+        self.assertEqual(
+            [len(batch) for batch in self.imap.fetched_batches], [10, 1, 1, 10, 8]
+        )
+        self.assertEqual(self.imap.fetched_batches[2], [b"12"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from email_processing.connector import EmailConnector  # noqa: E402
+
+
+class FakeIdleIMAP:
+    capabilities = ("IMAP4REV1", "IDLE")
+
+    def __init__(self, greeting=b"+ idling\r\n"):
+        self.sock, self.server = socket.socketpair()
+        self.file = self.sock.makefile("rb")
+        self.greeting = greeting
+        self.sent = []
+
+    def select(self, folder):
+        return "OK", [b"3"]
+
+    def response(self, code):
+        return code, [None]
+
+    def _new_tag(self):
+        return b"A001"
+
+    def socket(self):
+        return self.sock
+
+    def readline(self):
+        return self.file.readline()
+
+    def send(self, data):
+        self.sent.append(data)
+        if data.endswith(b"IDLE\r\n"):
+            self.server.sendall(self.greeting)
+        elif data == b"DONE\r\n":
+            self.server.sendall(b"A001 OK IDLE terminated\r\n")
+
+    def push(self, line, delay=0.0):
+        def _push():
+            time.sleep(delay)
+            self.server.sendall(line)
+
+        threading.Thread(target=_push, daemon=True).start()
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+        self.server.close()
+
+
+class IdleWaitTests(unittest.TestCase):
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self.connector = EmailConnector("buyer@example.com", "secret", "gmail")
+
+    def tearDown(self):
+        self.connector.sync_store.close()
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def _use(self, imap):
+        self.connector.connection = imap
+        self.addCleanup(imap.close)
+        return imap
+
+    def test_new_message_ends_idle(self):
+        imap = self._use(FakeIdleIMAP())
+        imap.push(b"* OK Still here\r\n* 4 EXISTS\r\n", delay=0.1)
+
+        start = time.time()
+        self.assertTrue(self.connector.idle_wait("INBOX", timeout=10))
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(imap.sent, [b"A001 IDLE\r\n", b"DONE\r\n"])
+
+    def test_timeout_leaves_idle_cleanly(self):
+        imap = self._use(FakeIdleIMAP())
+
+        self.assertFalse(self.connector.idle_wait("INBOX", timeout=0.2))
+        self.assertEqual(imap.sent[-1], b"DONE\r\n")
+
+    def test_rejected_idle_returns_none(self):
+        imap = self._use(FakeIdleIMAP(greeting=b"A001 BAD IDLE not allowed\r\n"))
+
+        self.assertTrue(self.connector.supports_idle())
+        self.assertIsNone(self.connector.idle_wait("INBOX", timeout=1))
+        self.assertEqual(imap.sent, [b"A001 IDLE\r\n"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from email_processing.imap_parsing import (  # noqa: E402
+    build_partial_message,
+    fetch_item,
+    find_html_part,
+    parse_fetch_response,
+    parse_header_block,
+    parse_status_response,
+)
+from email_processing.processor import EmailProcessor  # noqa: E402
+
+BODYSTRUCTURE_RESPONSE = [
+    b'1 (UID 41 BODYSTRUCTURE ((("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL '
+    b'"QUOTED-PRINTABLE" 120 4 NIL NIL NIL)("TEXT" "HTML" ("CHARSET" "utf-8") '
+    b'NIL NIL "QUOTED-PRINTABLE" 5120 80 NIL NIL NIL) "ALTERNATIVE" ("BOUNDARY" '
+    b'"b1") NIL NIL)("IMAGE" "PNG" ("NAME" "logo.png") "<logo>" NIL "BASE64" '
+    b'90000 NIL ("INLINE" ("FILENAME" "logo.png")) NIL) "RELATED" ("BOUNDARY" '
+    b'"b0") NIL NIL))',
+    b'2 (UID 42 BODYSTRUCTURE ("TEXT" "HTML" ("CHARSET" "iso-8859-1") NIL NIL '
+    b'"7BIT" 300 10 NIL NIL NIL))',
+]
+
+HEADERS = (
+    b"From: BestBuyInfo@emailinfo.bestbuy.com\r\n"
+    b"To: buyer@example.com\r\n"
+    b"Subject: Thanks for your order\r\n"
+    b"Date: Tue, 04 Nov 2025 10:00:00 -0500\r\n\r\n"
+)
+BODY = b"<html><body><p>Order =3D BBY01-806789012345</p></body></html>"
+
+
+class FetchResponseTests(unittest.TestCase):
+    def test_bodystructure_locates_nested_html_part(self):
+        messages = parse_fetch_response(BODYSTRUCTURE_RESPONSE)
+
+        self.assertEqual([m["UID"] for m in messages], [b"41", b"42"])
+        first = find_html_part(messages[0]["BODYSTRUCTURE"])
+        self.assertEqual(first["part"], "1.2")
+        self.assertEqual(first["charset"], "utf-8")
+        self.assertEqual(first["encoding"], "QUOTED-PRINTABLE")
+        self.assertEqual(find_html_part(messages[1]["BODYSTRUCTURE"])["part"], "1")
+
+    def test_literals_and_section_keys(self):
+        msg_data = [
+            (
+                b"7 (UID 41 BODY[HEADER.FIELDS (FROM TO SUBJECT DATE MESSAGE-ID)] "
+                b"{%d}" % len(HEADERS),
+                HEADERS,
+            ),
+            (b" BODY[1.2] {%d}" % len(BODY), BODY),
+            b")",
+        ]
+        fields = parse_fetch_response(msg_data)[0]
+
+        self.assertEqual(fields["UID"], b"41")
+        self.assertEqual(fetch_item(fields, "BODY[HEADER"), HEADERS)
+        self.assertEqual(fetch_item(fields, "BODY[1.2]"), BODY)
+
+    def test_header_prefetch_response(self):
+        block = (
+            b"From: BestBuyInfo@emailinfo.bestbuy.com\r\n"
+            b"Subject: =?UTF-8?Q?=F0=9F=93=A6_Your_package_is_on_its_way.?=\r\n"
+            b" =?UTF-8?Q?_=F0=9F=93=A6?=\r\n"
+            b"Message-ID: <abc@bestbuy.com>\r\n\r\n"
+        )
+        msg_data = [
+            (
+                b"3 (UID 90 RFC822.SIZE 48211 BODY[HEADER.FIELDS (FROM SUBJECT)] {%d}"
+                % len(block),
+                block,
+            ),
+            b")",
+        ]
+        fields = parse_fetch_response(msg_data)[0]
+        headers = parse_header_block(fetch_item(fields, "BODY[HEADER"))
+
+        self.assertEqual(fields["SEQ"], b"3")
+        self.assertEqual(fields["RFC822.SIZE"], b"48211")
+        self.assertEqual(headers["subject"], "📦 Your package is on its way. 📦")
+        self.assertEqual(headers["message-id"], "<abc@bestbuy.com>")
+
+    def test_partial_message_parses_like_full_message(self):
+        message = build_partial_message(
+            HEADERS,
+            BODY,
+            {"part": "1.2", "charset": "utf-8", "encoding": "QUOTED-PRINTABLE"},
+        )
+        address, date, html = EmailProcessor()._parse_email_metadata(
+            (b"41 (UID 41)", message)
+        )
+
+        self.assertEqual(address, "buyer@example.com")
+        self.assertNotEqual(date, "Unknown")
+        self.assertIn("Order = BBY01-806789012345", html)
+
+    def test_status_response(self):
+        self.assertEqual(
+            parse_status_response(
+                [b'"[Gmail]/All Mail" (UIDNEXT 13 MESSAGES 3 HIGHESTMODSEQ 101)']
+            ),
+            {"UIDNEXT": 13, "MESSAGES": 3, "HIGHESTMODSEQ": 101},
+        )
+        self.assertEqual(parse_status_response([None]), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
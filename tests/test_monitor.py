@@ -0,0 +1,111 @@
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import continuous_monitor  # noqa: E402
+from continuous_monitor import ContinuousMonitor  # noqa: E402
+
+
+class FakeConnector:
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+
+    def folder_status(self, folder):
+        return self.statuses.pop(0)
+
+
+class CountingMonitor(ContinuousMonitor):
+    def __init__(self, connector):
+        super().__init__(connector, None)
+        self.checks = 0
+
+    def check_for_new_orders(self, folder):
+        self.checks += 1
+        return False
+
+
+class StatusPrecheckTests(unittest.TestCase):
+    def test_unchanged_folder_skips_check(self):
+        quiet = {"UIDNEXT": 13, "MESSAGES": 3}
+        monitor = CountingMonitor(
+            FakeConnector([quiet, dict(quiet), {"UIDNEXT": 14, "MESSAGES": 4}])
+        )
+
+        for _ in range(3):
+            monitor.run_check_cycle("INBOX")
+
+        self.assertEqual(monitor.checks, 2)
+
+    def test_missing_status_always_checks(self):
+        monitor = CountingMonitor(FakeConnector([None, None]))
+
+        monitor.run_check_cycle("INBOX")
+        monitor.run_check_cycle("INBOX")
+
+        self.assertEqual(monitor.checks, 2)
+
+
+class FakeHandler:
+    def __init__(self, connector, monitoring_date=None):
+        self.deferred_uids = []
+
+    def process_confirmation_emails(self, folder):
+        return [{"number": "BBY01-100", "status": "", "tracking": []}]
+
+    def check_cancellation_emails(self, folder, existing_orders):
+        if "BBY01-100" in existing_orders:
+            return ["BBY01-100"]
+        self.deferred_uids.append(b"7")
+        return []
+
+    def check_shipped_emails(self, folder, existing_orders):
+        return {}
+
+
+class RecordingOutput:
+    def __init__(self):
+        self.saved = []
+
+    def save_orders(self, orders):
+        self.saved.append([dict(order) for order in orders])
+
+    def finalize_database(self):
+        pass
+
+
+class SameCycleTests(unittest.TestCase):
+    def test_cancellation_applies_to_order_confirmed_in_same_cycle(self):
+        output = RecordingOutput()
+        monitor = ContinuousMonitor(FakeConnector([]), output)
+        monitor.last_folder_status = {"UIDNEXT": 13}
+
+        with mock.patch.object(
+            continuous_monitor, "MonitoringOrderHandler", FakeHandler
+        ):
+            self.assertTrue(monitor.check_for_new_orders("INBOX"))
+
+        self.assertEqual(output.saved[-1][0]["status"], "Cancelled")
+        self.assertEqual(monitor.last_folder_status, {"UIDNEXT": 13})
+
+    def test_unapplied_message_forces_next_check(self):
+        class UnknownOrderHandler(FakeHandler):
+            def process_confirmation_emails(self, folder):
+                return []
+
+        monitor = ContinuousMonitor(FakeConnector([]), None)
+        monitor.last_folder_status = {"UIDNEXT": 13}
+
+        with mock.patch.object(
+            continuous_monitor, "MonitoringOrderHandler", UnknownOrderHandler
+        ):
+            monitor.check_for_new_orders("INBOX")
+
+        self.assertIsNone(monitor.last_folder_status)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import io
+import sys
+import time
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from email_processing.handlers import (  # noqa: E402
+    AmazonEmailHandler,
+    CostcoEmailHandler,
+)
+from email_processing.orders import OrderCollection  # noqa: E402
+
+
+class FakeConnector:
+    batch_size = 50
+
+
+class OrderCollectionTests(unittest.TestCase):
+    def test_wrap_shares_the_callers_list(self):
+        orders = [{"number": "A1"}, {"order_number": "A2"}]
+        collection = OrderCollection.wrap(orders)
+        collection.append({"number": "A3"})
+
+        self.assertEqual(len(orders), 3)
+        self.assertIs(OrderCollection.wrap(collection), collection)
+        self.assertIn("A2", collection)
+        self.assertEqual(collection.find("A3"), orders[2])
+        self.assertIsNone(collection.find("missing"))
+
+    def test_merge_tracking_keeps_order_and_skips_duplicates(self):
+        order = {"number": "A1", "tracking": ["1Z1", "1Z1", "1Z2"]}
+        collection = OrderCollection([order])
+
+        self.assertEqual(collection.merge_tracking(order, ["1Z2", "1Z3"]), 1)
+        self.assertEqual(collection.merge_tracking(order, ["1Z3", "1Z4"]), 1)
+        self.assertEqual(order["tracking"], ["1Z1", "1Z2", "1Z3", "1Z4"])
+
+        order["tracking"] = ["9Z9"]
+        collection.merge_tracking(order, ["1Z1"])
+        self.assertEqual(order["tracking"], ["9Z9", "1Z1"])
+
+
+class HandlerMergeTests(unittest.TestCase):
+    def test_costco_updates_match_by_order_number(self):
+        handler = CostcoEmailHandler(FakeConnector())
+        orders = [
+            {"number": str(i), "status": "", "tracking": []} for i in range(30000)
+        ]
+        collection = OrderCollection.wrap(orders)
+
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            for i in range(40000):
+                handler._apply_shipped_result(
+                    {"order_number": str(i % 30000), "tracking_numbers": [f"T{i % 7}"]},
+                    collection,
+                )
+        elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 10)
+        self.assertEqual(orders[5]["status"], "Shipped")
+        self.assertEqual(orders[5]["tracking"], ["T5", "T3"])
+        self.assertFalse(
+            handler._apply_cancellation_result({"order_number": "x"}, collection)
+        )
+
+    def test_amazon_shipment_updates_every_split_item(self):
+        handler = AmazonEmailHandler(FakeConnector())
+        orders = OrderCollection(
+            [
+                {"number": "111", "asin": "B1", "quantity": "1"},
+                {"number": "111", "asin": "B2", "quantity": "2"},
+                {"number": "222", "asin": "B1", "quantity": "1"},
+            ]
+        )
+        result = {
+            "order_number": "111",
+            "products": [{"asin": "B1", "quantity": 1}, {"asin": "B2", "quantity": 1}],
+        }
+
+        self.assertEqual(handler._process_shipped_result(result, orders), 2)
+        self.assertEqual(orders[0]["status"], "Shipped")
+        self.assertEqual(orders[1]["status"], "Partially Shipped")
+        self.assertNotIn("status", orders[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from email_processing.parsers.bb_parser import OrderParser  # noqa: E402
+from email_processing.parsers.parsed_email import ParsedEmail  # noqa: E402
+from email_processing.parsers.xbox_parser import XboxParser  # noqa: E402
+
+XBOX_HTML = """
+<html><body>
+<span style="font-weight: 700; font-size: 14px; line-height: 18px; font-family: Arial">
+Xbox Game Pass Ultimate</span>
+<p><strong>Here is your code:</strong> <strong>abcde-fghij-klmno-pqrst-uvwxz</strong></p>
+</body></html>
+"""
+
+
+class OrderNumberFastPathTests(unittest.TestCase):
+    def test_single_order_number_skips_dom(self):
+        parsed = ParsedEmail(
+            '<a href="https://bestbuy.com/BBY01-806789012345">BBY01-806789012345</a>'
+        )
+        order_number = OrderParser.extract_order_number(parsed, "cancelled", fast=True)
+
+        self.assertEqual(order_number, "BBY01-806789012345")
+        self.assertIsNone(parsed._soup)
+        self.assertFalse(parsed._tree_built)
+
+    def test_ambiguous_order_numbers_fall_back_to_selectors(self):
+        html = (
+            '<td style="padding-bottom:12px;">Order number: '
+            '<span style="font-weight: 700; font-size: 14px; line-height: 18px">'
+            "BBY01-806789012345</span></td><p>See also BBY01-806789099999</p>"
+        )
+        self.assertIsNone(OrderParser.find_order_number(html))
+        self.assertEqual(
+            OrderParser.extract_order_number(ParsedEmail(html), "cancellation", True),
+            "BBY01-806789012345",
+        )
+
+
+class ShippingAddressTests(unittest.TestCase):
+    def test_address_is_read_from_the_tree_without_soup(self):
+        html = (
+            "<table><tr><td>Shipping to:</td></tr><tr><td>"
+            '<span style="font-size: 16px">Jane Doe<br>1 Main St<br>'
+            "Richmond, VA 23220</span></td></tr></table>"
+        )
+        parsed = ParsedEmail(html)
+
+        self.assertIn("VA 23220", OrderParser.extract_shipping_address(parsed))
+        self.assertIn("Richmond, VA 23220", parsed.strings)
+        self.assertIsNone(parsed._soup)
+
+    def test_old_format_uses_last_address_line(self):
+        html = (
+            "<table><tr><td>Your order is shipping to:"
+            '<span style="font-weight: 700; font-size: 20px">Jane Doe<br>'
+            "1 Main St<br>Richmond, VA 23220</span></td></tr></table>"
+        )
+
+        self.assertIn("VA 23220", OrderParser.extract_shipping_address(html))
+
+
+class XboxFastPathTests(unittest.TestCase):
+    def setUp(self):
+        self.parser = XboxParser()
+
+    def test_fast_path_matches_dom_code(self):
+        parsed = ParsedEmail(XBOX_HTML)
+        fast = self.parser.extract_xbox_code(parsed, details=False)
+
+        self.assertEqual(fast, {"code": "ABCDE-FGHIJ-KLMNO-PQRST-UVWXZ"})
+        self.assertFalse(parsed._tree_built)
+
+        full = self.parser.extract_xbox_code(XBOX_HTML)
+        self.assertEqual(full["code"], fast["code"])
+        self.assertEqual(full["title"], "Xbox Game Pass Ultimate")
+
+    def test_missing_marker_uses_dom(self):
+        self.assertIsNone(
+            self.parser.find_xbox_code("xbox ABCDE-FGHIJ-KLMNO-PQRST-UVWXZ")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import io
+import sys
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from email_processing.parse_pool import (  # noqa: E402
+    get_parse_pool,
+    parse_raw_message,
+    shutdown_parse_pool,
+)
+from email_processing.pipeline import EmailPipeline  # noqa: E402
+from email_processing.processor import EmailProcessor  # noqa: E402
+
+RAW_CONFIRMATION = (
+    b"From: BestBuyInfo@emailinfo.bestbuy.com\r\n"
+    b"Subject: Thanks for your order\r\n"
+    b"Content-Type: text/html\r\n\r\n"
+    b"<html><body><p>Order Number: BBY01-806123456789</p></body></html>"
+)
+
+
+class FakeConnector:
+    batch_size = 3
+
+    def __init__(self):
+        self.batches_fetched = 0
+
+    def iter_fetch_batches(self, message_ids, use_uid=True):
+        for i in range(0, len(message_ids), self.batch_size):
+            self.batches_fetched += 1
+            yield [(b"header", msg_id) for msg_id in message_ids[i : i + 3]]
+
+
+class FakeProcessor:
+    def parse(self, email_data, suffix=""):
+        if email_data[1] == b"5":
+            raise ValueError("broken email")
+        return {"order_number": email_data[1].decode() + suffix}
+
+
+class EmailPipelineTests(unittest.TestCase):
+    def setUp(self):
+        self.connector = FakeConnector()
+        self.pipeline = EmailPipeline(
+            self.connector,
+            FakeProcessor(),
+            max_workers=2,
+            queue_depth=4,
+            backend="thread",
+        )
+        self.message_ids = [str(i).encode() for i in range(20)]
+
+    def test_every_message_is_yielded_once(self):
+        results = list(self.pipeline.run(self.message_ids, "parse", suffix="-x"))
+
+        self.assertEqual(sorted(idx for idx, _, _ in results), list(range(20)))
+        by_idx = {idx: result for idx, _, result in results}
+        self.assertEqual(by_idx[0], {"order_number": "0-x"})
+        self.assertEqual(by_idx[5], {})
+
+    def test_closing_early_stops_the_producer(self):
+        results = self.pipeline.run([str(i).encode() for i in range(300)], "parse")
+        next(results)
+        results.close()
+
+        self.assertLess(self.connector.batches_fetched, 100)
+
+
+class BrokenPool:
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+
+class ProcessBackendTests(unittest.TestCase):
+    def tearDown(self):
+        shutdown_parse_pool()
+
+    def test_pool_parses_like_the_in_process_parser(self):
+        with redirect_stdout(io.StringIO()):
+            expected = EmailProcessor().process_confirmation_email(RAW_CONFIRMATION)
+            future = get_parse_pool(1).submit(
+                parse_raw_message, "process_confirmation_email", RAW_CONFIRMATION, {}
+            )
+            self.assertEqual(future.result(timeout=60), expected)
+
+    def test_broken_pool_falls_back_to_threads(self):
+        pipeline = EmailPipeline(
+            FakeConnector(), FakeProcessor(), max_workers=2, backend="process"
+        )
+        message_ids = [str(i).encode() for i in range(12)]
+        with (
+            mock.patch(
+                "email_processing.pipeline.get_parse_pool", return_value=BrokenPool()
+            ),
+            redirect_stdout(io.StringIO()),
+        ):
+            results = list(pipeline.run(message_ids, "parse"))
+
+        self.assertEqual(pipeline.backend, "thread")
+        self.assertEqual(sorted(idx for idx, _, _ in results), list(range(12)))
+        by_idx = {idx: result for idx, _, result in results}
+        self.assertEqual(by_idx[3], {"order_number": "3"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import io
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from email_processing.rate_control import (  # noqa: E402
+    RateController,
+    is_throttle_reply,
+    is_throttle_response,
+)
+
+LIMITS = {
+    "batch_size": {"min": 10, "start": 50, "max": 100, "step": 25},
+    "batch_delay": {"min": 0.0, "start": 0.5, "max": 4.0, "step": 0.25},
+    "fetch_delay": {"min": 0.0, "start": 0.1, "max": 1.0, "step": 0.05},
+    "concurrency": {"min": 1, "start": 1, "max": 3},
+}
+
+
+class RateControllerTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "rate_imap_example_com.json"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_healthy_batches_speed_up_within_bounds(self):
+        rate = RateController(LIMITS, self.path)
+        for _ in range(5):
+            rate.record_success()
+
+        self.assertEqual(rate.get("batch_size"), 100)
+        self.assertEqual(rate.get("batch_delay"), 0.0)
+        self.assertEqual(rate.get("fetch_delay"), 0.0)
+        self.assertEqual(rate.get("concurrency"), 3)
+
+    def test_throttle_halves_batch_and_backs_off(self):
+        rate = RateController(LIMITS, self.path)
+        with redirect_stdout(io.StringIO()):
+            rate.record_throttle("[THROTTLED] Too many commands")
+
+        self.assertEqual(rate.get("batch_size"), 25)
+        self.assertEqual(rate.get("batch_delay"), 1.0)
+        self.assertEqual(rate.get("concurrency"), 1)
+        self.assertEqual(rate.throttle_count, 1)
+
+    def test_slow_commands_hold_the_current_pace(self):
+        rate = RateController({**LIMITS, "slow_command_seconds": 2.0}, self.path)
+        rate.record_command(3.0)
+        rate.record_success()
+
+        self.assertEqual(rate.get("batch_size"), 50)
+
+    def test_learned_values_survive_restart(self):
+        rate = RateController(LIMITS, self.path)
+        rate.record_success()
+        rate.save()
+
+        restored = RateController(LIMITS, self.path)
+        self.assertEqual(restored.get("batch_size"), 75)
+        self.assertEqual(restored.get("batch_delay"), 0.25)
+
+        narrower = {**LIMITS, "batch_size": {**LIMITS["batch_size"], "max": 60}}
+        self.assertEqual(RateController(narrower, self.path).get("batch_size"), 60)
+
+    def test_throttle_signals(self):
+        self.assertTrue(is_throttle_response("[THROTTLED] Please slow down"))
+        self.assertTrue(is_throttle_reply("NO", [b"Account exceeded bandwidth limits"]))
+        self.assertTrue(is_throttle_reply("BAD", [b"Server busy"]))
+        self.assertFalse(is_throttle_reply("NO", [b"No such message"]))
+        self.assertFalse(is_throttle_reply("OK", [b"done"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from config.settings import COSTCO_SEARCH_CRITERIA, SEARCH_CRITERIA  # noqa: E402
+from email_processing.connector import EmailConnector  # noqa: E402
+from email_processing.scanner import FolderScanner  # noqa: E402
+
+SCAN_TYPES = [
+    ("bestbuy", "confirmation"),
+    ("bestbuy", "cancellation"),
+    ("bestbuy", "shipped"),
+    ("costco", "shipped"),
+]
+
+HEADERS = {
+    b"11": {
+        "from": "Best Buy <BestBuyInfo@emailinfo.bestbuy.com>",
+        "subject": "Thanks for your order",
+    },
+    b"12": {
+        "from": "Best Buy <BestBuyInfo@emailinfo.bestbuy.com>",
+        "subject": "📦 Your package is on its way. 📦",
+    },
+    b"13": {
+        "from": "Costco <orderstatus@costco.com>",
+        "subject": "Your Costco.com Order Number 123 Was Shipped",
+    },
+    b"14": {"from": "news@example.com", "subject": "Weekly deals"},
+}
+
+
+class FakeIMAP:
+    capabilities = ("IMAP4REV1",)
+
+    def __init__(self):
+        self.searches = []
+
+    def select(self, folder):
+        return "OK", [b"4"]
+
+    def response(self, code):
+        return code, [None]
+
+    def uid(self, command, *args):
+        self.searches.append(args[-1].decode())
+        return "OK", [b" ".join(HEADERS)]
+
+
+class FolderScannerTests(unittest.TestCase):
+    imap_class = FakeIMAP
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self.imap = self.imap_class()
+        self.connector = EmailConnector("buyer@example.com", "secret", "gmail")
+        self.connector.connection = self.imap
+        self.connector.fetch_headers_batch = lambda uids: [
+            (uid, HEADERS[uid]) for uid in uids
+        ]
+        self.scanner = FolderScanner(self.connector, SCAN_TYPES)
+
+    def tearDown(self):
+        self.connector.sync_store.close()
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def test_combined_query_covers_every_type(self):
+        query = self.scanner.combined_query()
+
+        self.assertEqual(query.count("OR (SINCE"), len(SCAN_TYPES) - 1)
+        for rule in self.scanner.rules:
+            self.assertIn(f"({rule['query']})", query)
+
+    def test_scan_classifies_and_serves_per_type_searches(self):
+        results = self.scanner.scan("INBOX")
+
+        self.assertEqual(results[("bestbuy", "confirmation")], [b"11"])
+        self.assertEqual(results[("bestbuy", "shipped")], [b"12"])
+        self.assertEqual(results[("bestbuy", "cancellation")], [])
+        self.assertEqual(results[("costco", "shipped")], [b"13"])
+        self.assertEqual(len(self.imap.searches), 1)
+
+        success, uids = self.connector.search_emails(
+            "INBOX", SEARCH_CRITERIA["shipped"]
+        )
+        self.assertTrue(success)
+        self.assertEqual(uids, [b"12"])
+
+        self.connector.mark_uid_processed(b"13")
+        success, uids = self.connector.search_emails(
+            "INBOX", COSTCO_SEARCH_CRITERIA["shipped"]
+        )
+        self.assertEqual(uids, [])
+        self.assertEqual(len(self.imap.searches), 1)
+
+
+class VersionedIMAP(FakeIMAP):
+    def response(self, code):
+        return code, [b"7"] if code == "UIDVALIDITY" else [None]
+
+    def uid(self, command, *args):
+        criteria = args[-1].decode()
+        self.searches.append(criteria)
+        uids = list(HEADERS)
+        if criteria.startswith("UID "):
+            first = int(criteria.split()[1].split(":")[0])
+            uids = [uid for uid in uids if int(uid) >= first] or [uids[-1]]
+        return "OK", [b" ".join(uids)]
+
+
+class ScanProgressTests(FolderScannerTests):
+    imap_class = VersionedIMAP
+
+    def _handle(self, criteria):
+        success, uids = self.connector.search_emails("INBOX", criteria)
+        self.assertTrue(success)
+        for uid in uids:
+            self.connector.mark_uid_processed(uid)
+        self.connector.checkpoint()
+        return uids
+
+    def test_scan_records_progress_under_per_type_criteria(self):
+        self.scanner.scan("INBOX")
+        self.assertEqual(self._handle(SEARCH_CRITERIA["confirmation"]), [b"11"])
+
+        store = self.connector.sync_store
+        confirmation = self.scanner.rules[0]["query"]
+        self.assertEqual(store.get_high_water("INBOX", confirmation)["last_uid"], 11)
+        self.assertIsNone(store.get_high_water("INBOX", self.imap.searches[0]))
+
+        self._handle(SEARCH_CRITERIA["confirmation"])
+        self.assertTrue(self.imap.searches[-1].startswith("UID 12:* "))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from email_processing.connector import EmailConnector  # noqa: E402
+
+
+class FakeIMAP:
+    capabilities = ("IMAP4REV1",)
+
+    def __init__(self, name):
+        self.name = name
+        self.selected = None
+        self.logged_out = False
+
+    def select(self, folder, readonly=False):
+        self.selected = folder
+        return "OK", [b"3"]
+
+    def logout(self):
+        self.logged_out = True
+
+
+class SessionRefreshTests(unittest.TestCase):
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self.opened = []
+        self.connector = EmailConnector("buyer@example.com", "secret", "gmail")
+        self.connector._open_connection = self._open_connection
+        self.connector.connection = FakeIMAP("primary")
+        self.connector.current_folder = "Orders/2025"
+        self.connector.max_fetches_per_session = 10
+
+    def tearDown(self):
+        self.connector.sync_store.close()
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def _open_connection(self):
+        connection = FakeIMAP(f"standby-{len(self.opened)}")
+        self.opened.append(connection)
+        return connection
+
+    def test_standby_opens_near_limit_and_swaps_in(self):
+        self.connector.fetch_count = 5
+        self.assertTrue(self.connector._ensure_session())
+        self.assertEqual(self.opened, [])
+
+        self.connector.fetch_count = 9
+        self.connector._ensure_session()
+        self.connector._standby_thread.join(timeout=5)
+        self.assertEqual(self.opened[0].selected, '"Orders/2025"')
+
+        self.connector.fetch_count = 10
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(self.connector._ensure_session())
+
+        self.assertIs(self.connector.connection, self.opened[0])
+        self.assertEqual(self.connector.fetch_count, 0)
+        self.assertEqual(len(self.opened), 1)
+        self.assertIsNone(self.connector._standby)
+
+    def test_standby_follows_folder_change(self):
+        self.connector.fetch_count = 9
+        self.connector._ensure_session()
+        self.connector._standby_thread.join(timeout=5)
+        self.connector.current_folder = "INBOX"
+
+        self.connector.fetch_count = 10
+        with redirect_stdout(io.StringIO()):
+            self.connector._ensure_session()
+
+        self.assertIs(self.connector.connection, self.opened[0])
+        self.assertEqual(self.opened[0].selected, "INBOX")
+
+    def test_refresh_without_standby_reconnects(self):
+        self.connector.fetch_count = 10
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(self.connector._ensure_session())
+
+        self.assertIs(self.connector.connection, self.opened[0])
+        self.assertEqual(self.opened[0].selected, '"Orders/2025"')
+
+
+if __name__ == "__main__":
+    unittest.main()
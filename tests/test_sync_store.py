@@ -0,0 +1,129 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from email_processing.connector import EmailConnector  # noqa: E402
+from email_processing.sync_store import SyncStateStore, UidSet  # noqa: E402
+
+
+class UidSetTests(unittest.TestCase):
+    def test_adjacent_uids_merge_into_ranges(self):
+        uids = UidSet()
+        for uid in (5, 3, 9, 4, 8, 10):
+            self.assertTrue(uids.add(uid))
+        self.assertFalse(uids.add(4))
+
+        self.assertEqual(uids.ranges(), [(3, 5), (8, 10)])
+        self.assertEqual(len(uids), 6)
+        self.assertIn(9, uids)
+        self.assertNotIn(7, uids)
+
+        uids.add(6)
+        uids.add(7)
+        self.assertEqual(uids.ranges(), [(3, 10)])
+
+    def test_text_round_trip(self):
+        uids = UidSet([(1, 4), (7, 7), (10, 12)])
+        self.assertEqual(uids.to_text(), "1-4,7,10-12")
+        self.assertEqual(UidSet.from_text(uids.to_text()).ranges(), uids.ranges())
+        self.assertEqual(len(UidSet.from_text("")), 0)
+
+
+class SyncStateStoreTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "sync.db"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_journal_and_compaction_survive_reopen(self):
+        store = SyncStateStore(self.path, compact_threshold=4)
+        for uid in (1, 2, 3):
+            store.mark_processed("INBOX", 7, uid)
+        store.checkpoint()
+        store.connection.close()
+
+        store = SyncStateStore(self.path, compact_threshold=4)
+        self.assertEqual(store.processed("INBOX", 7).ranges(), [(1, 3)])
+        store.mark_processed("INBOX", 7, 10)
+        store.checkpoint()
+        journal = store.connection.execute("SELECT COUNT(*) FROM uid_journal")
+        self.assertEqual(journal.fetchone()[0], 0)
+        store.close()
+
+        store = SyncStateStore(self.path)
+        self.assertEqual(store.processed("INBOX", 7).ranges(), [(1, 3), (10, 10)])
+        self.assertEqual(len(store.processed("INBOX", 8)), 0)
+        store.close()
+
+    def test_legacy_uids_move_to_first_folder(self):
+        store = SyncStateStore(self.path)
+        self.assertEqual(store.import_legacy_uids([4, 5, 6]), 3)
+
+        self.assertEqual(store.processed("INBOX", 7).ranges(), [(4, 6)])
+        self.assertEqual(len(store.processed("Archive", 3)), 0)
+        store.close()
+
+    def test_large_uid_sets_load_quickly(self):
+        store = SyncStateStore(self.path)
+        store.import_legacy_uids(uid for uid in range(1, 1_000_001) if uid % 2)
+        store.close()
+
+        store = SyncStateStore(self.path)
+        start = time.perf_counter()
+        processed = store.processed("INBOX", 1)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(processed), 500_000)
+        self.assertIn(999_999, processed)
+        self.assertLess(elapsed, 5)
+        store.close()
+
+
+class ConnectorMigrationTests(unittest.TestCase):
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def test_processed_uids_json_is_migrated(self):
+        cache_dir = Path("cache")
+        cache_dir.mkdir()
+        legacy = cache_dir / "processed_uids_buyer_example_com.json"
+        legacy.write_text(json.dumps(["3", "4", "9"]))
+
+        connector = EmailConnector("buyer@example.com", "secret", "gmail")
+        connector.current_folder = "INBOX"
+        connector.current_uidvalidity = 7
+
+        self.assertFalse(legacy.exists())
+        self.assertTrue(legacy.with_suffix(".json.migrated").exists())
+        self.assertEqual(
+            connector.sync_store.processed("INBOX", 7).ranges(), [(3, 4), (9, 9)]
+        )
+
+        connector.mark_uid_processed(b"5")
+        connector.save_progress()
+        connector.sync_store.close()
+
+        connector = EmailConnector("buyer@example.com", "secret", "gmail")
+        self.assertEqual(
+            connector.sync_store.processed("INBOX", 7).ranges(), [(3, 5), (9, 9)]
+        )
+        connector.sync_store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()